@@ -1,9 +1,20 @@
 from fastapi import Depends, HTTPException, Header, status
 from typing import Optional, List, Dict, Any
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import WriteConcern
 from app.models.settings import Settings
 from app.utils.vector_store import VectorStore
+from app.utils.chunk_text_store import ChunkTextStore
 from app.utils.embedding_model import EmbeddingModel
+from app.utils.process_pool import ExtractionPool
+from app.utils.http_fetcher import HttpFetcher
+from app.utils.ocr import OcrEngine
+from app.services.job_queue import JobQueue
+from app.services.ingest_pipeline import IngestPipeline
+from app.services.hydration import create_cache
+from app.services.query_recorder import QueryRecorder
+from app.services.suggestions import SuggestionIndex
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -11,49 +22,225 @@ from dotenv import load_dotenv
 load_dotenv()
 settings = Settings()
 
-# Database connection
-_db_client = None
-_db = None
+class Resources:
+    """
+    Clients, models and pools shared by everything in this process
 
-# Vector store
-_vector_store = None
+    The API creates the expensive ones at startup (see open_resources);
+    anything not created yet is created on first use, e.g. in scripts.
+    """
 
-# Embedding model
-_embedding_model = None
+    def __init__(self):
+        self.db_client: Optional[AsyncIOMotorClient] = None
+        self.db = None
+        self.vector_store: Optional[VectorStore] = None
+        self.embedding_model: Optional[EmbeddingModel] = None
+        # Extraction process pool
+        self.extraction_pool: Optional[ExtractionPool] = None
+        self.http_fetcher: Optional[HttpFetcher] = None
+        # OCR engine with its own process pool
+        self.ocr_engine: Optional[OcrEngine] = None
+        # Ingestion job queue
+        self.job_queue: Optional[JobQueue] = None
+        # Embed and persist stages shared by ingestion jobs
+        self.ingest_pipeline: Optional[IngestPipeline] = None
+        # Chunk and document records read by search and chat
+        self.hydration_cache = None
+        # Buffered search query counts
+        self.query_recorder: Optional[QueryRecorder] = None
+        # Prefix indexes behind /search/suggest
+        self.suggestion_index: Optional[SuggestionIndex] = None
+        # Keep concurrent first uses from loading the index or model twice
+        self.vector_store_lock = asyncio.Lock()
+        self.embedding_model_lock = asyncio.Lock()
+
+resources = Resources()
+
+def mongo_client_options() -> Dict[str, Any]:
+    """Connection pool, timeout and compression options of the Mongo client"""
+    options = {
+        "maxPoolSize": settings.mongodb_max_pool_size,
+        "minPoolSize": settings.mongodb_min_pool_size,
+        "maxIdleTimeMS": settings.mongodb_max_idle_time_ms or None,
+        "connectTimeoutMS": settings.mongodb_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+        "socketTimeoutMS": settings.mongodb_socket_timeout_ms or None
+    }
+    if settings.mongodb_compressors:
+        options["compressors"] = settings.mongodb_compressors
+    return options
 
 async def get_database():
     """Get database client"""
-    global _db_client, _db
-    if _db_client is None:
-        _db_client = AsyncIOMotorClient(settings.mongodb_uri)
-        _db = _db_client.get_database()
-    return _db
+    if resources.db_client is None:
+        resources.db_client = AsyncIOMotorClient(settings.mongodb_uri, **mongo_client_options())
+        resources.db = resources.db_client.get_database()
+    return resources.db
+
+def ingest_write_concern() -> WriteConcern:
+    """Write concern for the chunk writes of ingestion"""
+    w = settings.ingest_write_concern
+    return WriteConcern(w=int(w) if w.isdigit() else w, j=settings.ingest_write_journal or None)
 
 async def get_vector_store():
     """Get vector store instance"""
-    global _vector_store
-    if _vector_store is None:
-        # Initialize vector store
-        _vector_store = VectorStore(
-            dimension=settings.embedding_dimension,
-            index_type=settings.index_type
-        )
-        # Load index if exists
-        await _vector_store.load_or_create_index()
-    return _vector_store
+    if resources.vector_store is None:
+        async with resources.vector_store_lock:
+            if resources.vector_store is None:
+                vector_store = VectorStore(
+                    dimension=settings.embedding_dimension,
+                    index_type=settings.index_type,
+                    text_store=ChunkTextStore(compression=settings.chunk_text_compression) if settings.chunk_text_store else None
+                )
+                # Load index if exists
+                await vector_store.load_or_create_index()
+                resources.vector_store = vector_store
+    elif not settings.job_workers_in_process:
+        # Ingestion runs in a separate worker process that saves the index.
+        # Its invalidations do not reach this process, so cached records
+        # are dropped whenever it has changed the index.
+        if await resources.vector_store.reload_if_changed():
+            (await get_hydration_cache()).clear()
+    return resources.vector_store
+
+async def get_hydration_cache():
+    """Get hydration cache instance"""
+    if resources.hydration_cache is None:
+        resources.hydration_cache = create_cache(settings.hydration_cache_size * 1024 * 1024)
+    return resources.hydration_cache
 
 async def get_embedding_model():
     """Get embedding model instance"""
-    global _embedding_model
-    if _embedding_model is None:
-        # Initialize embedding model
-        _embedding_model = EmbeddingModel(
-            model_name=settings.model_name,
-            use_openai=settings.use_openai_embeddings,
-            openai_api_key=settings.openai_api_key,
-            openai_model=settings.openai_embedding_model
+    if resources.embedding_model is None:
+        async with resources.embedding_model_lock:
+            if resources.embedding_model is None:
+                # Loading the model takes seconds: keep the event loop running
+                resources.embedding_model = await asyncio.to_thread(
+                    EmbeddingModel,
+                    model_name=settings.model_name,
+                    use_openai=settings.use_openai_embeddings,
+                    openai_api_key=settings.openai_api_key,
+                    openai_model=settings.openai_embedding_model,
+                    cache_dir=os.path.join("data", "models")
+                )
+    return resources.embedding_model
+
+async def get_extraction_pool():
+    """Get extraction process pool instance"""
+    if resources.extraction_pool is None:
+        resources.extraction_pool = ExtractionPool(
+            max_workers=settings.extraction_workers or None,
+            job_timeout=settings.extraction_job_timeout,
+            memory_limit_mb=settings.extraction_memory_limit
+        )
+    return resources.extraction_pool
+
+async def get_ocr_engine():
+    """Get OCR engine instance, or None if OCR is disabled"""
+    if resources.ocr_engine is None and settings.ocr_enabled:
+        resources.ocr_engine = OcrEngine(
+            pool=ExtractionPool(
+                max_workers=settings.ocr_workers,
+                job_timeout=settings.ocr_job_timeout,
+                memory_limit_mb=settings.extraction_memory_limit
+            ),
+            languages=settings.ocr_languages
+        )
+    return resources.ocr_engine
+
+async def get_job_queue():
+    """Get ingestion job queue instance"""
+    if resources.job_queue is None:
+        resources.job_queue = JobQueue(
+            await get_database(),
+            max_attempts=settings.job_max_attempts,
+            backoff=settings.job_retry_backoff,
+            backoff_max=settings.job_retry_backoff_max,
+            lease=settings.job_lease
         )
-    return _embedding_model
+    return resources.job_queue
+
+async def get_ingest_pipeline():
+    """Get ingestion pipeline instance"""
+    if resources.ingest_pipeline is None:
+        db = (await get_database()).with_options(write_concern=ingest_write_concern())
+        vector_store = await get_vector_store()
+        embedding_model = await get_embedding_model()
+        if resources.ingest_pipeline is None:
+            resources.ingest_pipeline = IngestPipeline(
+                db,
+                vector_store,
+                embedding_model,
+                queue_size=settings.pipeline_queue_size,
+                embed_workers=settings.pipeline_embed_workers,
+                embed_batch_size=settings.pipeline_embed_batch_size,
+                persist_workers=settings.pipeline_persist_workers,
+                persist_batch_size=settings.pipeline_persist_batch_size,
+                embedding_storage=settings.embedding_storage
+            )
+    return resources.ingest_pipeline
+
+async def get_query_recorder():
+    """Get search query recorder instance"""
+    if resources.query_recorder is None:
+        resources.query_recorder = QueryRecorder(
+            await get_database(),
+            flush_interval=settings.query_record_flush_interval,
+            max_pending=settings.query_record_max_pending,
+            on_flush=(await get_suggestion_index()).add_queries
+        )
+    return resources.query_recorder
+
+async def get_suggestion_index():
+    """Get suggestion index instance (built by a startup task)"""
+    if resources.suggestion_index is None:
+        resources.suggestion_index = SuggestionIndex(
+            max_distance=settings.spell_max_distance,
+            min_word_count=settings.spell_min_word_count
+        )
+    return resources.suggestion_index
+
+async def get_http_fetcher():
+    """Get shared HTTP fetcher instance"""
+    if resources.http_fetcher is None:
+        resources.http_fetcher = HttpFetcher(
+            max_connections=settings.fetch_max_connections,
+            max_per_host=settings.fetch_max_per_host,
+            timeout=settings.fetch_timeout,
+            max_bytes=settings.fetch_max_size * 1024 * 1024
+        )
+    return resources.http_fetcher
+
+async def open_resources():
+    """
+    Create the shared resources up front, so the first request does not
+    pay for connecting, loading the index or loading the model
+    """
+    db = await get_database()
+    # Establish the connection pool now rather than on the first query
+    await db.command("ping")
+    vector_store, embedding_model = await asyncio.gather(get_vector_store(), get_embedding_model())
+    if not settings.use_openai_embeddings:
+        # The first encode initializes the model's kernels
+        await embedding_model.embed_query("warm up")
+    await get_hydration_cache()
+    await get_job_queue()
+
+async def close_resources():
+    """Stop worker processes and pipeline stages and close connections"""
+    if resources.query_recorder is not None:
+        # Buffered query counts would be lost otherwise
+        await resources.query_recorder.flush()
+    if resources.extraction_pool is not None:
+        resources.extraction_pool.shutdown()
+    if resources.ocr_engine is not None:
+        resources.ocr_engine.shutdown()
+    if resources.ingest_pipeline is not None:
+        resources.ingest_pipeline.shutdown()
+    if resources.http_fetcher is not None:
+        await resources.http_fetcher.close()
+    if resources.db_client is not None:
+        resources.db_client.close()
 
 async def verify_api_key(x_api_key: Optional[str] = Header(None)):
     """Verify API key in header"""
@@ -73,4 +260,4 @@ async def verify_api_key(x_api_key: Optional[str] = Header(None)):
 
 async def get_settings():
     """Get application settings"""
-    return settings
\ No newline at end of file
+    return settings
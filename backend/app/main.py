@@ -7,10 +7,15 @@ import time
 from typing import List, Optional, Dict, Any
 
 # Internal imports
-from app.routers import search, documents, embeddings, admin
-from app.dependencies import verify_api_key, get_vector_store, get_database
+from app.routers import search, documents, embeddings, admin, jobs
+from app.dependencies import verify_api_key, get_vector_store, get_database, get_query_recorder, get_suggestion_index, close_resources
 from app.models.settings import Settings
 from app.services.init_service import initialize_system
+from app.services.refresh_service import run_refresh_scheduler
+from app.services.suggestions import run_suggestion_index
+from app.worker import run_worker
+from app.utils.upload_limit import UploadSizeLimitMiddleware
+import asyncio
 
 # Load environment variables
 load_dotenv()
@@ -25,6 +30,18 @@ app = FastAPI(
 # Load settings
 settings = Settings()
 
+# Periodic refresh of URL documents
+_refresh_task = None
+
+# Ingestion job worker, when it runs in the API process
+_worker_task = None
+
+# Periodic flush of recorded search queries
+_query_recorder_task = None
+
+# Builds and periodically rebuilds the suggestion index
+_suggestion_task = None
+
 # Configure CORS
 origins = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
 app.add_middleware(
@@ -35,6 +52,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized uploads while they are received
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.max_file_size * 1024 * 1024,
+    paths=["/documents/upload"]
+)
+
 # Middleware for request logging and API key verification
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -72,6 +96,7 @@ app.include_router(search.router, tags=["Search"])
 app.include_router(documents.router, tags=["Documents"])
 app.include_router(embeddings.router, tags=["Embeddings"])
 app.include_router(admin.router, tags=["Admin"])
+app.include_router(jobs.router, tags=["Jobs"])
 
 @app.get("/health")
 async def health_check():
@@ -81,11 +106,38 @@ async def health_check():
 @app.on_event("startup")
 async def startup_event():
     """Initialize system on startup"""
+    global _refresh_task, _worker_task, _query_recorder_task, _suggestion_task
     try:
         await initialize_system()
     except Exception as e:
         print(f"Error initializing system: {e}")
         raise
+    
+    if settings.refresh_interval > 0:
+        _refresh_task = asyncio.create_task(run_refresh_scheduler(settings))
+    if settings.job_workers_in_process:
+        _worker_task = asyncio.create_task(run_worker())
+    _query_recorder_task = asyncio.create_task((await get_query_recorder()).run())
+    _suggestion_task = asyncio.create_task(run_suggestion_index(
+        await get_suggestion_index(),
+        await get_database(),
+        settings.suggest_rebuild_interval
+    ))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker processes and connections on shutdown"""
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+    if _worker_task is not None:
+        # Jobs cut short are resumed once their lease expires
+        _worker_task.cancel()
+    if _suggestion_task is not None:
+        _suggestion_task.cancel()
+    if _query_recorder_task is not None:
+        # close_resources flushes what is still buffered
+        _query_recorder_task.cancel()
+    await close_resources()
 
 if __name__ == "__main__":
     import uvicorn
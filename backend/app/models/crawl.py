@@ -0,0 +1,62 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any
+
+class SiteCrawlRequest(BaseModel):
+    url: str
+    max_depth: Optional[int] = Field(default=None, ge=0)
+    max_pages: Optional[int] = Field(default=None, ge=1)
+    concurrency: Optional[int] = Field(default=None, ge=1, le=64)
+    politeness_delay: Optional[float] = Field(default=None, ge=0.0)
+    respect_robots: bool = True
+    use_sitemaps: bool = True
+    tags: List[str] = []
+    metadata: Dict[str, Any] = {}
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "url": "https://example.com/docs/",
+                "max_depth": 3,
+                "max_pages": 500,
+                "concurrency": 4,
+                "politeness_delay": 1.0,
+                "respect_robots": True,
+                "use_sitemaps": True,
+                "tags": ["docs"],
+                "metadata": {"source": "example.com"}
+            }
+        }
+
+class CrawlStatus(BaseModel):
+    crawl_id: str
+    seed_url: str
+    status: str
+    pages_fetched: int
+    pages_ingested: int
+    pages_failed: int
+    pages_skipped: int
+    pages_unchanged: int = 0
+    queue_depth: int
+    in_flight: int
+    pages_per_second: float
+    elapsed: float
+    error: Optional[str] = None
+    
+    class Config:
+        schema_extra = {
+            "example": {
+                "crawl_id": "550e8400-e29b-41d4-a716-446655440005",
+                "seed_url": "https://example.com/docs/",
+                "status": "running",
+                "pages_fetched": 120,
+                "pages_ingested": 112,
+                "pages_failed": 2,
+                "pages_skipped": 6,
+                "pages_unchanged": 0,
+                "queue_depth": 340,
+                "in_flight": 4,
+                "pages_per_second": 0.98,
+                "elapsed": 122.4,
+                "error": None
+            }
+        }
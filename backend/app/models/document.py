@@ -10,6 +10,10 @@ class DocumentChunk(BaseModel):
     metadata: Dict[str, Any] = {}
     embedding: Optional[List[float]] = None
     chunk_index: int
+    start_offset: Optional[int] = None  # Character offsets of the chunk in the extracted text
+    end_offset: Optional[int] = None
+    token_count: Optional[int] = None  # Set when chunking is token-aware
+    content_hash: Optional[str] = None  # SHA-256 of content, to reuse embeddings on update
     
     class Config:
         schema_extra = {
@@ -18,7 +22,9 @@ class DocumentChunk(BaseModel):
                 "document_id": "550e8400-e29b-41d4-a716-446655440001",
                 "content": "This is a chunk of text from a document that will be embedded for semantic search.",
                 "metadata": {"page_number": 1, "section": "Introduction"},
-                "chunk_index": 0
+                "chunk_index": 0,
+                "start_offset": 0,
+                "end_offset": 83
             }
         }
 
@@ -27,6 +33,8 @@ class Document(BaseModel):
     title: str
     content: Optional[str] = None
     file_path: Optional[str] = None
+    file_hash: Optional[str] = None  # SHA-256 of uploaded files, for deduplication
+    file_size: Optional[int] = None  # In bytes
     url: Optional[str] = None
     mime_type: Optional[str] = None
     metadata: Dict[str, Any] = {}
@@ -36,6 +44,12 @@ class Document(BaseModel):
     processed: bool = False
     error: Optional[str] = None
     chunk_count: int = 0
+    token_count: int = 0
+    truncated: bool = False  # True if max_chunks_per_doc cut the document short
+    content_hash: Optional[str] = None  # SHA-256 of the extracted text
+    etag: Optional[str] = None  # HTTP validators of URL documents, for conditional re-fetches
+    last_modified: Optional[str] = None
+    last_fetched_at: Optional[datetime] = None
     
     class Config:
         schema_extra = {
@@ -99,6 +113,8 @@ class DocumentResponse(BaseModel):
     updated_at: datetime
     processed: bool
     chunk_count: int
+    token_count: int = 0
+    job_id: Optional[str] = None  # Processing job, when one was queued by the request
     
     class Config:
         schema_extra = {
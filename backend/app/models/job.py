@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any
+from datetime import datetime
+import uuid
+
+class Job(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    type: str
+    queue: str  # Stage the job runs in, with its own concurrency
+    document_id: Optional[str] = None
+    params: Dict[str, Any] = {}
+    status: str = "queued"  # queued, running, completed or dead
+    attempts: int = 0
+    max_attempts: int = 5
+    run_at: datetime = Field(default_factory=datetime.now)  # Not claimed before this time (retry backoff)
+    locked_by: Optional[str] = None  # Worker holding the job
+    locked_until: Optional[datetime] = None  # Lease; expired running jobs are claimed again
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    updated_at: datetime = Field(default_factory=datetime.now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "id": "550e8400-e29b-41d4-a716-446655440006",
+                "type": "process_document",
+                "queue": "fetch",
+                "document_id": "550e8400-e29b-41d4-a716-446655440001",
+                "params": {"refetch": False, "replace_existing": False},
+                "status": "queued",
+                "attempts": 1,
+                "max_attempts": 5,
+                "run_at": "2023-09-10T14:30:40",
+                "locked_by": None,
+                "locked_until": None,
+                "error": "Error fetching URL: timed out",
+                "created_at": "2023-09-10T14:30:00",
+                "updated_at": "2023-09-10T14:30:20",
+                "started_at": "2023-09-10T14:30:01",
+                "finished_at": None
+            }
+        }
@@ -9,6 +9,7 @@ class SearchQuery(BaseModel):
     offset: int = Field(default=0, ge=0)
     min_score: float = Field(default=0.0, ge=0.0, le=1.0)
     include_content: bool = Field(default=True)
+    highlight: bool = Field(default=True)  # Highlights need the chunk text even without include_content
     
     class Config:
         schema_extra = {
@@ -18,7 +19,8 @@ class SearchQuery(BaseModel):
                 "limit": 10,
                 "offset": 0,
                 "min_score": 0.5,
-                "include_content": True
+                "include_content": True,
+                "highlight": True
             }
         }
 
@@ -55,6 +57,7 @@ class SearchResponse(BaseModel):
     total: int
     query: str
     search_time: float  # in seconds
+    did_you_mean: Optional[str] = None  # Query with misspelled words corrected
     
     class Config:
         schema_extra = {
@@ -73,7 +76,8 @@ class SearchResponse(BaseModel):
                 }],
                 "total": 1,
                 "query": "semantic search with language models",
-                "search_time": 0.05
+                "search_time": 0.05,
+                "did_you_mean": None
             }
         }
 
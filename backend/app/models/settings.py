@@ -20,11 +20,21 @@ class Settings(BaseSettings):
     
     # Database settings
     mongodb_uri: str = Field(default=os.getenv("MONGODB_URI", "mongodb://localhost:27017/semantic_search"))
+    mongodb_max_pool_size: int = Field(default=int(os.getenv("MONGODB_MAX_POOL_SIZE", 100)))  # Connections per process
+    mongodb_min_pool_size: int = Field(default=int(os.getenv("MONGODB_MIN_POOL_SIZE", 0)))  # Kept open while idle
+    mongodb_max_idle_time_ms: int = Field(default=int(os.getenv("MONGODB_MAX_IDLE_TIME_MS", 0)))  # 0 = never closed for idleness
+    mongodb_connect_timeout_ms: int = Field(default=int(os.getenv("MONGODB_CONNECT_TIMEOUT_MS", 10000)))
+    mongodb_server_selection_timeout_ms: int = Field(default=int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 30000)))
+    mongodb_socket_timeout_ms: int = Field(default=int(os.getenv("MONGODB_SOCKET_TIMEOUT_MS", 0)))  # 0 = no timeout
+    mongodb_compressors: str = Field(default=os.getenv("MONGODB_COMPRESSORS", ""))  # e.g. "zstd,snappy,zlib"
     
     # Model settings
     model_name: str = Field(default=os.getenv("MODEL_NAME", "all-MiniLM-L6-v2"))
     embedding_dimension: int = Field(default=int(os.getenv("EMBEDDING_DIMENSION", 384)))
     index_type: str = Field(default=os.getenv("INDEX_TYPE", "Flat"))
+    embedding_storage: str = Field(default=os.getenv("EMBEDDING_STORAGE", "float32"))  # Chunk embeddings in Mongo: "float32", "float16", "none" or "array"
+    chunk_text_store: bool = Field(default=os.getenv("CHUNK_TEXT_STORE", "False").lower() == "true")  # Local copy of chunk text for search hydration
+    chunk_text_compression: str = Field(default=os.getenv("CHUNK_TEXT_COMPRESSION", "none"))  # "none" or "zstd"
     
     # OpenAI settings
     openai_api_key: Optional[str] = Field(default=os.getenv("OPENAI_API_KEY", None))
@@ -36,7 +46,71 @@ class Settings(BaseSettings):
     max_file_size: int = Field(default=int(os.getenv("MAX_FILE_SIZE", 10)))  # In MB
     chunk_size: int = Field(default=int(os.getenv("CHUNK_SIZE", 1000)))
     chunk_overlap: int = Field(default=int(os.getenv("CHUNK_OVERLAP", 200)))
-    max_chunks_per_doc: int = Field(default=int(os.getenv("MAX_CHUNKS_PER_DOC", 100)))
+    chunk_unit: str = Field(default=os.getenv("CHUNK_UNIT", "chars"))  # "chars" or "tokens"
+    chunk_tokens: int = Field(default=int(os.getenv("CHUNK_TOKENS", 0)))  # 0 = model's max sequence length
+    chunk_token_overlap: int = Field(default=int(os.getenv("CHUNK_TOKEN_OVERLAP", 32)))
+    max_chunks_per_doc: int = Field(default=int(os.getenv("MAX_CHUNKS_PER_DOC", 0)))  # 0 = unlimited
+    pdf_pages_per_batch: int = Field(default=int(os.getenv("PDF_PAGES_PER_BATCH", 16)))
+    ingest_batch_size: int = Field(default=int(os.getenv("INGEST_BATCH_SIZE", 256)))  # Chunks embedded per batch
+    bulk_document_batch_size: int = Field(default=int(os.getenv("BULK_DOCUMENT_BATCH_SIZE", 500)))  # Documents inserted per batch
+    bulk_embedding_batch_size: int = Field(default=int(os.getenv("BULK_EMBEDDING_BATCH_SIZE", 2048)))  # Chunks embedded per batch
+    ingest_write_concern: str = Field(default=os.getenv("INGEST_WRITE_CONCERN", "1"))  # w for chunk writes: "majority", "1" or "0"
+    ingest_write_journal: bool = Field(default=os.getenv("INGEST_WRITE_JOURNAL", "False").lower() == "true")  # Wait for the journal
+    
+    # URL fetching settings
+    fetch_timeout: float = Field(default=float(os.getenv("FETCH_TIMEOUT", 10)))  # In seconds
+    fetch_max_size: int = Field(default=int(os.getenv("FETCH_MAX_SIZE", 20)))  # In MB
+    fetch_max_connections: int = Field(default=int(os.getenv("FETCH_MAX_CONNECTIONS", 100)))
+    fetch_max_per_host: int = Field(default=int(os.getenv("FETCH_MAX_PER_HOST", 4)))
+    
+    # Site crawler settings
+    crawl_concurrency: int = Field(default=int(os.getenv("CRAWL_CONCURRENCY", 4)))
+    crawl_max_depth: int = Field(default=int(os.getenv("CRAWL_MAX_DEPTH", 3)))
+    crawl_max_pages: int = Field(default=int(os.getenv("CRAWL_MAX_PAGES", 500)))
+    crawl_delay: float = Field(default=float(os.getenv("CRAWL_DELAY", 1.0)))  # Seconds between requests to a host
+    crawl_status_ttl: int = Field(default=int(os.getenv("CRAWL_STATUS_TTL", 60)))  # Minutes a finished crawl's status is kept
+    
+    # URL document refresh settings
+    refresh_interval: int = Field(default=int(os.getenv("REFRESH_INTERVAL", 0)))  # In minutes, 0 = disabled
+    refresh_stale_after: float = Field(default=float(os.getenv("REFRESH_STALE_AFTER", 24)))  # In hours
+    refresh_batch_size: int = Field(default=int(os.getenv("REFRESH_BATCH_SIZE", 100)))
+    
+    # Ingestion job queue settings
+    job_workers_in_process: bool = Field(default=os.getenv("JOB_WORKERS_IN_PROCESS", "True").lower() == "true")  # False = run `python -m app.worker`
+    job_fetch_concurrency: int = Field(default=int(os.getenv("JOB_FETCH_CONCURRENCY", 4)))  # Jobs for URL documents
+    job_process_concurrency: int = Field(default=int(os.getenv("JOB_PROCESS_CONCURRENCY", 2)))  # Jobs for text and file documents
+    job_max_attempts: int = Field(default=int(os.getenv("JOB_MAX_ATTEMPTS", 5)))  # Then the job is dead-lettered
+    job_retry_backoff: float = Field(default=float(os.getenv("JOB_RETRY_BACKOFF", 10)))  # In seconds, doubled per attempt
+    job_retry_backoff_max: float = Field(default=float(os.getenv("JOB_RETRY_BACKOFF_MAX", 600)))  # In seconds
+    job_lease: float = Field(default=float(os.getenv("JOB_LEASE", 300)))  # In seconds, renewed while a job runs
+    job_poll_interval: float = Field(default=float(os.getenv("JOB_POLL_INTERVAL", 1.0)))  # In seconds
+    
+    # Ingestion pipeline settings (embed and persist stages shared by all jobs)
+    pipeline_queue_size: int = Field(default=int(os.getenv("PIPELINE_QUEUE_SIZE", 8)))  # Chunk batches waiting per stage
+    pipeline_embed_workers: int = Field(default=int(os.getenv("PIPELINE_EMBED_WORKERS", 1)))
+    pipeline_embed_batch_size: int = Field(default=int(os.getenv("PIPELINE_EMBED_BATCH_SIZE", 512)))  # Chunks per model call
+    pipeline_persist_workers: int = Field(default=int(os.getenv("PIPELINE_PERSIST_WORKERS", 2)))
+    pipeline_persist_batch_size: int = Field(default=int(os.getenv("PIPELINE_PERSIST_BATCH_SIZE", 1024)))  # Chunks per insert
+    
+    # Search settings
+    hydration_cache_size: int = Field(default=int(os.getenv("HYDRATION_CACHE_SIZE", 256)))  # In MB, 0 = disabled
+    query_record_flush_interval: float = Field(default=float(os.getenv("QUERY_RECORD_FLUSH_INTERVAL", 5.0)))  # In seconds
+    query_record_max_pending: int = Field(default=int(os.getenv("QUERY_RECORD_MAX_PENDING", 10000)))  # Distinct queries, then flushed early
+    suggest_rebuild_interval: float = Field(default=float(os.getenv("SUGGEST_REBUILD_INTERVAL", 900)))  # In seconds, 0 = build once at startup
+    spell_max_distance: int = Field(default=int(os.getenv("SPELL_MAX_DISTANCE", 2)))  # Edits a typo correction can make per word
+    spell_min_word_count: int = Field(default=int(os.getenv("SPELL_MIN_WORD_COUNT", 2)))  # Occurrences before a word is a correction
+    
+    # Extraction pool settings
+    extraction_workers: int = Field(default=int(os.getenv("EXTRACTION_WORKERS", 0)))  # 0 = CPU count - 1
+    extraction_job_timeout: float = Field(default=float(os.getenv("EXTRACTION_JOB_TIMEOUT", 300)))  # In seconds
+    extraction_memory_limit: int = Field(default=int(os.getenv("EXTRACTION_MEMORY_LIMIT", 2048)))  # In MB, 0 = unlimited
+    
+    # OCR settings
+    ocr_enabled: bool = Field(default=os.getenv("OCR_ENABLED", "True").lower() == "true")
+    ocr_workers: int = Field(default=int(os.getenv("OCR_WORKERS", 1)))  # Separate from extraction workers
+    ocr_job_timeout: float = Field(default=float(os.getenv("OCR_JOB_TIMEOUT", 120)))  # In seconds, per page
+    ocr_languages: str = Field(default=os.getenv("OCR_LANGUAGES", "eng"))  # Tesseract codes, e.g. "eng+deu"
+    ocr_min_text_chars: int = Field(default=int(os.getenv("OCR_MIN_TEXT_CHARS", 10)))  # Pages with less text are OCRed
     
     class Config:
         env_file = ".env"
\ No newline at end of file
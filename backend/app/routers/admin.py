@@ -1,56 +1,78 @@
 from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
 from typing import Dict, Any
 from motor.motor_asyncio import AsyncIOMotorDatabase
-from app.dependencies import get_database, get_vector_store, verify_api_key
+from app.dependencies import get_database, get_vector_store, get_ocr_engine, get_job_queue, get_hydration_cache, get_query_recorder, get_suggestion_index, get_settings, verify_api_key
+from app.models.document import Document
+from app.services.refresh_service import refresh_stale_documents
+from app.services.stats_service import read_stats, recompute_stats, top_tags
 
 router = APIRouter(prefix="/admin", dependencies=[Depends(verify_api_key)])
 
 @router.get("/stats")
 async def get_stats(
     db: AsyncIOMotorDatabase = Depends(get_database),
-    vector_store = Depends(get_vector_store)
+    vector_store = Depends(get_vector_store),
+    ocr_engine = Depends(get_ocr_engine),
+    hydration_cache = Depends(get_hydration_cache),
+    query_recorder = Depends(get_query_recorder),
+    suggestion_index = Depends(get_suggestion_index)
 ):
     """
     Get system statistics
+    
+    Document, chunk and tag counts are counters maintained as documents
+    are ingested, updated and deleted, so this reads a few small records
+    instead of scanning the collections; POST /admin/stats/recompute
+    counts everything again. Queue depth is reported by GET /jobs/stats.
     """
     documents_collection = db.documents
-    chunks_collection = db.document_chunks
-    
-    # Count documents
-    document_count = await documents_collection.count_documents({})
-    processed_count = await documents_collection.count_documents({"processed": True})
-    error_count = await documents_collection.count_documents({"error": {"$ne": None}})
     
-    # Count chunks
-    chunk_count = await chunks_collection.count_documents({})
+    counters = await read_stats(db)
     
     # Get vector count from FAISS
     vector_count = vector_store.index.ntotal if vector_store.index else 0
     
+    # Ingestion stats: chunks and tokens per processed document
+    ingested_docs = counters["ingested"] or 1
+    
     # Get recent documents
     cursor = documents_collection.find({}).sort("created_at", -1).limit(5)
     recent_documents = await cursor.to_list(length=5)
     
     # Count tags
-    pipeline = [
-        {"$unwind": "$tags"},
-        {"$group": {"_id": "$tags", "count": {"$sum": 1}}},
-        {"$sort": {"count": -1}},
-        {"$limit": 10}
-    ]
-    cursor = documents_collection.aggregate(pipeline)
-    tags = await cursor.to_list(length=10)
+    tags = await top_tags(db, 10)
     
     return {
-        "document_count": document_count,
-        "processed_count": processed_count,
-        "error_count": error_count,
-        "chunk_count": chunk_count,
+        "document_count": counters["documents"],
+        "processed_count": counters["processed"],
+        "error_count": counters["errors"],
+        "chunk_count": counters["chunks"],
         "vector_count": vector_count,
+        "token_count": counters["ingested_tokens"],
+        "avg_chunks_per_document": counters["ingested_chunks"] / ingested_docs,
+        "avg_tokens_per_document": counters["ingested_tokens"] / ingested_docs,
         "recent_documents": recent_documents,
-        "top_tags": tags
+        "top_tags": tags,
+        "ocr": ocr_engine.stats() if ocr_engine else None,
+        "chunk_text_store": vector_store.text_store.stats() if vector_store.text_store else None,
+        "hydration_cache": hydration_cache.stats(),
+        "query_recorder": query_recorder.stats(),
+        "suggestions": suggestion_index.stats(),
+        "stats_recomputed_at": counters.get("recomputed_at")
     }
 
+@router.post("/stats/recompute")
+async def recompute_system_stats(
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Count documents, chunks and tags again from the documents collection,
+    correcting any drift of the maintained counters
+    """
+    counters = await recompute_stats(db)
+    
+    return {"status": "recomputed", **counters}
+
 @router.post("/reset")
 async def reset_system(
     background_tasks: BackgroundTasks,
@@ -71,35 +93,85 @@ async def reset_system_task(db, vector_store):
     await db.documents.delete_many({})
     await db.document_chunks.delete_many({})
     await db.search_queries.delete_many({})
+    await db.vocabulary.delete_many({})
     await db.conversations.delete_many({})
+    await db.jobs.delete_many({})
+    await recompute_stats(db)
+    (await get_hydration_cache()).clear()
+    (await get_suggestion_index()).clear()
     
     # Reset vector store
     await vector_store.reset_index()
 
+@router.post("/refresh")
+async def refresh_documents(
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    job_queue = Depends(get_job_queue),
+    settings = Depends(get_settings)
+):
+    """
+    Re-check stale URL documents now instead of waiting for the scheduler
+    """
+    queued = await refresh_stale_documents(db, job_queue, settings)
+    
+    return {"status": "refresh initiated", "documents_queued": queued}
+
 @router.post("/reindex")
 async def reindex_documents(
     background_tasks: BackgroundTasks,
     db: AsyncIOMotorDatabase = Depends(get_database),
-    vector_store = Depends(get_vector_store)
+    vector_store = Depends(get_vector_store),
+    job_queue = Depends(get_job_queue)
 ):
     """
     Reindex all documents (regenerate chunks and embeddings)
+    
+    Every document is queued for processing again; GET /jobs/stats shows
+    the progress.
     """
     # Reset in background
-    background_tasks.add_task(reindex_documents_task, db, vector_store)
+    background_tasks.add_task(reindex_documents_task, db, vector_store, job_queue)
     
     return {"status": "reindex initiated"}
 
-async def reindex_documents_task(db, vector_store):
+async def reindex_documents_task(db, vector_store, job_queue):
     """Background task to reindex all documents"""
-    # Reset processed flag for all documents
+    # Reset processed flag for all documents, and drop the content hash
+    # and HTTP validators that would let processing skip them as unchanged
     await db.documents.update_many(
         {},
-        {"$set": {"processed": False, "chunk_count": 0, "error": None}}
+        {"$set": {
+            "processed": False,
+            "chunk_count": 0,
+            "error": None,
+            "content_hash": None,
+            "etag": None,
+            "last_modified": None
+        }}
     )
     
-    # Delete all chunks
+    # Delete all chunks, and the vocabulary counted from them (processing
+    # counts it again)
     await db.document_chunks.delete_many({})
+    await db.vocabulary.delete_many({})
+    await recompute_stats(db)
+    (await get_hydration_cache()).clear()
     
     # Reset vector store
-    await vector_store.reset_index()
\ No newline at end of file
+    await vector_store.reset_index()
+    
+    # Titles and words are counted again as documents are processed
+    try:
+        await (await get_suggestion_index()).build(db)
+    except Exception as e:
+        print(f"Error building suggestion index: {e}")
+    
+    # Chunk and embed every document again
+    queued = 0
+    async for document in db.documents.find({}):
+        try:
+            await job_queue.enqueue_document(Document(**document))
+            queued += 1
+        except Exception as e:
+            print(f"Error queueing document {document.get('id')} for reindexing: {e}")
+    print(f"Reindex queued {queued} documents")
\ No newline at end of file
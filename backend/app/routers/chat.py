@@ -6,11 +6,15 @@ import uuid
 import openai
 from app.models.chat import Message, Conversation, ChatRequest, ChatResponse
 from app.models.search import SearchQuery
-from app.dependencies import get_database, get_vector_store, get_embedding_model, verify_api_key, get_settings
+from app.dependencies import get_database, get_vector_store, get_embedding_model, get_hydration_cache, verify_api_key, get_settings
 from app.models.settings import Settings
+from app.services.hydration import hydrate, chunk_projection, document_projection, CHAT_DOCUMENT_FIELDS
 
 router = APIRouter(prefix="/chat", dependencies=[Depends(verify_api_key)])
 
+# Characters of each source chunk shown to the model
+SNIPPET_LENGTH = 200
+
 @router.get("/conversations", response_model=List[Conversation])
 async def get_conversations(
     skip: int = 0,
@@ -69,6 +73,7 @@ async def chat_message(
     db: AsyncIOMotorDatabase = Depends(get_database),
     vector_store = Depends(get_vector_store),
     embedding_model = Depends(get_embedding_model),
+    hydration_cache = Depends(get_hydration_cache),
     settings: Settings = Depends(get_settings)
 ):
     """
@@ -128,24 +133,15 @@ async def chat_message(
         # Get chunk IDs
         chunk_ids = [result["chunk_id"] for result in vector_results]
         
-        # Get chunks from database
-        chunks_collection = db.document_chunks
-        chunks_cursor = chunks_collection.find({"id": {"$in": chunk_ids}})
-        chunks = await chunks_cursor.to_list(length=None)
-        
-        # Map chunks by ID
-        chunks_map = {chunk["id"]: chunk for chunk in chunks}
-        
-        # Get document IDs
-        document_ids = list(set(chunk["document_id"] for chunk in chunks))
-        
-        # Get documents from database
-        documents_collection = db.documents
-        documents_cursor = documents_collection.find({"id": {"$in": document_ids}})
-        documents = await documents_cursor.to_list(length=None)
-        
-        # Map documents by ID
-        documents_map = {doc["id"]: doc for doc in documents}
+        # Only the start of each chunk is shown, and only document titles
+        chunks_map, documents_map = await hydrate(
+            db,
+            chunk_ids,
+            chunk_projection(include_content=True, content_chars=SNIPPET_LENGTH + 1),
+            document_projection(CHAT_DOCUMENT_FIELDS),
+            cache=hydration_cache,
+            vector_store=vector_store
+        )
         
         # Format sources
         for result in vector_results:
@@ -165,7 +161,7 @@ async def chat_message(
                 "document_id": document["id"],
                 "chunk_id": chunk["id"],
                 "title": document["title"],
-                "content_snippet": chunk["content"][:200] + "..." if len(chunk["content"]) > 200 else chunk["content"],
+                "content_snippet": chunk["content"][:SNIPPET_LENGTH] + "..." if len(chunk["content"]) > SNIPPET_LENGTH else chunk["content"],
                 "score": result["score"]
             })
     
@@ -1,19 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks, Request
 from fastapi.responses import JSONResponse
 from typing import List, Optional, Dict, Any
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
 import os
 import uuid
+import asyncio
+import contextlib
+import hashlib
+import time
 from datetime import datetime
 import json
-import shutil
+from collections import Counter
+import aiofiles
 import validators
 from app.models.document import Document, DocumentChunk, DocumentCreate, DocumentUpdate, DocumentResponse
-from app.dependencies import get_database, get_vector_store, get_embedding_model, verify_api_key, get_settings
-from app.utils.document_processor import DocumentProcessor
+from app.dependencies import get_database, get_vector_store, get_embedding_model, get_extraction_pool, get_http_fetcher, get_ocr_engine, get_job_queue, get_ingest_pipeline, get_hydration_cache, get_suggestion_index, ingest_write_concern, verify_api_key, get_settings
+from app.models.crawl import SiteCrawlRequest, CrawlStatus
+from app.utils.document_processor import DocumentProcessor, NotModified, ContentUnchanged, content_hash
+from app.utils.html_extractor import parse_html_page
+from app.utils.crawler import SiteCrawler, CrawledPage, normalize_url
+from app.services.bulk_ingest_service import BulkIngester
+from app.services.hydration import store_chunk_texts
+from app.services.suggestions import record_vocabulary
+from app.services.stats_service import record_document_changes
+from app.utils.symspell import count_words
 
 router = APIRouter(prefix="/documents", dependencies=[Depends(verify_api_key)])
 
+# Uploads are read and written in blocks of this size
+UPLOAD_BLOCK_SIZE = 1024 * 1024
+
+# Site crawls started by this process, by crawl ID
+_site_crawls: Dict[str, SiteCrawler] = {}
+
 @router.get("", response_model=List[DocumentResponse])
 async def get_documents(
     skip: int = 0,
@@ -59,11 +80,8 @@ async def get_document(
 @router.post("", response_model=DocumentResponse)
 async def create_document(
     document: DocumentCreate,
-    background_tasks: BackgroundTasks,
     db: AsyncIOMotorDatabase = Depends(get_database),
-    vector_store = Depends(get_vector_store),
-    embedding_model = Depends(get_embedding_model),
-    settings = Depends(get_settings)
+    job_queue = Depends(get_job_queue)
 ):
     """
     Create a new document
@@ -82,34 +100,108 @@ async def create_document(
     
     # Insert document
     await documents_collection.insert_one(new_document.dict())
+    await record_document_changes(db, [(None, new_document.dict())])
+    
+    # Queue document for processing
+    job = await job_queue.enqueue_document(new_document)
     
-    # Process document in background
-    background_tasks.add_task(
-        process_document_task,
-        new_document,
-        db,
+    return {**new_document.dict(), "job_id": job.id}
+
+@router.post("/bulk")
+async def bulk_create_documents(
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    vector_store = Depends(get_vector_store),
+    embedding_model = Depends(get_embedding_model),
+    settings = Depends(get_settings)
+):
+    """
+    Create many documents from an NDJSON stream
+    
+    Each line of the request body is a JSON object with the fields of
+    POST /documents. Documents are indexed while the body is received,
+    with batched database writes and embeddings and a single save of the
+    vector index at the end. Invalid lines are skipped and reported. If
+    the stream breaks off, documents already inserted but not indexed
+    are queued as processing jobs.
+    
+    Returns:
+        Summary with document counts, errors and documents per second
+    """
+    processor = create_document_processor(
+        settings,
+        embedding_model,
+        pool=await get_extraction_pool(),
+        fetcher=await get_http_fetcher(),
+        ocr=await get_ocr_engine()
+    )
+    ingester = BulkIngester(
+        db.with_options(write_concern=ingest_write_concern()),
         vector_store,
         embedding_model,
-        settings
+        processor,
+        document_batch_size=settings.bulk_document_batch_size,
+        embedding_batch_size=settings.bulk_embedding_batch_size,
+        embedding_storage=settings.embedding_storage,
+        suggestion_index=await get_suggestion_index(),
+        job_queue=await get_job_queue()
     )
     
-    return new_document
+    error = None
+    try:
+        async for line_number, line in _iter_lines(request):
+            try:
+                document = DocumentCreate(**json.loads(line))
+            except (ValueError, TypeError) as e:
+                ingester.reject(f"Line {line_number}: {e}")
+                continue
+            if not document.content and not document.url:
+                ingester.reject(f"Line {line_number}: document has neither content nor url")
+                continue
+            
+            await ingester.add(Document(
+                title=document.title,
+                content=document.content,
+                url=document.url,
+                tags=document.tags,
+                metadata=document.metadata
+            ))
+    except Exception as e:
+        error = e
+    
+    stats = await ingester.finish(error)
+    return stats.to_dict()
+
+async def _iter_lines(request: Request):
+    """Yield the non-empty lines of a streamed request body, numbered from 1"""
+    buffer = b""
+    line_number = 0
+    async for block in request.stream():
+        buffer += block
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, line
+    if buffer.strip():
+        yield line_number + 1, buffer
 
 @router.put("/{document_id}", response_model=DocumentResponse)
 async def update_document(
     document_id: str,
     document_update: DocumentUpdate,
-    background_tasks: BackgroundTasks,
     db: AsyncIOMotorDatabase = Depends(get_database),
     vector_store = Depends(get_vector_store),
-    embedding_model = Depends(get_embedding_model),
-    settings = Depends(get_settings)
+    job_queue = Depends(get_job_queue)
 ):
     """
     Update a document
+    
+    Changed content is re-chunked in the background and diffed against the
+    existing chunks: only new or changed chunks are embedded, and the old
+    chunks stay searchable until the new version is indexed.
     """
     documents_collection = db.documents
-    chunks_collection = db.document_chunks
     
     # Get existing document
     existing_document = await documents_collection.find_one({"id": document_id})
@@ -127,40 +219,39 @@ async def update_document(
     # If content is updated, mark as not processed
     if "content" in update_data or "url" in update_data:
         update_data["processed"] = False
-        update_data["chunk_count"] = 0
-        
-        # Delete existing chunks
-        await chunks_collection.delete_many({"document_id": document_id})
-        
-        # Get chunk IDs to delete from vector store
-        cursor = chunks_collection.find({"document_id": document_id})
-        chunks = await cursor.to_list(length=None)
-        chunk_ids = [chunk["id"] for chunk in chunks]
-        
-        # Delete from vector store
-        if chunk_ids:
-            await vector_store.delete_embeddings(chunk_ids)
+    if "url" in update_data:
+        # Validators belong to the old URL
+        update_data["etag"] = None
+        update_data["last_modified"] = None
     
     # Update document
     await documents_collection.update_one(
         {"id": document_id},
         {"$set": update_data}
     )
+    (await get_hydration_cache()).invalidate_documents([document_id])
     
     # Get updated document
     updated_document = await documents_collection.find_one({"id": document_id})
+    await record_document_changes(db, [(existing_document, updated_document)])
+    
+    if "title" in update_data and updated_document.get("processed"):
+        (await get_suggestion_index()).set_title(document_id, updated_document["title"])
+    
+    # Chunk text records carry the document's search fields
+    if vector_store.text_store is not None and any(field in update_data for field in ("title", "url", "tags", "metadata")):
+        await store_chunk_texts(db, vector_store, updated_document)
+        await vector_store.save_index()
     
-    # Process document in background if content was updated
+    # Queue document for processing if content was updated
     if "content" in update_data or "url" in update_data:
         doc = Document(**updated_document)
-        background_tasks.add_task(
-            process_document_task,
+        job = await job_queue.enqueue_document(
             doc,
-            db,
-            vector_store,
-            embedding_model,
-            settings
+            refetch="url" in update_data and "content" not in update_data,
+            replace_existing=True
         )
+        updated_document["job_id"] = job.id
     
     return updated_document
 
@@ -192,6 +283,7 @@ async def delete_document(
     
     # Delete document
     await documents_collection.delete_one({"id": document_id})
+    await record_document_changes(db, [(document, None)])
     
     # Delete chunks
     await chunks_collection.delete_many({"document_id": document_id})
@@ -200,22 +292,31 @@ async def delete_document(
     if chunk_ids:
         await vector_store.delete_embeddings(chunk_ids)
     
+    hydration_cache = await get_hydration_cache()
+    hydration_cache.invalidate_documents([document_id])
+    hydration_cache.invalidate_chunks(chunk_ids)
+    (await get_suggestion_index()).remove_document(document_id)
+    
     return {"status": "deleted"}
 
 @router.post("/upload", response_model=DocumentResponse)
 async def upload_document(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     title: str = Form(None),
     tags: str = Form("[]"),
     metadata: str = Form("{}"),
     db: AsyncIOMotorDatabase = Depends(get_database),
-    vector_store = Depends(get_vector_store),
-    embedding_model = Depends(get_embedding_model),
+    job_queue = Depends(get_job_queue),
     settings = Depends(get_settings)
 ):
     """
     Upload a document file
+    
+    The file is streamed to disk while its SHA-256 is computed, and the
+    upload is refused with 413 once it exceeds MAX_FILE_SIZE. A file that
+    was uploaded before is not stored or processed again: the existing
+    document (and its vectors) is returned instead. If that document
+    failed to process, it is queued for processing again.
     """
     # Parse tags and metadata
     try:
@@ -234,10 +335,48 @@ async def upload_document(
     file_ext = os.path.splitext(file.filename)[1]
     filename = f"{uuid.uuid4()}{file_ext}"
     file_path = f"data/uploads/{filename}"
+    temp_path = f"{file_path}.part"
     
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Save file, hashing it on the way
+    max_bytes = settings.max_file_size * 1024 * 1024
+    digest = hashlib.sha256()
+    file_size = 0
+    try:
+        async with aiofiles.open(temp_path, "wb") as buffer:
+            while True:
+                block = await file.read(UPLOAD_BLOCK_SIZE)
+                if not block:
+                    break
+                file_size += len(block)
+                if file_size > max_bytes:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File exceeds the maximum size of {settings.max_file_size} MB"
+                    )
+                digest.update(block)
+                await buffer.write(block)
+    except BaseException:
+        # Keep the original error if the file was never created
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+    file_hash = digest.hexdigest()
+    
+    # Identical files map to the same document
+    documents_collection = db.documents
+    existing_document = await documents_collection.find_one({"file_hash": file_hash})
+    if existing_document:
+        failed = existing_document.get("error") is not None or not existing_document.get("processed")
+        if failed and existing_document.get("file_path") and not await job_queue.active_job(existing_document["id"]):
+            # Uploading the file again retries it, from this copy in case
+            # the stored one is gone
+            os.replace(temp_path, existing_document["file_path"])
+            # Chunks left over from the failed attempt are replaced
+            job = await job_queue.enqueue_document(Document(**existing_document), replace_existing=True)
+            return {**existing_document, "job_id": job.id}
+        os.remove(temp_path)
+        return existing_document
+    os.replace(temp_path, file_path)
     
     # Get MIME type
     mime_type = file.content_type
@@ -247,38 +386,35 @@ async def upload_document(
     new_document = Document(
         title=document_title,
         file_path=file_path,
+        file_hash=file_hash,
+        file_size=file_size,
         mime_type=mime_type,
         tags=tags_list,
         metadata=metadata_dict
     )
     
     # Insert document
-    documents_collection = db.documents
-    await documents_collection.insert_one(new_document.dict())
+    try:
+        await documents_collection.insert_one(new_document.dict())
+    except DuplicateKeyError:
+        # The same file was uploaded concurrently
+        os.remove(file_path)
+        return await documents_collection.find_one({"file_hash": file_hash})
+    await record_document_changes(db, [(None, new_document.dict())])
     
-    # Process document in background
-    background_tasks.add_task(
-        process_document_task,
-        new_document,
-        db,
-        vector_store,
-        embedding_model,
-        settings
-    )
+    # Queue document for processing
+    job = await job_queue.enqueue_document(new_document)
     
-    return new_document
+    return {**new_document.dict(), "job_id": job.id}
 
 @router.post("/crawl", response_model=DocumentResponse)
 async def crawl_url(
     url: str,
-    background_tasks: BackgroundTasks,
     title: Optional[str] = None,
     tags: List[str] = [],
     metadata: Dict[str, Any] = {},
     db: AsyncIOMotorDatabase = Depends(get_database),
-    vector_store = Depends(get_vector_store),
-    embedding_model = Depends(get_embedding_model),
-    settings = Depends(get_settings)
+    job_queue = Depends(get_job_queue)
 ):
     """
     Crawl a URL and add it as a document
@@ -302,74 +438,344 @@ async def crawl_url(
     # Insert document
     documents_collection = db.documents
     await documents_collection.insert_one(new_document.dict())
+    await record_document_changes(db, [(None, new_document.dict())])
     
-    # Process document in background
-    background_tasks.add_task(
-        process_document_task,
-        new_document,
-        db,
-        vector_store,
-        embedding_model,
-        settings
+    # Queue document for processing
+    job = await job_queue.enqueue_document(new_document)
+    
+    return {**new_document.dict(), "job_id": job.id}
+
+def create_document_processor(settings, embedding_model, pool=None, fetcher=None, ocr=None) -> DocumentProcessor:
+    """
+    Create a document processor configured from settings
+    
+    With CHUNK_UNIT=tokens, chunks are packed up to the embedding model's
+    maximum sequence length (or CHUNK_TOKENS) using the model's own
+    tokenizer, so nothing is truncated inside encode(). Models without a
+    local tokenizer fall back to character chunks.
+    """
+    if settings.chunk_unit == "tokens" and embedding_model.tokenizer_name:
+        max_tokens = embedding_model.max_tokens
+        chunk_tokens = min(settings.chunk_tokens, max_tokens) if settings.chunk_tokens else max_tokens
+        return DocumentProcessor(
+            chunk_size=chunk_tokens,
+            chunk_overlap=settings.chunk_token_overlap,
+            max_chunks_per_doc=settings.max_chunks_per_doc,
+            pool=pool,
+            tokenizer_name=embedding_model.tokenizer_name,
+            fetcher=fetcher,
+            ocr=ocr
+        )
+    
+    return DocumentProcessor(
+        chunk_size=settings.chunk_size,
+        chunk_overlap=settings.chunk_overlap,
+        max_chunks_per_doc=settings.max_chunks_per_doc,
+        pool=pool,
+        fetcher=fetcher,
+        ocr=ocr
     )
+
+@router.post("/crawl/site", response_model=CrawlStatus)
+async def crawl_site(
+    request: SiteCrawlRequest,
+    background_tasks: BackgroundTasks,
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    vector_store = Depends(get_vector_store),
+    embedding_model = Depends(get_embedding_model),
+    settings = Depends(get_settings)
+):
+    """
+    Crawl a whole site breadth-first and add every page as a document
+    """
+    # Validate URL
+    if not validators.url(request.url):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid URL"
+        )
+    
+    pool = await get_extraction_pool()
+    documents_collection = db.documents
+    seed_url = normalize_url(request.url)
+    
+    # Pages from earlier crawls of this seed are re-checked conditionally
+    cursor = documents_collection.find(
+        {"metadata.crawl_seed": seed_url},
+        {"url": 1, "etag": 1, "last_modified": 1, "metadata.crawl_depth": 1}
+    )
+    known_pages = {
+        doc["url"]: {
+            "etag": doc.get("etag"),
+            "last_modified": doc.get("last_modified"),
+            "depth": doc.get("metadata", {}).get("crawl_depth", 0)
+        }
+        for doc in await cursor.to_list(length=None)
+    }
+    
+    async def parse_page(html: str):
+        return await pool.run(parse_html_page, html)
+    
+    async def ingest_page(page: CrawledPage):
+        existing_document = None
+        if page.url in known_pages:
+            existing_document = await documents_collection.find_one({"url": page.url, "metadata.crawl_seed": seed_url})
+        
+        if existing_document:
+            # Re-crawl: unchanged text is detected by content hash and
+            # skips chunking and embedding
+            document = Document(**existing_document)
+            document.title = page.title or document.title
+            if page.text is not None:
+                document.content = page.text
+        else:
+            document = Document(
+                title=page.title or page.url,
+                url=page.url,
+                content=page.text,
+                mime_type=page.content_type,
+                tags=request.tags,
+                metadata={**request.metadata, "crawl_seed": seed_url, "crawl_depth": page.depth}
+            )
+            await documents_collection.insert_one(document.dict())
+            await record_document_changes(db, [(None, document.dict())])
+        
+        if page.text is not None:
+            # Binary pages are fetched again by the task, which records
+            # their validators itself
+            document.etag = page.etag
+            document.last_modified = page.last_modified
+            document.metadata["html"] = page.metadata
+            document.last_fetched_at = datetime.now()
+        document.metadata["crawl_id"] = crawler.id
+        error = await process_document_task(
+            document,
+            db,
+            vector_store,
+            embedding_model,
+            settings,
+            refetch=page.text is None,
+            replace_existing=existing_document is not None
+        )
+        if error:
+            # Counted as a failed page by the crawler
+            raise RuntimeError(error)
+    
+    crawler = SiteCrawler(
+        seed_url=request.url,
+        fetcher=await get_http_fetcher(),
+        on_page=ingest_page,
+        parse_page=parse_page,
+        concurrency=request.concurrency or settings.crawl_concurrency,
+        max_depth=request.max_depth if request.max_depth is not None else settings.crawl_max_depth,
+        max_pages=request.max_pages or settings.crawl_max_pages,
+        politeness_delay=request.politeness_delay if request.politeness_delay is not None else settings.crawl_delay,
+        respect_robots=request.respect_robots,
+        use_sitemaps=request.use_sitemaps,
+        known_pages=known_pages
+    )
+    _prune_site_crawls(settings.crawl_status_ttl * 60)
+    _site_crawls[crawler.id] = crawler
+    
+    # Crawl in background
+    background_tasks.add_task(crawler.run)
+    
+    return _crawl_status(crawler)
+
+@router.get("/crawl/{crawl_id}", response_model=CrawlStatus)
+async def get_crawl_status(crawl_id: str, settings = Depends(get_settings)):
+    """
+    Get live progress of a site crawl
+    """
+    _prune_site_crawls(settings.crawl_status_ttl * 60)
+    crawler = _site_crawls.get(crawl_id)
+    
+    if not crawler:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Crawl not found"
+        )
     
-    return new_document
+    return _crawl_status(crawler)
+
+def _prune_site_crawls(ttl: float) -> None:
+    """Forget crawls that finished more than ttl seconds ago"""
+    expired_before = time.time() - ttl
+    for crawl_id, crawler in list(_site_crawls.items()):
+        if crawler.stats.finished_at and crawler.stats.finished_at < expired_before:
+            del _site_crawls[crawl_id]
+
+def _crawl_status(crawler: SiteCrawler) -> Dict[str, Any]:
+    """Format a crawler's live stats"""
+    return {"crawl_id": crawler.id, "seed_url": crawler.seed_url, **crawler.stats.to_dict()}
 
 async def process_document_task(
     document: Document,
     db,
     vector_store,
     embedding_model,
-    settings
+    settings,
+    refetch: bool = False,
+    replace_existing: bool = False
 ):
-    """Background task to process a document"""
+    """
+    Background task to process a document
+    
+    With replace_existing, the document's current chunks stay searchable
+    until its new content has been fully indexed, and are kept untouched
+    if the content turns out to be unchanged (304 Not Modified or same
+    content hash). New chunks whose text matches an existing chunk reuse
+    it and its vector, so only added or changed chunks are embedded.
+    
+    Returns:
+        Error recorded on the document, or None if it was indexed
+    """
     documents_collection = db.documents
-    chunks_collection = db.document_chunks
+    chunks_collection = db.document_chunks.with_options(write_concern=ingest_write_concern())
+    
+    previous_hash = document.content_hash
+    previous_token_count = document.token_count
+    # Stored record as it was, for the stats
+    previous_record = document.dict()
+    old_chunk_ids = []
+    # Existing chunk IDs by content hash
+    old_chunks: Dict[str, List[str]] = {}
+    if replace_existing:
+        cursor = chunks_collection.find({"document_id": document.id}, {"id": 1, "content": 1, "content_hash": 1})
+        async for chunk in cursor:
+            old_chunk_ids.append(chunk["id"])
+            chunk_hash = chunk.get("content_hash") or content_hash(chunk["content"])
+            old_chunks.setdefault(chunk_hash, []).append(chunk["id"])
     
     # Process document
-    processor = DocumentProcessor(
-        chunk_size=settings.chunk_size,
-        chunk_overlap=settings.chunk_overlap,
-        max_chunks_per_doc=settings.max_chunks_per_doc
+    processor = create_document_processor(
+        settings,
+        embedding_model,
+        pool=await get_extraction_pool(),
+        fetcher=await get_http_fetcher(),
+        ocr=await get_ocr_engine()
     )
     
-    # Process and chunk document
-    updated_document, chunks = await processor.process_document(document)
+    # Stream chunks in bounded batches through the ingestion pipeline:
+    # while one batch is embedded and stored, the next one is extracted,
+    # and the pipeline's bounded queues keep large documents from having
+    # to fit in memory at once
+    pipeline = await get_ingest_pipeline()
+    chunk_count = 0
+    token_count = 0
+    new_chunk_ids = []
+    # Batches handed to the pipeline, resolved once stored
+    pending = []
+    # Position updates for reused chunks, applied once the new version is complete
+    reused_chunks = []
+    # Words of embedded chunks for typo correction; reused chunks were
+    # counted when first embedded
+    vocabulary = Counter() if replace_existing else count_words(document.title or "")
+    document.error = None
+    try:
+        batches = processor.iter_chunks(document, batch_size=settings.ingest_batch_size, refetch=refetch)
+        async for chunks in pipeline.timed(batches):
+            chunk_count += len(chunks)
+            token_count += sum(chunk.token_count or 0 for chunk in chunks)
+            
+            # Keep existing chunks with the same text instead of re-embedding them
+            unmatched = []
+            for chunk in chunks:
+                matches = old_chunks.get(chunk.content_hash)
+                if matches:
+                    reused_chunks.append(UpdateOne({"id": matches.pop()}, {"$set": {
+                        "chunk_index": chunk.chunk_index,
+                        "start_offset": chunk.start_offset,
+                        "end_offset": chunk.end_offset,
+                        "token_count": chunk.token_count,
+                        "metadata": chunk.metadata,
+                        "content_hash": chunk.content_hash
+                    }}))
+                else:
+                    unmatched.append(chunk)
+            chunks = unmatched
+            if not chunks:
+                continue
+            
+            new_chunk_ids.extend(chunk.id for chunk in chunks)
+            for chunk in chunks:
+                vocabulary.update(count_words(chunk.content))
+            pending.append(await pipeline.submit(chunks))
+            
+            # Stop extracting once a batch has failed
+            if any(future.done() and future.exception() for future in pending):
+                break
+        
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        indexing_error = next((result for result in results if isinstance(result, Exception)), None)
+        if chunk_count == 0:
+            document.error = "Could not extract content from document"
+        elif indexing_error:
+            print(f"Error indexing chunks: {indexing_error}")
+            document.error = f"Error indexing chunks: {indexing_error}"
+    except (NotModified, ContentUnchanged):
+        # Nothing to re-index: only record that the document was checked.
+        # Its chunks are those of the last successful run, so an error
+        # left by a failed attempt since no longer applies.
+        await documents_collection.update_one(
+            {"id": document.id},
+            {"$set": {
+                "etag": document.etag,
+                "last_modified": document.last_modified,
+                "last_fetched_at": document.last_fetched_at,
+                "processed": True,
+                "error": None
+            }}
+        )
+        await record_document_changes(db, [(previous_record, {**previous_record, "processed": True, "error": None})])
+        return
+    except Exception as e:
+        document.error = str(e)
+        # Batches already submitted must be stored before they can be removed
+        await asyncio.gather(*pending, return_exceptions=True)
+    
+    # Swap old chunks for new ones, or drop a partial new set on failure
+    stale_chunk_ids = [chunk_id for chunk_ids in old_chunks.values() for chunk_id in chunk_ids]
+    if document.error:
+        # Let the next attempt re-index even if the content is the same,
+        # starting from the chunks the document had before
+        document.content_hash = previous_hash
+        stale_chunk_ids = new_chunk_ids
+        chunk_count = len(old_chunk_ids)
+        token_count = previous_token_count
+    elif reused_chunks:
+        await chunks_collection.bulk_write(reused_chunks, ordered=False)
+    if not document.error:
+        # Rewritten for every chunk, so reused chunks pick up a changed title
+        await store_chunk_texts(db, vector_store, document, exclude=stale_chunk_ids)
+    if replace_existing and not document.error:
+        print(
+            f"Re-indexed document {document.id}: {len(new_chunk_ids)} chunks embedded, "
+            f"{len(reused_chunks)} reused, {len(stale_chunk_ids)} removed"
+        )
+    hydration_cache = await get_hydration_cache()
+    if stale_chunk_ids:
+        await chunks_collection.delete_many({"id": {"$in": stale_chunk_ids}})
+        await vector_store.delete_embeddings(stale_chunk_ids)
+        hydration_cache.invalidate_chunks(stale_chunk_ids)
+    elif new_chunk_ids or vector_store.text_store is not None:
+        await vector_store.save_index()
     
     # Update document
+    document.processed = True
+    document.chunk_count = chunk_count
+    document.token_count = token_count
+    document.updated_at = datetime.now()
     await documents_collection.update_one(
         {"id": document.id},
-        {"$set": updated_document.dict()}
+        {"$set": document.dict()}
     )
-    
-    if not chunks:
-        return
-    
-    # Insert chunks
-    chunks_dicts = [chunk.dict() for chunk in chunks]
-    if chunks_dicts:
-        await chunks_collection.insert_many(chunks_dicts)
-    
-    # Generate embeddings
-    texts = [chunk.content for chunk in chunks]
-    chunk_ids = [chunk.id for chunk in chunks]
-    
-    try:
-        embeddings = await embedding_model.embed_texts(texts)
-        
-        # Update chunks with embeddings
-        for i, (chunk_id, embedding) in enumerate(zip(chunk_ids, embeddings)):
-            await chunks_collection.update_one(
-                {"id": chunk_id},
-                {"$set": {"embedding": embedding}}
-            )
-        
-        # Add to vector store
-        await vector_store.add_embeddings(embeddings, chunk_ids)
-    except Exception as e:
-        print(f"Error generating embeddings: {e}")
-        # Update document with error
-        await documents_collection.update_one(
-            {"id": document.id},
-            {"$set": {"error": f"Error generating embeddings: {str(e)}"}}
-        )
\ No newline at end of file
+    await record_document_changes(db, [(previous_record, document.dict())])
+    hydration_cache.invalidate_documents([document.id])
+    if not document.error:
+        suggestion_index = await get_suggestion_index()
+        suggestion_index.set_title(document.id, document.title)
+        await record_vocabulary(db, vocabulary)
+        suggestion_index.add_words(vocabulary)
+    
+    return document.error
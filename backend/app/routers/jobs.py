@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional, Dict, Any
+from app.dependencies import get_job_queue, get_ingest_pipeline, verify_api_key
+from app.models.job import Job
+from app.worker import get_worker
+
+router = APIRouter(prefix="/jobs", dependencies=[Depends(verify_api_key)])
+
+@router.get("", response_model=List[Job])
+async def get_jobs(
+    status: Optional[str] = None,
+    queue: Optional[str] = None,
+    document_id: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    job_queue = Depends(get_job_queue)
+):
+    """
+    Get ingestion jobs, newest first (status=dead lists the dead-letter queue)
+    """
+    query = {}
+    if status:
+        query["status"] = status
+    if queue:
+        query["queue"] = queue
+    if document_id:
+        query["document_id"] = document_id
+
+    cursor = job_queue.collection.find(query).sort("created_at", -1).skip(skip).limit(limit)
+    return await cursor.to_list(length=limit)
+
+@router.get("/stats")
+async def get_job_stats(
+    job_queue = Depends(get_job_queue),
+    pipeline = Depends(get_ingest_pipeline)
+) -> Dict[str, Any]:
+    """
+    Get queue depth per stage, and the live stats of this process's worker
+    and of its ingestion pipeline stages (throughput and queue wait)
+    """
+    worker = get_worker()
+    return {
+        "queues": await job_queue.depth(),
+        "worker": worker.stats() if worker else None,
+        "pipeline": pipeline.stats()
+    }
+
+@router.get("/{job_id}", response_model=Job)
+async def get_job(job_id: str, job_queue = Depends(get_job_queue)):
+    """
+    Get the status of an ingestion job
+    """
+    job = await job_queue.get(job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    return job
+
+@router.post("/{job_id}/retry", response_model=Job)
+async def retry_job(job_id: str, job_queue = Depends(get_job_queue)):
+    """
+    Re-queue a dead-lettered job
+    """
+    job = await job_queue.retry(job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Dead job not found"
+        )
+
+    return job
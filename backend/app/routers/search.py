@@ -6,7 +6,8 @@ import time
 import re
 from app.models.search import SearchQuery, SearchResponse, SearchResult, SuggestQuery, SuggestResponse
 from app.models.document import Document, DocumentChunk
-from app.dependencies import get_database, get_vector_store, get_embedding_model, verify_api_key
+from app.dependencies import get_database, get_vector_store, get_embedding_model, get_hydration_cache, get_query_recorder, get_suggestion_index, verify_api_key
+from app.services.hydration import hydrate, chunk_projection, document_projection, SEARCH_DOCUMENT_FIELDS
 
 router = APIRouter(prefix="/search", dependencies=[Depends(verify_api_key)])
 
@@ -15,12 +16,18 @@ async def search_documents(
     query: SearchQuery,
     db: AsyncIOMotorDatabase = Depends(get_database),
     vector_store = Depends(get_vector_store),
-    embedding_model = Depends(get_embedding_model)
+    embedding_model = Depends(get_embedding_model),
+    hydration_cache = Depends(get_hydration_cache),
+    suggestion_index = Depends(get_suggestion_index)
 ):
     """
     Search for documents using semantic search
+    
+    Queries with misspelled words also return the corrected query as
+    did_you_mean.
     """
     start_time = time.time()
+    did_you_mean = suggestion_index.correct(query.query)
     
     # Get embedding for query
     try:
@@ -43,30 +50,25 @@ async def search_documents(
             results=[],
             total=0,
             query=query.query,
-            search_time=time.time() - start_time
+            search_time=time.time() - start_time,
+            did_you_mean=did_you_mean
         )
     
     # Get chunk IDs
     chunk_ids = [result["chunk_id"] for result in vector_results]
     
-    # Get chunks from database
-    chunks_collection = db.document_chunks
-    chunks_cursor = chunks_collection.find({"id": {"$in": chunk_ids}})
-    chunks = await chunks_cursor.to_list(length=None)
-    
-    # Map chunks by ID
-    chunks_map = {chunk["id"]: chunk for chunk in chunks}
-    
-    # Get document IDs
-    document_ids = list(set(chunk["document_id"] for chunk in chunks))
-    
-    # Get documents from database
-    documents_collection = db.documents
-    documents_cursor = documents_collection.find({"id": {"$in": document_ids}})
-    documents = await documents_cursor.to_list(length=None)
-    
-    # Map documents by ID
-    documents_map = {doc["id"]: doc for doc in documents}
+    # Load only the fields the response needs: chunk text is only read
+    # for content and highlights. Records come from the local chunk text
+    # store if enabled, then from the hydration cache, which keeps the
+    # chunk text either way.
+    chunks_map, documents_map = await hydrate(
+        db,
+        chunk_ids,
+        chunk_projection(include_content=query.include_content or query.highlight),
+        document_projection(SEARCH_DOCUMENT_FIELDS, query.filters),
+        cache=hydration_cache,
+        vector_store=vector_store
+    )
     
     # Apply filters if provided
     filtered_results = []
@@ -125,7 +127,7 @@ async def search_documents(
         
         # Generate highlights (simple keyword matching for demo)
         highlights = []
-        if "content" in chunk:
+        if query.highlight and "content" in chunk:
             content = chunk["content"]
             
             # Extract keywords from query
@@ -184,17 +186,26 @@ async def search_documents(
         results=search_results,
         total=len(filtered_results),
         query=query.query,
-        search_time=search_time
+        search_time=search_time,
+        did_you_mean=did_you_mean
     )
 
 @router.post("/suggest", response_model=SuggestResponse)
 async def suggest_queries(
     query: SuggestQuery,
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    suggestion_index = Depends(get_suggestion_index)
 ):
     """
     Get query suggestions based on prefix
+    
+    Served from the in-memory suggestion index, which also completes
+    prefixes with typos; until it is built at startup, the database is
+    queried instead.
     """
+    if suggestion_index.ready:
+        return SuggestResponse(suggestions=suggestion_index.suggest(query.prefix, query.limit))
+    
     # Simple implementation using past queries
     queries_collection = db.search_queries
     
@@ -233,29 +244,13 @@ async def suggest_queries(
 @router.post("/record-query")
 async def record_search_query(
     query: str = Query(...),
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    query_recorder = Depends(get_query_recorder)
 ):
     """
     Record search query for suggestions
-    """
-    queries_collection = db.search_queries
-    
-    # Check if query already exists
-    existing_query = await queries_collection.find_one({"query": query})
     
-    if existing_query:
-        # Update count
-        await queries_collection.update_one(
-            {"query": query},
-            {"$inc": {"count": 1}, "$set": {"last_used": datetime.now()}}
-        )
-    else:
-        # Create new record
-        await queries_collection.insert_one({
-            "query": query,
-            "count": 1,
-            "created_at": datetime.now(),
-            "last_used": datetime.now()
-        })
+    Counts are buffered and written in batches every few seconds.
+    """
+    query_recorder.record(query)
     
     return {"status": "recorded"}
\ No newline at end of file
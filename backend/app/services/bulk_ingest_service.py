@@ -0,0 +1,320 @@
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from app.models.document import Document, DocumentChunk
+from app.utils.embedding_storage import chunk_document
+from app.services.hydration import search_fields, chunk_text_record
+from app.services.suggestions import record_vocabulary
+from app.services.stats_service import record_document_changes, stats_fields
+from app.utils.symspell import count_words
+
+# Rejected lines and failed documents listed in a bulk ingest summary
+MAX_REPORTED_ERRORS = 100
+
+class BulkIngestStats:
+    """Counters for one bulk ingest"""
+
+    def __init__(self):
+        self.status = "running"
+        self.started_at = time.time()
+        self.finished_at = None
+        self.documents_received = 0
+        self.documents_processed = 0
+        self.documents_failed = 0
+        self.documents_rejected = 0
+        self.documents_requeued = 0
+        self.chunks_indexed = 0
+        self.errors: List[str] = []
+        self.error = None
+
+    def add_error(self, message: str) -> None:
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def documents_per_second(self) -> float:
+        """Throughput of fully indexed documents"""
+        elapsed = self.elapsed
+        return self.documents_processed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "documents_received": self.documents_received,
+            "documents_processed": self.documents_processed,
+            "documents_failed": self.documents_failed,
+            "documents_rejected": self.documents_rejected,
+            "documents_requeued": self.documents_requeued,
+            "chunks_indexed": self.chunks_indexed,
+            "elapsed": round(self.elapsed, 3),
+            "documents_per_second": round(self.documents_per_second, 2),
+            "errors": self.errors,
+            "error": self.error
+        }
+
+class BulkIngester:
+    """
+    Ingest a stream of documents with batched writes and embeddings
+
+    Documents are inserted with one insert_many per batch and chunked
+    concurrently. Their chunks are pooled across documents so that the
+    embedding model sees large batches, stored together with their
+    embeddings in a single insert_many, and added to the vector store in
+    blocks. The index is persisted once, by finish().
+    """
+
+    def __init__(
+        self,
+        db,
+        vector_store,
+        embedding_model,
+        processor,
+        document_batch_size: int = 500,
+        embedding_batch_size: int = 2048,
+        progress_every: int = 1000,
+        embedding_storage: str = "float32",
+        suggestion_index=None,
+        job_queue=None
+    ):
+        """
+        Initialize bulk ingester
+
+        Args:
+            db: Database
+            vector_store: Vector store to add embeddings to
+            embedding_model: Embedding model
+            processor: Document processor used to chunk documents
+            document_batch_size: Number of documents inserted and chunked together
+            embedding_batch_size: Number of chunks embedded together
+            progress_every: Log progress every this many documents
+            embedding_storage: How embeddings are stored with the chunks
+                (see app.utils.embedding_storage)
+            suggestion_index: Suggestion index to add indexed titles and words to
+            job_queue: Job queue that inserted documents left unindexed by
+                an interrupted run are queued on
+        """
+        self.db = db
+        self.vector_store = vector_store
+        self.embedding_model = embedding_model
+        self.processor = processor
+        self.document_batch_size = max(1, document_batch_size)
+        self.embedding_batch_size = max(1, embedding_batch_size)
+        self.progress_every = progress_every
+        self.embedding_storage = embedding_storage
+        self.suggestion_index = suggestion_index
+        self.job_queue = job_queue
+        self.stats = BulkIngestStats()
+
+        self._documents: List[Document] = []
+        self._chunks: List[DocumentChunk] = []
+        # Documents whose chunks are all in _chunks or already indexed
+        self._completed: List[Document] = []
+        # Inserted documents not marked processed yet, with their stats
+        # fields as inserted, by ID
+        self._inserted: Dict[str, Tuple[Document, Dict[str, Any]]] = {}
+        self._last_progress = 0
+
+    async def add(self, document: Document) -> None:
+        """Queue a document, indexing a batch once enough are queued"""
+        self.stats.documents_received += 1
+        self._documents.append(document)
+        if len(self._documents) >= self.document_batch_size:
+            await self._flush_documents()
+
+    def reject(self, message: str) -> None:
+        """Record an input record that could not be turned into a document"""
+        self.stats.documents_rejected += 1
+        self.stats.add_error(message)
+
+    async def finish(self, error: Optional[Exception] = None) -> BulkIngestStats:
+        """
+        Index everything still queued and persist the vector store
+
+        Args:
+            error: Error that interrupted the input, if any; documents
+                not indexed yet are then queued as processing jobs
+        """
+        try:
+            if error is None:
+                await self._flush_documents()
+                await self._flush_chunks()
+        except Exception as e:
+            error = e
+        finally:
+            await self.vector_store.save_index()
+
+        if error is not None:
+            # Documents still queued were received but never stored
+            documents, self._documents = self._documents, []
+            try:
+                await self._insert_documents(documents)
+            except Exception as e:
+                print(f"Error inserting documents: {e}")
+            await self._requeue_inserted()
+
+        self.stats.finished_at = time.time()
+        if error is not None:
+            print(f"Error in bulk ingest: {error}")
+            self.stats.status = "failed"
+            self.stats.error = str(error)
+        else:
+            self.stats.status = "completed"
+        self._log_progress()
+        return self.stats
+
+    async def _insert_documents(self, documents: List[Document]) -> None:
+        """
+        Insert documents, tracking them until they are marked processed;
+        documents that could not be inserted count as failed
+        """
+        if not documents:
+            return
+        records = [document.dict() for document in documents]
+        try:
+            await self.db.documents.insert_many(records, ordered=False)
+        except Exception as e:
+            self.stats.documents_failed += len(documents)
+            self.stats.add_error(f"{len(documents)} documents could not be stored: {e}")
+            raise
+        await record_document_changes(self.db, [(None, record) for record in records])
+        self._inserted.update(
+            (document.id, (document, stats_fields(record))) for document, record in zip(documents, records)
+        )
+
+    async def _requeue_inserted(self) -> None:
+        """
+        Queue a processing job for each inserted document that was not
+        marked processed, e.g. because its chunks were still buffered;
+        documents that cannot be queued count as failed
+        """
+        inserted, self._inserted = self._inserted, {}
+        self._completed, self._chunks = [], []
+        if self.job_queue is None:
+            if inserted:
+                self.stats.documents_failed += len(inserted)
+                self.stats.add_error(f"{len(inserted)} stored documents were left unprocessed")
+            return
+        for document, _ in inserted.values():
+            try:
+                # Chunks already stored for the document are reused
+                await self.job_queue.enqueue_document(document, replace_existing=True)
+                self.stats.documents_requeued += 1
+            except Exception as e:
+                print(f"Error queueing document {document.id}: {e}")
+                self.stats.documents_failed += 1
+                self.stats.add_error(f"{document.id}: stored but not queued for processing: {e}")
+
+    async def _flush_documents(self) -> None:
+        """Insert and chunk the queued documents"""
+        documents, self._documents = self._documents, []
+        if not documents:
+            return
+        await self._insert_documents(documents)
+
+        # Chunking runs in the extraction pool, which bounds the concurrency
+        results = await asyncio.gather(*(self._chunk_document(document) for document in documents))
+        for document, chunks in zip(documents, results):
+            self._chunks.extend(chunks)
+            self._completed.append(document)
+            if len(self._chunks) >= self.embedding_batch_size:
+                await self._flush_chunks()
+
+    async def _chunk_document(self, document: Document) -> List[DocumentChunk]:
+        """Split one document into chunks, recording failures on the document"""
+        chunks = []
+        document.error = None
+        try:
+            async for batch in self.processor.iter_chunks(document):
+                chunks.extend(batch)
+            if not chunks:
+                document.error = "Could not extract content from document"
+        except Exception as e:
+            document.error = str(e)
+            chunks = []
+
+        document.chunk_count = len(chunks)
+        document.token_count = sum(chunk.token_count or 0 for chunk in chunks)
+        return chunks
+
+    async def _flush_chunks(self) -> None:
+        """Embed and store pending chunks, then mark their documents processed"""
+        chunks, self._chunks = self._chunks, []
+        # Words for typo correction
+        vocabulary = Counter()
+        if chunks:
+            embeddings = await self.embedding_model.embed_texts([chunk.content for chunk in chunks])
+            for chunk, embedding in zip(chunks, embeddings):
+                chunk.embedding = embedding
+
+            await self.db.document_chunks.insert_many(
+                [chunk_document(chunk, self.embedding_storage) for chunk in chunks],
+                ordered=False
+            )
+            await self.vector_store.add_embeddings(embeddings, [chunk.id for chunk in chunks], save=False)
+            if self.vector_store.text_store is not None:
+                documents = {document.id: search_fields(document) for document in self._completed}
+                self.vector_store.put_chunk_texts([
+                    chunk_text_record(chunk.id, chunk.document_id, chunk.content, documents[chunk.document_id])
+                    for chunk in chunks
+                ])
+            self.stats.chunks_indexed += len(chunks)
+            for chunk in chunks:
+                vocabulary.update(count_words(chunk.content))
+
+        completed, self._completed = self._completed, []
+        if not completed:
+            return
+
+        now = datetime.now()
+        await self.db.documents.bulk_write([
+            UpdateOne({"id": document.id}, {"$set": {
+                "processed": True,
+                "chunk_count": document.chunk_count,
+                "token_count": document.token_count,
+                "truncated": document.truncated,
+                "content_hash": document.content_hash,
+                "metadata": document.metadata,
+                "title": document.title,
+                "etag": document.etag,
+                "last_modified": document.last_modified,
+                "last_fetched_at": document.last_fetched_at,
+                "error": document.error,
+                "updated_at": now
+            }})
+            for document in completed
+        ], ordered=False)
+        await record_document_changes(self.db, [
+            (self._inserted.pop(document.id)[1], {**stats_fields(document.dict()), "processed": True})
+            for document in completed
+        ])
+
+        for document in completed:
+            if document.error:
+                self.stats.documents_failed += 1
+                self.stats.add_error(f"{document.id}: {document.error}")
+            else:
+                self.stats.documents_processed += 1
+                vocabulary.update(count_words(document.title or ""))
+                if self.suggestion_index is not None:
+                    self.suggestion_index.set_title(document.id, document.title)
+        await record_vocabulary(self.db, vocabulary)
+        if self.suggestion_index is not None:
+            self.suggestion_index.add_words(vocabulary)
+
+        if self.stats.documents_received - self._last_progress >= self.progress_every:
+            self._log_progress()
+
+    def _log_progress(self) -> None:
+        self._last_progress = self.stats.documents_received
+        print(
+            f"Bulk ingest: {self.stats.documents_processed} documents indexed, "
+            f"{self.stats.documents_failed} failed, {self.stats.chunks_indexed} chunks, "
+            f"{self.stats.documents_per_second:.1f} docs/s"
+        )
@@ -0,0 +1,144 @@
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pydantic import BaseModel
+from app.utils.hydration_cache import HydrationCache
+
+# Chunk fields every hydration needs. Without content, the lookup is
+# covered by the (id, document_id) index and never reads the chunks.
+CHUNK_KEY_FIELDS = {"_id": 0, "id": 1, "document_id": 1}
+
+# Document fields shown in search results
+SEARCH_DOCUMENT_FIELDS = ("id", "title", "url", "metadata", "tags", "created_at")
+
+# Document fields shown in chat sources
+CHAT_DOCUMENT_FIELDS = ("id", "title")
+
+def chunk_projection(include_content: bool = False, content_chars: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Projection for hydrating chunks
+
+    Args:
+        include_content: Whether the chunk text is needed
+        content_chars: Only return the first this many characters of it
+    """
+    projection = dict(CHUNK_KEY_FIELDS)
+    if include_content:
+        if content_chars is None:
+            projection["content"] = 1
+        else:
+            projection["content"] = {"$substrCP": ["$content", 0, content_chars]}
+    return projection
+
+def document_projection(fields: Iterable[str], filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Projection for hydrating documents, including any fields that search
+    filters are evaluated against
+    """
+    projection = {"_id": 0}
+    for field in fields:
+        projection[field] = 1
+    for key in filters or {}:
+        # metadata.* filters are matched against the whole metadata dict
+        projection[key.split(".", 1)[0]] = 1
+    return projection
+
+def covers_search_fields(fields: Dict[str, Any]) -> bool:
+    """Whether a document projection only asks for search result fields"""
+    return all(field in SEARCH_DOCUMENT_FIELDS for field, include in fields.items() if include and field != "_id")
+
+def search_fields(document: Any) -> Dict[str, Any]:
+    """Search result fields of a document (a dict or a Document)"""
+    if isinstance(document, BaseModel):
+        return {field: getattr(document, field) for field in SEARCH_DOCUMENT_FIELDS}
+    return {field: document.get(field) for field in SEARCH_DOCUMENT_FIELDS}
+
+def chunk_text_record(chunk_id: str, document_id: str, content: str, document_fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Chunk text store record of a chunk (see search_fields for document_fields)"""
+    return {
+        "id": chunk_id,
+        "document_id": document_id,
+        "content": content,
+        "document": document_fields
+    }
+
+async def store_chunk_texts(db, vector_store, document: Any, exclude: Iterable[str] = ()) -> None:
+    """
+    Write the chunk text store records of all of a document's chunks, e.g.
+    after it was indexed or its title, URL, tags or metadata changed
+
+    Args:
+        db: Database
+        vector_store: Vector store owning the text store
+        document: Document (or dict) with its current search fields
+        exclude: IDs of chunks about to be deleted
+    """
+    if vector_store.text_store is None:
+        return
+    document_fields = search_fields(document)
+    exclude = set(exclude)
+    cursor = db.document_chunks.find({"document_id": document_fields["id"]}, chunk_projection(True))
+    vector_store.put_chunk_texts([
+        chunk_text_record(chunk["id"], chunk["document_id"], chunk["content"], document_fields)
+        async for chunk in cursor if chunk["id"] not in exclude
+    ])
+
+def create_cache(max_bytes: int) -> HydrationCache:
+    """
+    Hydration cache holding what search and chat read: whole chunk text,
+    so one entry serves content, highlights and snippets, and the search
+    document fields
+    """
+    return HydrationCache(max_bytes, chunk_projection(True), document_projection(SEARCH_DOCUMENT_FIELDS))
+
+async def hydrate(
+    db,
+    chunk_ids: List[str],
+    chunk_fields: Dict[str, Any],
+    document_fields: Dict[str, Any],
+    cache: Optional[HydrationCache] = None,
+    vector_store = None
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+    """
+    Load the chunks behind vector search results and their documents
+
+    Args:
+        db: Database
+        chunk_ids: IDs of the chunks to load
+        chunk_fields: Projection for chunks (see chunk_projection)
+        document_fields: Projection for documents (see document_projection)
+        cache: Hydration cache to serve records from. Cached records have
+            all cached fields, which may be more than the projections ask
+            for. Documents bypass the cache when filters need other fields.
+        vector_store: Vector store whose chunk text store, if it has one,
+            serves chunks and documents without querying the database.
+            Chunks missing from it are loaded as usual.
+
+    Returns:
+        Tuple of (chunks by ID, documents by ID)
+    """
+    chunks_map = {}
+    documents_map = {}
+    if vector_store is not None and vector_store.text_store is not None and covers_search_fields(document_fields):
+        for chunk_id, record in vector_store.get_chunk_texts(chunk_ids).items():
+            document = record.pop("document")
+            chunks_map[chunk_id] = record
+            documents_map[document["id"]] = document
+        chunk_ids = [chunk_id for chunk_id in chunk_ids if chunk_id not in chunks_map]
+        if not chunk_ids:
+            return chunks_map, documents_map
+
+    if cache is not None and cache.enabled:
+        chunks_map.update(await cache.get_chunks(db, chunk_ids))
+    else:
+        cursor = db.document_chunks.find({"id": {"$in": chunk_ids}}, chunk_fields)
+        chunks = await cursor.to_list(length=None)
+        chunks_map.update((chunk["id"], chunk) for chunk in chunks)
+
+    document_ids = list(set(chunk["document_id"] for chunk in chunks_map.values()) - set(documents_map))
+    if cache is not None and cache.enabled and cache.covers(document_fields):
+        documents_map.update(await cache.get_documents(db, document_ids))
+    else:
+        cursor = db.documents.find({"id": {"$in": document_ids}}, document_fields)
+        documents = await cursor.to_list(length=None)
+        documents_map.update((document["id"], document) for document in documents)
+
+    return chunks_map, documents_map
@@ -0,0 +1,254 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from app.models.document import DocumentChunk
+from app.utils.embedding_storage import chunk_document
+
+class StageStats:
+    """Throughput and queue-wait counters of one pipeline stage"""
+
+    def __init__(self, name: str, concurrency: Optional[int] = None, queue: Optional[asyncio.Queue] = None):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.in_flight = 0
+        self.items = 0
+        self.batches = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+        self.waits = 0
+
+    def record(self, items: int, busy: float, waits: Optional[List[float]] = None, error: bool = False) -> None:
+        self.items += items
+        self.batches += 1
+        self.busy_seconds += busy
+        if error:
+            self.errors += 1
+        for wait in waits or []:
+            self.wait_seconds += wait
+            self.waits += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "concurrency": self.concurrency,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue.qsize() if self.queue is not None else None,
+            "queue_capacity": self.queue.maxsize if self.queue is not None else None,
+            "chunks": self.items,
+            "batches": self.batches,
+            "errors": self.errors,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            # Rate of one worker while busy, comparable across stages
+            "chunks_per_second": round(self.items / self.busy_seconds, 2) if self.busy_seconds > 0 else 0.0,
+            "avg_queue_wait": round(self.wait_seconds / self.waits, 4) if self.waits else 0.0
+        }
+
+class IngestPipeline:
+    """
+    Shared embed and persist stages for document ingestion
+
+    Documents are extracted and chunked by their own jobs, which hand their
+    chunk batches to the pipeline and move on to the next batch. The embed
+    stage merges batches waiting from all documents into one model call,
+    and the persist stage stores chunks together with their embeddings and
+    adds them to the vector store. A failed merged call is retried per
+    document, so one bad document does not fail the others in its batch.
+    The stages are connected by bounded queues, so a slow stage makes
+    submitters wait instead of letting chunks pile up in memory.
+    """
+
+    def __init__(
+        self,
+        db,
+        vector_store,
+        embedding_model,
+        queue_size: int = 8,
+        embed_workers: int = 1,
+        embed_batch_size: int = 512,
+        persist_workers: int = 2,
+        persist_batch_size: int = 1024,
+        embedding_storage: str = "float32"
+    ):
+        """
+        Initialize ingestion pipeline
+
+        Args:
+            db: Database
+            vector_store: Vector store to add embeddings to
+            embedding_model: Embedding model
+            queue_size: Chunk batches each stage queue holds before submitters wait
+            embed_workers: Concurrent embedding model calls
+            embed_batch_size: Maximum chunks per embedding model call
+            persist_workers: Concurrent database writers
+            persist_batch_size: Maximum chunks per database write
+            embedding_storage: How embeddings are stored with the chunks
+                (see app.utils.embedding_storage)
+        """
+        self.db = db
+        self.vector_store = vector_store
+        self.embedding_model = embedding_model
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.persist_batch_size = max(1, persist_batch_size)
+        self.embedding_storage = embedding_storage
+        self._embed_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self._persist_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.stages = {
+            "extract": StageStats("extract"),
+            "embed": StageStats("embed", embed_workers, self._embed_queue),
+            "persist": StageStats("persist", persist_workers, self._persist_queue)
+        }
+        self._workers: List[asyncio.Task] = []
+
+    def _start(self) -> None:
+        """Start the stage workers, on first use inside the event loop"""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._embed_worker())
+            for _ in range(self.stages["embed"].concurrency)
+        ] + [
+            asyncio.create_task(self._persist_worker())
+            for _ in range(self.stages["persist"].concurrency)
+        ]
+
+    async def timed(self, batches: AsyncIterator[List[DocumentChunk]]) -> AsyncIterator[List[DocumentChunk]]:
+        """Pass a document's chunk batches through, recording extract stage metrics"""
+        stats = self.stages["extract"]
+        stats.in_flight += 1
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    chunks = await batches.__anext__()
+                except StopAsyncIteration:
+                    return
+                stats.record(len(chunks), time.monotonic() - started)
+                yield chunks
+        finally:
+            stats.in_flight -= 1
+
+    async def submit(self, chunks: List[DocumentChunk]) -> asyncio.Future:
+        """
+        Queue chunks to be embedded and stored
+
+        Waits while the embed queue is full.
+
+        Returns:
+            Future resolved once the chunks are stored and in the vector
+            store (without saving the index), or failed with the error
+        """
+        self._start()
+        future = asyncio.get_running_loop().create_future()
+        await self._embed_queue.put((chunks, future, time.monotonic()))
+        return future
+
+    async def _take(self, queue: asyncio.Queue, limit: int) -> Tuple[List[Tuple[List[DocumentChunk], asyncio.Future]], List[float]]:
+        """Wait for one item, then add whatever else is queued, up to limit chunks"""
+        chunks, future, queued_at = await queue.get()
+        now = time.monotonic()
+        items = [(chunks, future)]
+        waits = [now - queued_at]
+        count = len(chunks)
+        while count < limit and not queue.empty():
+            chunks, future, queued_at = queue.get_nowait()
+            items.append((chunks, future))
+            waits.append(now - queued_at)
+            count += len(chunks)
+        return items, waits
+
+    @staticmethod
+    def _fail(items, error: Exception) -> None:
+        for _, future in items:
+            if not future.done():
+                future.set_exception(error)
+
+    async def _run_merged(self, stage: str, items, waits: List[float], run) -> List[Tuple[List[DocumentChunk], asyncio.Future]]:
+        """
+        Run a stage on the merged chunks of several submissions
+
+        If the merged call fails, each submission is retried on its own, so
+        that a failure only fails the futures of its own document's chunks.
+
+        Args:
+            stage: Name of the stage, for metrics
+            items: (chunks, future) tuples of the submissions
+            waits: Queue waits of the submissions
+            run: Coroutine function running the stage on a list of chunks,
+                called with retry=True for a submission retried on its own
+
+        Returns:
+            The items that succeeded
+        """
+        stats = self.stages[stage]
+        stats.in_flight += 1
+        try:
+            chunks = [chunk for batch, _ in items for chunk in batch]
+            started = time.monotonic()
+            try:
+                await run(chunks)
+            except Exception as e:
+                stats.record(len(chunks), time.monotonic() - started, waits, error=True)
+                if len(items) == 1:
+                    self._fail(items, e)
+                    return []
+            else:
+                stats.record(len(chunks), time.monotonic() - started, waits)
+                return items
+
+            succeeded = []
+            for batch, future in items:
+                started = time.monotonic()
+                try:
+                    await run(batch, retry=True)
+                except Exception as e:
+                    stats.record(len(batch), time.monotonic() - started, error=True)
+                    self._fail([(batch, future)], e)
+                    continue
+                stats.record(len(batch), time.monotonic() - started)
+                succeeded.append((batch, future))
+            return succeeded
+        finally:
+            stats.in_flight -= 1
+
+    async def _embed(self, chunks: List[DocumentChunk], retry: bool = False) -> None:
+        embeddings = await self.embedding_model.embed_texts([chunk.content for chunk in chunks])
+        for chunk, embedding in zip(chunks, embeddings):
+            chunk.embedding = embedding
+
+    async def _persist(self, chunks: List[DocumentChunk], retry: bool = False) -> None:
+        if retry:
+            # The unordered merged write may have stored some of the chunks
+            # before it failed
+            await self.db.document_chunks.delete_many({"id": {"$in": [chunk.id for chunk in chunks]}})
+        await self.db.document_chunks.insert_many(
+            [chunk_document(chunk, self.embedding_storage) for chunk in chunks],
+            ordered=False
+        )
+        await self.vector_store.add_embeddings(
+            [chunk.embedding for chunk in chunks],
+            [chunk.id for chunk in chunks],
+            save=False
+        )
+
+    async def _embed_worker(self) -> None:
+        while True:
+            items, waits = await self._take(self._embed_queue, self.embed_batch_size)
+            for batch, future in await self._run_merged("embed", items, waits, self._embed):
+                await self._persist_queue.put((batch, future, time.monotonic()))
+
+    async def _persist_worker(self) -> None:
+        while True:
+            items, waits = await self._take(self._persist_queue, self.persist_batch_size)
+            for _, future in await self._run_merged("persist", items, waits, self._persist):
+                if not future.done():
+                    future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {name: stage.to_dict() for name, stage in self.stages.items()}
+
+    def shutdown(self) -> None:
+        """Stop the stage workers"""
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
@@ -1,15 +1,20 @@
-from motor.motor_asyncio import AsyncIOMotorClient
-from app.models.settings import Settings
+from app.dependencies import get_database, open_resources, settings
+from app.services.stats_service import STATS_ID, recompute_stats
 import os
 import secrets
-from app.utils.vector_store import VectorStore
-from app.utils.embedding_model import EmbeddingModel
+import time
+
+# Seconds completed ingestion jobs are kept
+COMPLETED_JOB_TTL = 7 * 24 * 3600
 
 async def initialize_system():
     """
     Initialize the system on startup
+    
+    Creates the process's shared resources, so requests reuse the database
+    connection, index and model loaded here.
     """
-    settings = Settings()
+    started = time.time()
     
     # Create data directories
     os.makedirs("data", exist_ok=True)
@@ -25,8 +30,7 @@ async def initialize_system():
                 f.write(f"\nAPI_KEY={api_key}")
     
     # Connect to database
-    client = AsyncIOMotorClient(settings.mongodb_uri)
-    db = client.get_database()
+    db = await get_database()
     
     # Create collections if they don't exist
     if "documents" not in await db.list_collection_names():
@@ -40,41 +44,61 @@ async def initialize_system():
         
     if "conversations" not in await db.list_collection_names():
         await db.create_collection("conversations")
+        
+    if "jobs" not in await db.list_collection_names():
+        await db.create_collection("jobs")
+        
+    if "vocabulary" not in await db.list_collection_names():
+        await db.create_collection("vocabulary")
     
     # Create indexes
     await db.documents.create_index("id", unique=True)
     await db.documents.create_index("tags")
     await db.documents.create_index("created_at")
+    await db.documents.create_index([("url", 1), ("last_fetched_at", 1)])
+    await db.documents.create_index(
+        "file_hash",
+        unique=True,
+        partialFilterExpression={"file_hash": {"$type": "string"}}
+    )
     
     await db.document_chunks.create_index("id", unique=True)
     await db.document_chunks.create_index("document_id")
+    # Covers search hydration when chunk text is not needed
+    await db.document_chunks.create_index([("id", 1), ("document_id", 1)])
     
     await db.search_queries.create_index("query", unique=True)
     await db.search_queries.create_index("count")
     
-    await db.conversations.create_index("id", unique=True)
+    await db.vocabulary.create_index("word", unique=True)
+    await db.vocabulary.create_index("count")
     
-    print("Database initialization complete")
+    await db.tag_counts.create_index("count")
+    
+    await db.conversations.create_index("id", unique=True)
     
-    # Initialize vector store
-    vector_store = VectorStore(
-        dimension=settings.embedding_dimension,
-        index_type=settings.index_type
+    await db.jobs.create_index("id", unique=True)
+    await db.jobs.create_index([("queue", 1), ("status", 1), ("run_at", 1)])
+    await db.jobs.create_index([("document_id", 1), ("status", 1)])
+    await db.jobs.create_index("created_at")
+    # Completed jobs are kept for a week; dead ones until they are retried
+    await db.jobs.create_index(
+        "finished_at",
+        expireAfterSeconds=COMPLETED_JOB_TTL,
+        partialFilterExpression={"status": "completed"}
     )
-    await vector_store.load_or_create_index()
     
-    print("Vector store initialization complete")
+    # Counters are kept up to date from here on; existing documents are
+    # counted once
+    if await db.stats.find_one({"_id": STATS_ID}) is None:
+        await recompute_stats(db)
     
-    # Initialize embedding model
-    _ = EmbeddingModel(
-        model_name=settings.model_name,
-        use_openai=settings.use_openai_embeddings,
-        openai_api_key=settings.openai_api_key,
-        openai_model=settings.openai_embedding_model,
-        cache_dir="data/models"
-    )
+    print("Database initialization complete")
+    
+    # Load the vector store and embedding model (concurrently) for reuse
+    await open_resources()
     
-    print("Embedding model initialization complete")
+    print("Vector store and embedding model initialization complete")
     
     # System initialization complete
-    print("System initialization complete")
\ No newline at end of file
+    print(f"System initialization complete in {time.time() - started:.1f}s")
\ No newline at end of file
@@ -0,0 +1,435 @@
+import asyncio
+import os
+import random
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.models.job import Job
+from app.models.document import Document
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+DEAD = "dead"
+
+# Stages: URL documents wait on the network, everything else on CPU, so
+# each gets its own concurrency
+FETCH_QUEUE = "fetch"
+PROCESS_QUEUE = "process"
+QUEUES = (FETCH_QUEUE, PROCESS_QUEUE)
+
+PROCESS_DOCUMENT = "process_document"
+
+# Seconds before a job whose document is locked by another job is tried again
+DOCUMENT_BUSY_DELAY = 5.0
+
+class JobQueue:
+    """
+    Durable job queue stored in MongoDB
+
+    Jobs survive restarts and are claimed atomically with a lease, so any
+    number of workers (in the API process or in separate worker processes)
+    can share a queue. A job whose worker died is claimed again once its
+    lease expires. Failed jobs are retried with exponential backoff and
+    dead-lettered (status "dead") after max_attempts.
+
+    Jobs of the same document never run at the same time: claiming a job
+    also takes its document's lock (in the job_locks collection), which
+    expires with the job's lease. A job whose document is locked goes back
+    to the queue for DOCUMENT_BUSY_DELAY seconds without using an attempt.
+    """
+
+    def __init__(
+        self,
+        db,
+        max_attempts: int = 5,
+        backoff: float = 10.0,
+        backoff_max: float = 600.0,
+        lease: float = 300.0
+    ):
+        """
+        Initialize job queue
+
+        Args:
+            db: Database
+            max_attempts: Attempts before a job is dead-lettered
+            backoff: Delay before the first retry in seconds, doubled for each further attempt
+            backoff_max: Maximum delay between attempts in seconds
+            lease: Seconds a claimed job stays locked without a heartbeat
+        """
+        self.collection = db.jobs
+        # Document ID -> claim of the job running for it (see _lock_document)
+        self.locks = db.job_locks
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.lease = lease
+        # Wakes workers in this process as soon as a job is enqueued
+        self._wakeups = {queue: asyncio.Event() for queue in QUEUES}
+
+    async def enqueue(self, job_type: str, queue: str, document_id: Optional[str] = None, params: Optional[Dict[str, Any]] = None) -> Job:
+        """Add a job to a queue"""
+        job = Job(type=job_type, queue=queue, document_id=document_id, params=params or {}, max_attempts=self.max_attempts)
+        await self.collection.insert_one(job.dict())
+        self._wakeups[queue].set()
+        return job
+
+    async def enqueue_document(self, document: Document, refetch: bool = False, replace_existing: bool = False) -> Job:
+        """Queue a document for processing, in the stage its input comes from"""
+        queue = FETCH_QUEUE if document.url and (refetch or not document.content) else PROCESS_QUEUE
+        return await self.enqueue(
+            PROCESS_DOCUMENT,
+            queue,
+            document_id=document.id,
+            params={"refetch": refetch, "replace_existing": replace_existing}
+        )
+
+    async def active_job(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Get a queued or running job for a document, if any"""
+        return await self.collection.find_one({"document_id": document_id, "status": {"$in": [QUEUED, RUNNING]}})
+
+    async def claim(self, queue: str, worker_id: str) -> Optional[Job]:
+        """
+        Lock the next due job of a queue for a worker
+
+        Returns:
+            The claimed job, or None if no job is due
+        """
+        while True:
+            now = datetime.now()
+            job = await self.collection.find_one_and_update(
+                {
+                    "queue": queue,
+                    "$or": [
+                        {"status": QUEUED, "run_at": {"$lte": now}},
+                        {"status": RUNNING, "locked_until": {"$lt": now}}
+                    ]
+                },
+                {
+                    "$set": {
+                        "status": RUNNING,
+                        "locked_by": worker_id,
+                        "locked_until": now + timedelta(seconds=self.lease),
+                        "started_at": now,
+                        "updated_at": now
+                    },
+                    "$inc": {"attempts": 1}
+                },
+                sort=[("run_at", 1)],
+                return_document=ReturnDocument.AFTER
+            )
+            if job is None:
+                return None
+
+            job = Job(**job)
+            if job.attempts > job.max_attempts:
+                # Its workers kept dying (e.g. killed for memory) without failing it
+                await self._finish(job, DEAD, job.error or "Worker lost while running job")
+                continue
+            if await self._lock_document(job):
+                return job
+            # Another job is running for the document: put this one back
+            await self.collection.update_one(
+                {"id": job.id, "locked_by": job.locked_by},
+                {
+                    "$set": {
+                        "status": QUEUED,
+                        "run_at": now + timedelta(seconds=DOCUMENT_BUSY_DELAY),
+                        "locked_by": None,
+                        "locked_until": None,
+                        "updated_at": now
+                    },
+                    "$inc": {"attempts": -1}
+                }
+            )
+
+    async def _lock_document(self, job: Job) -> bool:
+        """
+        Take the lock of a claimed job's document until the job's lease ends
+
+        Returns:
+            False if another job holds an unexpired lock on the document
+        """
+        if job.document_id is None:
+            return True
+        try:
+            await self.locks.update_one(
+                {
+                    "_id": job.document_id,
+                    "$or": [{"job_id": job.id}, {"locked_until": {"$lt": datetime.now()}}]
+                },
+                {"$set": {"job_id": job.id, "locked_by": job.locked_by, "locked_until": job.locked_until}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # The lock exists and is held by another job
+            return False
+        return True
+
+    async def _unlock_document(self, job: Job) -> None:
+        if job.document_id is not None:
+            await self.locks.delete_one({"_id": job.document_id, "job_id": job.id, "locked_by": job.locked_by})
+
+    async def heartbeat(self, job: Job) -> bool:
+        """
+        Extend the lease of a running job
+
+        Returns:
+            False if the job was claimed by another worker in the meantime
+        """
+        locked_until = datetime.now() + timedelta(seconds=self.lease)
+        result = await self.collection.update_one(
+            {"id": job.id, "locked_by": job.locked_by, "status": RUNNING},
+            {"$set": {"locked_until": locked_until}}
+        )
+        if result.matched_count == 0:
+            return False
+        if job.document_id is not None:
+            await self.locks.update_one(
+                {"_id": job.document_id, "job_id": job.id, "locked_by": job.locked_by},
+                {"$set": {"locked_until": locked_until}}
+            )
+        return True
+
+    async def complete(self, job: Job) -> None:
+        """Mark a job as done"""
+        await self._finish(job, COMPLETED, None)
+
+    async def fail(self, job: Job, error: str) -> bool:
+        """
+        Record a failed attempt, scheduling a retry or dead-lettering the job
+
+        Returns:
+            True if the job will be retried
+        """
+        if job.attempts >= job.max_attempts:
+            await self._finish(job, DEAD, error)
+            return False
+
+        await self._unlock_document(job)
+
+        delay = min(self.backoff_max, self.backoff * 2 ** (job.attempts - 1))
+        # Jitter keeps jobs that failed together from retrying together
+        delay *= random.uniform(0.8, 1.2)
+        now = datetime.now()
+        await self.collection.update_one(
+            {"id": job.id, "locked_by": job.locked_by},
+            {"$set": {
+                "status": QUEUED,
+                "run_at": now + timedelta(seconds=delay),
+                "locked_by": None,
+                "locked_until": None,
+                "error": error,
+                "updated_at": now
+            }}
+        )
+        return True
+
+    async def _finish(self, job: Job, status: str, error: Optional[str]) -> None:
+        await self._unlock_document(job)
+        now = datetime.now()
+        await self.collection.update_one(
+            {"id": job.id, "locked_by": job.locked_by},
+            {"$set": {
+                "status": status,
+                "locked_by": None,
+                "locked_until": None,
+                "error": error,
+                "finished_at": now,
+                "updated_at": now
+            }}
+        )
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by ID"""
+        return await self.collection.find_one({"id": job_id})
+
+    async def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Re-queue a dead-lettered job with a fresh set of attempts
+
+        Returns:
+            The re-queued job, or None if there is no dead job with this ID
+        """
+        now = datetime.now()
+        job = await self.collection.find_one_and_update(
+            {"id": job_id, "status": DEAD},
+            {"$set": {"status": QUEUED, "attempts": 0, "run_at": now, "finished_at": None, "updated_at": now}},
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            self._wakeups[job["queue"]].set()
+        return job
+
+    async def depth(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Queue depth metrics
+
+        Returns:
+            Per queue: job counts by status, jobs due now, jobs waiting for a
+            retry, and the age in seconds of the oldest due job
+        """
+        now = datetime.now()
+        metrics = {
+            queue: {QUEUED: 0, RUNNING: 0, COMPLETED: 0, DEAD: 0, "due": 0, "retrying": 0, "oldest_due_age": 0.0}
+            for queue in QUEUES
+        }
+        cursor = self.collection.aggregate([
+            {"$group": {
+                "_id": {"queue": "$queue", "status": "$status"},
+                "count": {"$sum": 1},
+                "due": {"$sum": {"$cond": [{"$lte": ["$run_at", now]}, 1, 0]}},
+                "retrying": {"$sum": {"$cond": [{"$gt": ["$attempts", 0]}, 1, 0]}},
+                "oldest_run_at": {"$min": "$run_at"}
+            }}
+        ])
+        async for group in cursor:
+            queue = metrics.get(group["_id"]["queue"])
+            status = group["_id"]["status"]
+            if queue is None or status not in queue:
+                continue
+            queue[status] = group["count"]
+            if status == QUEUED:
+                queue["due"] = group["due"]
+                queue["retrying"] = group["retrying"]
+                if group["due"]:
+                    queue["oldest_due_age"] = round(max(0.0, (now - group["oldest_run_at"]).total_seconds()), 3)
+        return metrics
+
+    async def wait(self, queue: str, timeout: float) -> None:
+        """Wait until a job is enqueued in this process, or the timeout passes"""
+        wakeup = self._wakeups[queue]
+        wakeup.clear()
+        try:
+            await asyncio.wait_for(wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+class JobWorker:
+    """
+    Pool of job runners, with a fixed number per queue
+
+    Each runner claims one job at a time, keeps its lease alive while the
+    handler runs, and reports the outcome to the queue. Handlers are
+    coroutines taking the job; any exception counts as a failed attempt.
+    A handler whose lease is lost (e.g. it could not be renewed in time) is
+    cancelled, since the job may already run elsewhere.
+    """
+
+    def __init__(
+        self,
+        job_queue: JobQueue,
+        handlers: Dict[str, Callable[[Job], Awaitable[None]]],
+        concurrency: Dict[str, int],
+        poll_interval: float = 1.0
+    ):
+        """
+        Initialize job worker
+
+        Args:
+            job_queue: Queue to take jobs from
+            handlers: Coroutine functions by job type
+            concurrency: Number of runners by queue name (0 = queue not served)
+            poll_interval: Seconds between polls of an empty queue
+        """
+        self.job_queue = job_queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.started_at = None
+        self._stats = {
+            queue: {"in_flight": 0, "completed": 0, "retried": 0, "dead": 0, "lost": 0}
+            for queue in concurrency
+        }
+
+    async def run(self) -> None:
+        """Run all runners until cancelled"""
+        self.started_at = time.time()
+        runners = [
+            asyncio.create_task(self._run_queue(queue))
+            for queue, count in self.concurrency.items()
+            for _ in range(count)
+        ]
+        print(f"Job worker {self.id} started: {self.concurrency}")
+        try:
+            await asyncio.gather(*runners)
+        finally:
+            for runner in runners:
+                runner.cancel()
+
+    async def _run_queue(self, queue: str) -> None:
+        while True:
+            try:
+                job = await self.job_queue.claim(queue, self.id)
+            except Exception as e:
+                print(f"Error claiming job: {e}")
+                job = None
+            if job is None:
+                await self.job_queue.wait(queue, self.poll_interval)
+                continue
+            await self._execute(job)
+
+    async def _execute(self, job: Job) -> None:
+        stats = self._stats[job.queue]
+        stats["in_flight"] += 1
+        work = None
+        heartbeat = None
+        try:
+            handler = self.handlers.get(job.type)
+            if handler is None:
+                raise ValueError(f"No handler for job type {job.type}")
+            work = asyncio.create_task(handler(job))
+            heartbeat = asyncio.create_task(self._keep_alive(job, work))
+            await work
+        except asyncio.CancelledError:
+            if heartbeat is not None and heartbeat.done() and not heartbeat.cancelled():
+                # Lease lost: the worker holding the job now reports it
+                stats["lost"] += 1
+                return
+            # Shutting down: the lease expires and another worker resumes the job
+            raise
+        except Exception as e:
+            print(f"Error running job {job.id} (attempt {job.attempts}/{job.max_attempts}): {e}")
+            if await self.job_queue.fail(job, str(e)):
+                stats["retried"] += 1
+            else:
+                stats["dead"] += 1
+        else:
+            await self.job_queue.complete(job)
+            stats["completed"] += 1
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            stats["in_flight"] -= 1
+
+    async def _keep_alive(self, job: Job, work: asyncio.Task) -> None:
+        """Renew the job's lease until cancelled, cancelling work once the lease is lost"""
+        expires_at = time.monotonic() + self.job_queue.lease
+        while True:
+            await asyncio.sleep(self.job_queue.lease / 3)
+            try:
+                if await self.job_queue.heartbeat(job):
+                    expires_at = time.monotonic() + self.job_queue.lease
+                    continue
+                print(f"Lost the lease on job {job.id}, stopping it")
+            except Exception as e:
+                print(f"Error renewing job lease: {e}")
+                if time.monotonic() < expires_at:
+                    continue
+                print(f"Lease on job {job.id} expired, stopping it")
+            work.cancel()
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.id,
+            "uptime": round(time.time() - self.started_at, 3) if self.started_at else 0.0,
+            "concurrency": self.concurrency,
+            "queues": self._stats
+        }
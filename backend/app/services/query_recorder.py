@@ -0,0 +1,131 @@
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+class QueryRecorder:
+    """
+    Buffered search query counts for suggestions
+
+    Recording a query only updates an in-memory counter. The counts are
+    written periodically (or once max_pending distinct queries are
+    waiting) as one unordered bulk upsert with $inc, so concurrent API
+    processes add up instead of overwriting each other, and recording
+    costs no database round trip. Counts that fail to write are kept for
+    the next flush.
+    """
+
+    def __init__(
+        self,
+        db,
+        flush_interval: float = 5.0,
+        max_pending: int = 10000,
+        on_flush: Optional[Callable[[Dict[str, int]], None]] = None
+    ):
+        """
+        Initialize query recorder
+
+        Args:
+            db: Database
+            flush_interval: Seconds between flushes
+            max_pending: Distinct queries buffered before flushing early
+            on_flush: Called with the counts of each flush once written
+        """
+        self.db = db
+        self.on_flush = on_flush
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+        # Query -> (count, last used)
+        self._pending: Dict[str, Tuple[int, datetime]] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self.recorded = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.errors = 0
+
+    def record(self, query: str, count: int = 1) -> None:
+        """Count a query"""
+        pending = self._pending.get(query)
+        self._pending[query] = ((pending[0] if pending else 0) + count, datetime.now())
+        self.recorded += count
+        if len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+
+    async def flush(self) -> int:
+        """
+        Write the buffered counts
+
+        Returns:
+            Number of distinct queries written
+        """
+        async with self._flush_lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            items: List[Tuple[str, Tuple[int, datetime]]] = list(pending.items())
+            operations = [
+                UpdateOne(
+                    {"query": query},
+                    {
+                        "$inc": {"count": count},
+                        "$set": {"last_used": last_used},
+                        "$setOnInsert": {"created_at": last_used}
+                    },
+                    upsert=True
+                )
+                for query, (count, last_used) in items
+            ]
+            failed: List[int] = []
+            try:
+                await self.db.search_queries.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                # e.g. two processes upserting a new query at once
+                failed = [error["index"] for error in e.details.get("writeErrors", [])]
+                print(f"Error recording {len(failed)} search queries: {e}")
+            except Exception as e:
+                failed = list(range(len(items)))
+                print(f"Error recording search queries: {e}")
+
+            for index in failed:
+                query, (count, last_used) = items[index]
+                self.record(query, count)
+                self.recorded -= count
+            if self.on_flush is not None:
+                failed_queries = set(items[index][0] for index in failed)
+                try:
+                    self.on_flush({
+                        query: count for query, (count, _) in items if query not in failed_queries
+                    })
+                except Exception as e:
+                    # The queries are stored: only the callback's update is lost
+                    print(f"Error handling recorded search queries: {e}")
+            self.flushes += 1
+            self.errors += len(failed)
+            written = len(items) - len(failed)
+            self.flushed += written
+            return written
+
+    async def run(self) -> None:
+        """Flush periodically until cancelled"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # Keep flushing: one failure must not stop recording for good
+                print(f"Error flushing search queries: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "flushed": self.flushed,
+            "flushes": self.flushes,
+            "errors": self.errors
+        }
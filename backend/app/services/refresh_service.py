@@ -0,0 +1,44 @@
+import asyncio
+from datetime import datetime, timedelta
+from app.models.document import Document
+from app.models.settings import Settings
+
+async def refresh_stale_documents(db, job_queue, settings: Settings) -> int:
+    """
+    Queue re-checks of URL documents that have not been fetched recently
+
+    Each document is fetched with a conditional GET. Unchanged documents
+    (304, or the same content hash) only get their last_fetched_at bumped;
+    changed ones are re-indexed, replacing their old chunks. Documents
+    that already have a pending job are skipped.
+
+    Returns:
+        Number of documents queued
+    """
+    cutoff = datetime.now() - timedelta(hours=settings.refresh_stale_after)
+    cursor = db.documents.find({
+        "url": {"$ne": None},
+        "$or": [{"last_fetched_at": None}, {"last_fetched_at": {"$lt": cutoff}}]
+    }).sort("last_fetched_at", 1).limit(settings.refresh_batch_size)
+    documents = await cursor.to_list(length=settings.refresh_batch_size)
+
+    queued = 0
+    for document in documents:
+        if await job_queue.active_job(document["id"]):
+            continue
+        await job_queue.enqueue_document(Document(**document), refetch=True, replace_existing=True)
+        queued += 1
+
+    return queued
+
+async def run_refresh_scheduler(settings: Settings) -> None:
+    """Refresh stale URL documents every refresh_interval minutes, forever"""
+    from app.dependencies import get_database, get_job_queue
+
+    while True:
+        await asyncio.sleep(settings.refresh_interval * 60)
+        try:
+            queued = await refresh_stale_documents(await get_database(), await get_job_queue(), settings)
+            print(f"Refresh queued {queued} stale URL documents")
+        except Exception as e:
+            print(f"Error refreshing documents: {e}")
@@ -0,0 +1,132 @@
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pymongo import UpdateOne
+
+# The one document of the stats collection holding the counters
+STATS_ID = "documents"
+
+# Counters of the stats document (see document_counters)
+COUNTERS = ("documents", "processed", "errors", "chunks", "ingested", "ingested_chunks", "ingested_tokens")
+
+# Document fields the counters depend on
+STATS_FIELDS = ("processed", "error", "chunk_count", "token_count", "tags")
+
+# Counter keys of tag counts, e.g. "tags.nlp"
+TAG_PREFIX = "tags."
+
+def document_counters(document: Dict[str, Any]) -> Counter:
+    """What one document record adds to the stats"""
+    ingested = bool(document.get("processed")) and document.get("error") is None
+    counters = Counter({
+        "documents": 1,
+        "processed": int(bool(document.get("processed"))),
+        "errors": int(document.get("error") is not None),
+        # Documents keep the chunks their count says, failed or not
+        "chunks": document.get("chunk_count") or 0,
+        "ingested": int(ingested),
+        "ingested_chunks": (document.get("chunk_count") or 0) if ingested else 0,
+        "ingested_tokens": (document.get("token_count") or 0) if ingested else 0
+    })
+    for tag in document.get("tags") or []:
+        counters[f"{TAG_PREFIX}{tag}"] += 1
+    return counters
+
+def stats_fields(document: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of a document record the stats depend on"""
+    return {field: document.get(field) for field in STATS_FIELDS}
+
+def stats_delta(before: Optional[Dict[str, Any]], after: Optional[Dict[str, Any]]) -> Counter:
+    """
+    Change of the stats when a document record goes from before to after
+    (None for a record that is inserted or deleted)
+    """
+    delta = Counter()
+    if after is not None:
+        delta.update(document_counters(after))
+    if before is not None:
+        delta.subtract(document_counters(before))
+    return Counter({key: value for key, value in delta.items() if value})
+
+async def add_stats(db, delta: Dict[str, int]) -> None:
+    """
+    Apply a change to the stored counters
+
+    Counters are adjusted with $inc, so concurrent API and worker
+    processes add up. Drift, e.g. from a failed write, is fixed by
+    recompute_stats.
+    """
+    if not delta:
+        return
+    counters = {key: value for key, value in delta.items() if not key.startswith(TAG_PREFIX)}
+    tags = {key[len(TAG_PREFIX):]: value for key, value in delta.items() if key.startswith(TAG_PREFIX)}
+    try:
+        if counters:
+            await db.stats.update_one({"_id": STATS_ID}, {"$inc": counters}, upsert=True)
+        if tags:
+            await db.tag_counts.bulk_write(
+                [UpdateOne({"_id": tag}, {"$inc": {"count": count}}, upsert=True) for tag, count in tags.items()],
+                ordered=False
+            )
+    except Exception as e:
+        print(f"Error updating stats: {e}")
+
+async def record_document_changes(db, changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+    """Apply the stats change of (before, after) document record pairs"""
+    delta = Counter()
+    for before, after in changes:
+        delta.update(stats_delta(before, after))
+    await add_stats(db, delta)
+
+async def recompute_stats(db) -> Dict[str, Any]:
+    """
+    Count everything from the documents collection and replace the stored
+    counters and tag counts with the result
+
+    Scans every document: meant for on-demand use, not for each request.
+    """
+    processed = {"$eq": ["$processed", True]}
+    failed = {"$ne": [{"$ifNull": ["$error", None]}, None]}
+    ingested = {"$and": [processed, {"$eq": [{"$ifNull": ["$error", None]}, None]}]}
+    pipeline = [
+        {"$group": {
+            "_id": None,
+            "documents": {"$sum": 1},
+            "processed": {"$sum": {"$cond": [processed, 1, 0]}},
+            "errors": {"$sum": {"$cond": [failed, 1, 0]}},
+            "chunks": {"$sum": {"$ifNull": ["$chunk_count", 0]}},
+            "ingested": {"$sum": {"$cond": [ingested, 1, 0]}},
+            "ingested_chunks": {"$sum": {"$cond": [ingested, {"$ifNull": ["$chunk_count", 0]}, 0]}},
+            "ingested_tokens": {"$sum": {"$cond": [ingested, {"$ifNull": ["$token_count", 0]}, 0]}}
+        }}
+    ]
+    cursor = db.documents.aggregate(pipeline)
+    totals = await cursor.to_list(length=1)
+    counters = dict.fromkeys(COUNTERS, 0)
+    if totals:
+        counters.update({key: totals[0][key] for key in COUNTERS})
+    counters["recomputed_at"] = datetime.now()
+    await db.stats.replace_one({"_id": STATS_ID}, counters, upsert=True)
+
+    pipeline = [
+        {"$unwind": "$tags"},
+        {"$group": {"_id": "$tags", "count": {"$sum": 1}}}
+    ]
+    cursor = db.documents.aggregate(pipeline)
+    tags: List[Dict[str, Any]] = await cursor.to_list(length=None)
+    await db.tag_counts.delete_many({})
+    if tags:
+        await db.tag_counts.insert_many(tags, ordered=False)
+    return counters
+
+async def read_stats(db) -> Dict[str, Any]:
+    """Stored counters, computed first if there are none yet"""
+    counters = await db.stats.find_one({"_id": STATS_ID}, {"_id": 0})
+    if counters is None:
+        counters = await recompute_stats(db)
+    return counters
+
+async def top_tags(db, limit: int = 10) -> List[Dict[str, Any]]:
+    """Most used tags as {"_id": tag, "count": documents}"""
+    cursor = db.tag_counts.find({"count": {"$gt": 0}}).sort("count", -1).limit(limit)
+    return await cursor.to_list(length=limit)
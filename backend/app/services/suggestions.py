@@ -0,0 +1,194 @@
+import asyncio
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from pymongo import UpdateOne
+from app.utils.prefix_index import PrefixIndex, normalize
+from app.utils.symspell import SymSpell, count_words
+
+# Title word positions a suggestion can match from ("Intro to search"
+# matches "intro", "to" and "search")
+MAX_TITLE_WORDS = 8
+
+def title_keys(title: str) -> List[str]:
+    """Keys a title is found by: the title from each word on"""
+    words = title.split()
+    return [" ".join(words[index:]) for index in range(min(len(words), MAX_TITLE_WORDS))]
+
+class SuggestionIndex:
+    """
+    In-memory prefix indexes for /search/suggest
+
+    Past queries are ranked by how often they were searched, document
+    titles by how many documents have them. Built from the database at
+    startup, then kept current by the query recorder's flushes and by
+    ingestion; a periodic rebuild picks up changes made by other
+    processes.
+
+    Typos are corrected with a symmetric delete dictionary of the words
+    in the corpus (the vocabulary collection, counted at ingestion) and
+    in past queries.
+    """
+
+    def __init__(self, top_k: int = 40, max_distance: int = 2, min_word_count: int = 2):
+        self.top_k = top_k
+        self.max_distance = max_distance
+        self.min_word_count = min_word_count
+        self.queries = PrefixIndex(top_k)
+        self.titles = PrefixIndex(top_k)
+        self.spelling = self._new_spelling()
+        # Indexed title of each document
+        self._document_titles: Dict[str, str] = {}
+        self.ready = False
+        self.built_at: Optional[float] = None
+        self.build_seconds = 0.0
+
+    async def build(self, db) -> None:
+        """Load query history, document titles and vocabulary"""
+        started = time.time()
+        queries = PrefixIndex(self.top_k)
+        entries = []
+        words: Counter = Counter()
+        async for record in db.search_queries.find({}, {"_id": 0, "query": 1, "count": 1}):
+            count = record.get("count", 1)
+            entries.append((record["query"], record["query"], count))
+            for word, occurrences in count_words(record["query"]).items():
+                words[word] += occurrences * count
+        queries.load(entries)
+
+        titles = PrefixIndex(self.top_k)
+        document_titles = {}
+        entries = []
+        async for document in db.documents.find({"processed": True}, {"_id": 0, "id": 1, "title": 1}):
+            if not document.get("title"):
+                continue
+            document_titles[document["id"]] = document["title"]
+            entries.extend((key, document["title"], 1) for key in title_keys(document["title"]))
+        titles.load(entries)
+
+        # Rare words are left out (mostly typos and extraction noise);
+        # their new occurrences are counted from zero until the next build
+        async for record in db.vocabulary.find({"count": {"$gte": self.min_word_count}}, {"_id": 0, "word": 1, "count": 1}):
+            words[record["word"]] += record["count"]
+        # Generating the deletes of every word takes seconds
+        spelling = self._new_spelling()
+        await asyncio.to_thread(spelling.update, words)
+
+        self.queries, self.titles, self._document_titles = queries, titles, document_titles
+        self.spelling = spelling
+        self.ready = True
+        self.built_at = time.time()
+        self.build_seconds = self.built_at - started
+        print(f"Built suggestion index: {len(queries)} queries, {len(document_titles)} titles, "
+              f"{spelling.words} words in {self.build_seconds:.1f}s")
+
+    def add_queries(self, counts: Dict[str, int]) -> None:
+        """Count recorded queries"""
+        # Before the first build, the build picks them up from the database
+        if not self.ready:
+            return
+        for query, count in counts.items():
+            self.queries.add(query, query, count)
+            for word, occurrences in count_words(query).items():
+                self.spelling.add(word, occurrences * count)
+
+    def add_words(self, counts: Dict[str, int]) -> None:
+        """Count words of newly indexed content"""
+        if not self.ready:
+            return
+        self.spelling.update(counts)
+
+    def set_title(self, document_id: str, title: Optional[str]) -> None:
+        """Index a document's current title, replacing the one indexed before"""
+        if not self.ready:
+            return
+        previous = self._document_titles.get(document_id)
+        if previous == title:
+            return
+        if previous:
+            for key in title_keys(previous):
+                self.titles.add(key, previous, -1)
+            del self._document_titles[document_id]
+        if title:
+            for key in title_keys(title):
+                self.titles.add(key, title, 1)
+            self._document_titles[document_id] = title
+
+    def remove_document(self, document_id: str) -> None:
+        self.set_title(document_id, None)
+
+    def clear(self) -> None:
+        self.queries = PrefixIndex(self.top_k)
+        self.titles = PrefixIndex(self.top_k)
+        self._document_titles = {}
+        self.spelling = self._new_spelling()
+
+    def suggest(self, prefix: str, limit: int) -> List[str]:
+        """
+        Past queries starting with prefix, then titles with a word starting
+        with it; if there are none, the same for the prefix with its typos
+        corrected
+        """
+        suggestions = self._complete(prefix, limit)
+        if not suggestions:
+            prefix = normalize(prefix)
+            corrected = self.spelling.correct(prefix)
+            if corrected != prefix:
+                suggestions = self._complete(corrected, limit)
+        return suggestions
+
+    def correct(self, query: str) -> Optional[str]:
+        """The query with misspelled words corrected, or None if none are"""
+        if not self.ready:
+            return None
+        corrected = self.spelling.correct(query)
+        return corrected if corrected != query else None
+
+    def _complete(self, prefix: str, limit: int) -> List[str]:
+        suggestions = self.queries.search(prefix, limit)
+        if len(suggestions) < limit:
+            # A title can match at several words, so ask for extra
+            for title in self.titles.search(prefix, 2 * limit):
+                if title not in suggestions:
+                    suggestions.append(title)
+                    if len(suggestions) >= limit:
+                        break
+        return suggestions
+
+    def _new_spelling(self) -> SymSpell:
+        return SymSpell(max_distance=self.max_distance, min_count=self.min_word_count)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "queries": len(self.queries),
+            "titles": len(self._document_titles),
+            "title_keys": len(self.titles),
+            "words": self.spelling.words,
+            "built_at": self.built_at,
+            "build_seconds": round(self.build_seconds, 3)
+        }
+
+async def record_vocabulary(db, counts: Dict[str, int]) -> None:
+    """Add word counts of newly indexed content to the vocabulary collection"""
+    if not counts:
+        return
+    try:
+        await db.vocabulary.bulk_write(
+            [UpdateOne({"word": word}, {"$inc": {"count": count}}, upsert=True) for word, count in counts.items()],
+            ordered=False
+        )
+    except Exception as e:
+        # Only costs corrections until the words are seen again
+        print(f"Error recording vocabulary: {e}")
+
+async def run_suggestion_index(index: SuggestionIndex, db, rebuild_interval: float) -> None:
+    """Build the suggestion index, then rebuild it periodically until cancelled"""
+    while True:
+        try:
+            await index.build(db)
+        except Exception as e:
+            print(f"Error building suggestion index: {e}")
+        if rebuild_interval <= 0 and index.ready:
+            return
+        await asyncio.sleep(rebuild_interval if rebuild_interval > 0 else 60)
@@ -0,0 +1,293 @@
+import json
+import mmap
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+COMPRESSION_MODES = ("none", "zstd")
+
+# Block flag: payload is zstd-compressed
+ZSTD = 1
+
+# Index entry per FAISS ID: where its block is in the data file, and where
+# the record is inside the (decompressed) block. block == -1 means no record.
+ENTRY = np.dtype([
+    ("block", "<i8"),
+    ("block_size", "<u4"),
+    ("start", "<u4"),
+    ("length", "<u4"),
+    ("flags", "<u1")
+])
+
+# Decompressed blocks kept for lookups that hit the same block
+DECOMPRESSED_BLOCKS = 64
+
+# Compaction only pays off once this much of the data file is garbage
+COMPACT_MIN_BYTES = 16 * 1024 * 1024
+
+def empty_entries(size: int) -> np.ndarray:
+    entries = np.zeros(size, dtype=ENTRY)
+    entries["block"] = -1
+    return entries
+
+def encode_record(record: Dict[str, Any]) -> bytes:
+    return json.dumps(record, default=lambda value: value.isoformat(), separators=(",", ":")).encode("utf-8")
+
+def decode_record(data: bytes) -> Dict[str, Any]:
+    record = json.loads(data)
+    document = record.get("document") or {}
+    if isinstance(document.get("created_at"), str):
+        document["created_at"] = datetime.fromisoformat(document["created_at"])
+    return record
+
+class ChunkTextStore:
+    """
+    Chunk text and document fields in a local file, keyed by FAISS ID
+
+    Lets search hydrate its results without a database round trip. Records
+    are appended in blocks (optionally zstd-compressed per block) to a data
+    file that is memory-mapped for reading; an index array holds the
+    location of each FAISS ID's record, so a lookup is two array reads and
+    a slice. Replaced and deleted records stay in the data file until
+    compaction rewrites it as a new generation. The index is saved with
+    the vector store, so both describe the same set of chunks.
+    """
+
+    def __init__(self, directory: str = "data", compression: str = "none", block_size: int = 64 * 1024):
+        """
+        Initialize chunk text store
+
+        Args:
+            directory: Directory of the data and index files
+            compression: "none" or "zstd" (needs the zstandard package)
+            block_size: Uncompressed bytes of records per block
+        """
+        self.directory = directory
+        self.compression = compression
+        self.block_size = block_size
+        self.index_path = os.path.join(directory, "chunk_text.idx.npz")
+        self.generation = 0
+        self.entries = empty_entries(0)
+        # Live records per block offset, to know when a block is garbage
+        self._block_records: Dict[int, int] = {}
+        self._block_sizes: Dict[int, int] = {}
+        self.garbage_bytes = 0
+        self._fd: Optional[int] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+        self._compressor = None
+        self._decompressor = None
+        if compression == "zstd":
+            try:
+                import zstandard
+                self._compressor = zstandard.ZstdCompressor(level=3)
+            except ImportError:
+                print("zstandard is not installed, storing chunk text uncompressed")
+                self.compression = "none"
+
+    def data_path(self, generation: Optional[int] = None) -> str:
+        generation = self.generation if generation is None else generation
+        return os.path.join(self.directory, f"chunk_text.{generation}.dat")
+
+    def load(self) -> None:
+        """Load the saved index, or start empty if there is none"""
+        self._close()
+        try:
+            with np.load(self.index_path) as saved:
+                self.entries = saved["entries"].copy()
+                self.generation = int(saved["generation"])
+        except (OSError, KeyError, ValueError) as e:
+            if os.path.exists(self.index_path):
+                print(f"Error loading chunk text index: {e}")
+            self.reset()
+            return
+        self._open()
+        self._count_blocks()
+        print(f"Loaded chunk text store with {len(self)} records")
+
+    def reset(self) -> None:
+        """Drop all records, starting a new empty generation"""
+        self.generation += 1
+        self._open(truncate=True)
+        self.entries = empty_entries(0)
+        self._count_blocks()
+
+    def save(self) -> None:
+        """Persist the index, compacting the data file first if it is mostly garbage"""
+        if self.garbage_bytes > max(COMPACT_MIN_BYTES, self._file_size() - self.garbage_bytes):
+            self.compact()
+        tmp_path = f"{self.index_path}.tmp.npz"
+        np.savez(tmp_path, entries=self.entries, generation=np.int64(self.generation))
+        os.replace(tmp_path, self.index_path)
+        self._remove_old_generations()
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.entries["block"] >= 0))
+
+    def put(self, records: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """
+        Add or replace records
+
+        Args:
+            records: (FAISS ID, record) pairs
+        """
+        if not records:
+            return
+        self._grow(max(faiss_id for faiss_id, _ in records) + 1)
+        self._append_records((faiss_id, encode_record(record)) for faiss_id, record in records)
+
+    def delete(self, faiss_ids: Iterable[int]) -> None:
+        """Remove records; their bytes are reclaimed by compaction"""
+        for faiss_id in faiss_ids:
+            if faiss_id < len(self.entries):
+                self._release(faiss_id)
+                self.entries["block"][faiss_id] = -1
+
+    def get(self, faiss_id: int) -> Optional[Dict[str, Any]]:
+        """Get a record by FAISS ID"""
+        data = self._read(faiss_id)
+        return decode_record(data) if data is not None else None
+
+    def compact(self) -> None:
+        """Rewrite the live records into a new data file generation"""
+        live = np.flatnonzero(self.entries["block"] >= 0)
+        records = [(int(faiss_id), self._read(int(faiss_id))) for faiss_id in live]
+        self._close()
+        self.generation += 1
+        self.entries = empty_entries(len(self.entries))
+        self._open(truncate=True)
+        self._count_blocks()
+        self._append_records(records)
+        print(f"Compacted chunk text store to {len(records)} records ({self._file_size()} bytes)")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "records": len(self),
+            "generation": self.generation,
+            "compression": self.compression,
+            "file_bytes": self._file_size(),
+            "garbage_bytes": self.garbage_bytes
+        }
+
+    def _grow(self, size: int) -> None:
+        if size <= len(self.entries):
+            return
+        grown = empty_entries(max(size, 2 * len(self.entries)))
+        grown[:len(self.entries)] = self.entries
+        self.entries = grown
+
+    def _append_records(self, records: Iterable[Tuple[int, bytes]]) -> None:
+        """Append encoded records in blocks of about block_size bytes"""
+        block: List[Tuple[int, bytes]] = []
+        block_length = 0
+        for faiss_id, data in records:
+            block.append((faiss_id, data))
+            block_length += len(data)
+            if block_length >= self.block_size:
+                self._append_block(block)
+                block, block_length = [], 0
+        if block:
+            self._append_block(block)
+
+    def _append_block(self, records: List[Tuple[int, bytes]]) -> None:
+        payload = b"".join(data for _, data in records)
+        flags = 0
+        if self._compressor is not None:
+            payload = self._compressor.compress(payload)
+            flags = ZSTD
+
+        # O_APPEND: blocks from concurrent writers never overlap
+        os.write(self._fd, payload)
+        offset = os.lseek(self._fd, 0, os.SEEK_CUR) - len(payload)
+
+        self._block_records[offset] = len(records)
+        self._block_sizes[offset] = len(payload)
+        start = 0
+        for faiss_id, data in records:
+            self._release(faiss_id)
+            self.entries[faiss_id] = (offset, len(payload), start, len(data), flags)
+            start += len(data)
+
+    def _release(self, faiss_id: int) -> None:
+        """Account for a record's block losing it"""
+        offset = int(self.entries[faiss_id]["block"])
+        if offset < 0:
+            return
+        self._block_records[offset] -= 1
+        if self._block_records[offset] == 0:
+            del self._block_records[offset]
+            self.garbage_bytes += self._block_sizes.pop(offset)
+
+    def _count_blocks(self) -> None:
+        live = self.entries[self.entries["block"] >= 0]
+        offsets, counts = np.unique(live["block"], return_counts=True)
+        self._block_records = {int(offset): int(count) for offset, count in zip(offsets, counts)}
+        sizes = dict(zip(live["block"].tolist(), live["block_size"].tolist()))
+        self._block_sizes = {int(offset): int(size) for offset, size in sizes.items()}
+        self.garbage_bytes = max(0, self._file_size() - sum(self._block_sizes.values()))
+
+    def _read(self, faiss_id: int) -> Optional[bytes]:
+        if faiss_id < 0 or faiss_id >= len(self.entries):
+            return None
+        offset, size, start, length, flags = self.entries[faiss_id].tolist()
+        if offset < 0:
+            return None
+        if flags & ZSTD:
+            block = self._blocks.get(offset)
+            if block is None:
+                block = self._decompress(self._map(offset + size)[offset:offset + size])
+                self._blocks[offset] = block
+                if len(self._blocks) > DECOMPRESSED_BLOCKS:
+                    self._blocks.popitem(last=False)
+            else:
+                self._blocks.move_to_end(offset)
+            return block[start:start + length]
+        begin = offset + start
+        return self._map(begin + length)[begin:begin + length]
+
+    def _map(self, end: int) -> mmap.mmap:
+        """Memory map of the data file covering bytes up to end"""
+        if self._mmap is None or len(self._mmap) < end:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._fd, 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def _decompress(self, data: bytes) -> bytes:
+        if self._decompressor is None:
+            import zstandard
+            self._decompressor = zstandard.ZstdDecompressor()
+        return self._decompressor.decompress(data)
+
+    def _file_size(self) -> int:
+        return os.fstat(self._fd).st_size if self._fd is not None else 0
+
+    def _open(self, truncate: bool = False) -> None:
+        """
+        Open the current generation's data file. Reads and appends go
+        through this descriptor, so a compaction by another process cannot
+        swap the file under this process's index.
+        """
+        self._close()
+        os.makedirs(self.directory, exist_ok=True)
+        flags = os.O_RDWR | os.O_APPEND | os.O_CREAT | (os.O_TRUNC if truncate else 0)
+        self._fd = os.open(self.data_path(), flags)
+
+    def _close(self) -> None:
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._blocks.clear()
+
+    def _remove_old_generations(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.startswith("chunk_text.") and name.endswith(".dat") and name != os.path.basename(self.data_path()):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
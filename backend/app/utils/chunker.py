@@ -0,0 +1,331 @@
+import os
+import re
+import bisect
+import hashlib
+import functools
+from typing import List, Optional, Tuple, Iterator
+from app.models.document import DocumentChunk
+from app.utils.language import detect_language
+
+# Punkt models are bundled here (see the Dockerfile) and loaded on first
+# use; nothing is downloaded at runtime
+NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", "nltk_data")
+
+# Punkt models are named by language, detect_language returns ISO 639-1 codes
+PUNKT_LANGUAGES = {
+    "cs": "czech",
+    "da": "danish",
+    "de": "german",
+    "el": "greek",
+    "en": "english",
+    "es": "spanish",
+    "et": "estonian",
+    "fi": "finnish",
+    "fr": "french",
+    "it": "italian",
+    "nl": "dutch",
+    "no": "norwegian",
+    "pl": "polish",
+    "pt": "portuguese",
+    "ru": "russian",
+    "sl": "slovene",
+    "sv": "swedish",
+    "tr": "turkish",
+}
+
+# Used when no Punkt model is available: a run of text up to and
+# including its terminal punctuation (or the end of the text)
+_FALLBACK_SENTENCE_RE = re.compile(r'[^.!?\s][^.!?]*(?:[.!?]+|$)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# Separator placed between two pieces of fed text (e.g. two PDF pages),
+# matching how extract_pdf_text joins pages
+PIECE_SEPARATOR = "\n\n"
+
+@functools.lru_cache(maxsize=None)
+def _sentence_tokenizer(language: str):
+    """Load the Punkt tokenizer for a language once, or None if unavailable"""
+    import nltk
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    
+    name = PUNKT_LANGUAGES.get(language, "english")
+    try:
+        if hasattr(nltk.tokenize, "PunktTokenizer"):
+            # NLTK >= 3.8.2 ships Punkt as plain-text tables
+            return nltk.tokenize.PunktTokenizer(name)
+        return nltk.data.load(f"tokenizers/punkt/{name}.pickle")
+    except LookupError:
+        print(f"Punkt model for {name} not found in {NLTK_DATA_DIR}, using regex sentence splitting")
+        return None
+
+@functools.lru_cache(maxsize=4)
+def load_tokenizer(name_or_path: str):
+    """
+    Load a (fast) Hugging Face tokenizer, once per process
+
+    Chunkers refer to tokenizers by name so that they stay cheap to pickle
+    between extraction pool calls.
+    """
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(name_or_path)
+    if not tokenizer.is_fast:
+        raise ValueError(f"Token-aware chunking needs a fast tokenizer, got {type(tokenizer).__name__}")
+    return tokenizer
+
+def sentence_spans(text: str, language: str = "en") -> List[Tuple[int, int]]:
+    """
+    Find sentence boundaries in a text
+
+    Args:
+        text: Text to split
+        language: ISO 639-1 language code
+
+    Returns:
+        List of (start, end) offsets into text, without surrounding whitespace
+    """
+    tokenizer = _sentence_tokenizer(language)
+    if tokenizer is not None:
+        try:
+            return list(tokenizer.span_tokenize(text))
+        except Exception:
+            pass
+
+    spans = []
+    for match in _FALLBACK_SENTENCE_RE.finditer(text):
+        start = match.start()
+        end = start + len(match.group().rstrip())
+        spans.append((start, end))
+    return spans
+
+class StreamingChunker:
+    """
+    Incremental, offset-based sentence chunker
+
+    Text is fed one piece at a time (e.g. one PDF page) and chunks are
+    yielded as soon as they are complete. Sentences are tracked as offsets
+    into the concatenated text, so chunks and their overlaps are plain
+    slices and each character is scanned a bounded number of times. Only
+    the text of the chunk being built is buffered, which keeps the chunker
+    small enough to be pickled between extraction pool calls.
+
+    Offsets refer to the pieces joined with PIECE_SEPARATOR, i.e. to
+    ``document.content`` or to the text returned by extract_pdf_text.
+
+    When a tokenizer is given, chunk_size and chunk_overlap are measured in
+    tokens of that tokenizer instead of characters, and every chunk records
+    its token_count.
+    """
+
+    def __init__(
+        self,
+        document_id: str,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 200,
+        max_chunks: int = 0,
+        tokenizer_name: Optional[str] = None
+    ):
+        """
+        Initialize chunker
+
+        Args:
+            document_id: ID of the document
+            chunk_size: Maximum number of characters (or tokens) per chunk
+            chunk_overlap: Maximum number of characters (or tokens) to overlap
+                between chunks (the overlap starts on a word boundary, so it
+                may be shorter); capped at half the chunk size
+            max_chunks: Maximum number of chunks to produce (0 = unlimited)
+            tokenizer_name: Tokenizer to measure chunks with, in tokens
+        """
+        self.document_id = document_id
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_overlap = max(0, min(chunk_overlap, self.chunk_size // 2))
+        self.max_chunks = max_chunks
+        self.tokenizer_name = tokenizer_name
+        self.language = None
+        self.chunk_index = 0
+        self.truncated = False
+
+        # Text from _buffer_start up to _offset (the end of all fed text)
+        self._buffer = ""
+        self._buffer_start = 0
+        self._offset = 0
+        # Start offset and page number of each piece still in the buffer
+        self._page_offsets: List[int] = []
+        self._page_numbers: List[Optional[int]] = []
+        # Start offset of each token in the buffer (token mode only)
+        self._token_starts: List[int] = []
+
+        # Chunk being built, as offsets into the fed text
+        self._chunk_start = None
+        self._chunk_end = None
+        # End of the last emitted chunk; text after it is not yet indexed
+        self._emitted_end = 0
+
+    def feed(self, text: str, page_number: Optional[int] = None) -> Iterator[DocumentChunk]:
+        """
+        Add text to the chunker
+
+        Args:
+            text: Text to add
+            page_number: Page the text comes from, if known
+
+        Yields:
+            Chunks completed by this text
+        """
+        if self.truncated:
+            return
+
+        # Detect language once, from the beginning of the document
+        if self.language is None and text.strip():
+            self.language = detect_language(text)
+
+        # Drop text that no future chunk can start in
+        keep_from = self._chunk_start if self._chunk_start is not None else self._offset
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start:]
+            self._buffer_start = keep_from
+            while len(self._page_offsets) > 1 and self._page_offsets[1] <= keep_from:
+                del self._page_offsets[0]
+                del self._page_numbers[0]
+            del self._token_starts[:bisect.bisect_left(self._token_starts, keep_from)]
+
+        if self._page_offsets:
+            self._buffer += PIECE_SEPARATOR
+            self._offset += len(PIECE_SEPARATOR)
+        base = self._offset
+        self._buffer += text
+        self._offset += len(text)
+        self._page_offsets.append(base)
+        self._page_numbers.append(page_number)
+        if self.tokenizer_name:
+            encoding = load_tokenizer(self.tokenizer_name)(
+                text,
+                add_special_tokens=False,
+                return_offsets_mapping=True,
+                verbose=False
+            )
+            self._token_starts.extend(base + start for start, _ in encoding["offset_mapping"])
+
+        for start, end in sentence_spans(text, self.language or 'en'):
+            yield from self._add_sentence(base + start, base + end)
+            if self.truncated:
+                return
+
+    def flush(self) -> Iterator[DocumentChunk]:
+        """Yield the last, partially filled chunk"""
+        if self._chunk_start is not None and self._chunk_end > self._emitted_end and not self.truncated:
+            yield from self._emit(self._chunk_end)
+        self._chunk_start = None
+
+    def _add_sentence(self, start: int, end: int) -> Iterator[DocumentChunk]:
+        """Add the sentence spanning [start, end) to the chunk being built"""
+        if self._chunk_start is None:
+            self._chunk_start = start
+        elif self._length(self._chunk_start, end) > self.chunk_size and self._chunk_end > self._emitted_end:
+            # Sentence does not fit: close the chunk and start the next one
+            # with the tail of this one as overlap
+            previous_start = self._chunk_start
+            yield from self._emit(self._chunk_end)
+            self._chunk_start = self._overlap_start(previous_start, self._chunk_end, start, end)
+        self._chunk_end = end
+
+        # A single sentence longer than a chunk is split on word boundaries
+        while not self.truncated and self._length(self._chunk_start, self._chunk_end) > self.chunk_size:
+            previous_start = self._chunk_start
+            split = self._split_point(self._after(self._chunk_start, self.chunk_size))
+            yield from self._emit(split)
+            self._chunk_start = self._overlap_start(previous_start, split, split, self._chunk_end)
+
+    def _length(self, start: int, end: int) -> int:
+        """Size of [start, end) in characters or tokens"""
+        if not self.tokenizer_name:
+            return end - start
+        return bisect.bisect_left(self._token_starts, end) - bisect.bisect_left(self._token_starts, start)
+
+    def _after(self, start: int, size: int) -> int:
+        """Offset at which a span starting at start reaches size"""
+        if not self.tokenizer_name:
+            return min(start + size, self._offset)
+        index = bisect.bisect_left(self._token_starts, start) + size
+        return self._token_starts[index] if index < len(self._token_starts) else self._offset
+
+    def _before(self, end: int, size: int) -> int:
+        """Offset at which a span ending at end reaches size"""
+        if not self.tokenizer_name:
+            return end - size
+        index = bisect.bisect_left(self._token_starts, end) - size
+        return self._token_starts[index] if index >= 0 else self._buffer_start
+
+    def _overlap_start(self, previous_start: int, previous_end: int, next_start: int, next_end: int) -> int:
+        """
+        Find where the next chunk starts
+
+        The overlap is at most chunk_overlap characters (or tokens) of the
+        previous chunk, shortened so that the next chunk fits its first
+        sentence, and always starts on a word boundary after previous_start.
+        """
+        start = max(
+            self._before(previous_end, self.chunk_overlap),
+            self._before(next_end, self.chunk_size),
+            previous_start + 1
+        )
+        if start >= next_start:
+            return next_start
+
+        # Move forward to the beginning of the next word
+        if not self._buffer[start - self._buffer_start - 1].isspace():
+            match = _WHITESPACE_RE.search(self._buffer, start - self._buffer_start, next_start - self._buffer_start)
+            if not match:
+                return next_start
+            start = self._buffer_start + match.end()
+        return min(start, next_start)
+
+    def _split_point(self, limit: int) -> int:
+        """Find the last word boundary before limit, in the second half of the chunk"""
+        lower = self._after(self._chunk_start, max(1, self.chunk_size // 2))
+        index = self._buffer.rfind(" ", lower - self._buffer_start, limit - self._buffer_start)
+        if index == -1:
+            return limit
+        return self._buffer_start + index
+
+    def _page_at(self, offset: int) -> Optional[int]:
+        """Get the page number of the piece containing offset"""
+        index = bisect.bisect_right(self._page_offsets, offset) - 1
+        return self._page_numbers[max(index, 0)]
+
+    def _emit(self, end: int) -> Iterator[DocumentChunk]:
+        """Yield the chunk [_chunk_start, end), honouring max_chunks"""
+        if self.max_chunks and self.chunk_index >= self.max_chunks:
+            self.truncated = True
+            return
+
+        start = self._chunk_start
+        content = self._buffer[start - self._buffer_start:end - self._buffer_start]
+
+        # Keep offsets pointing at the first and last non-space characters
+        stripped = content.lstrip()
+        start += len(content) - len(stripped)
+        content = stripped.rstrip()
+        end = start + len(content)
+        self._emitted_end = end
+
+        if not content:
+            return
+
+        metadata = {}
+        page_number = self._page_at(start)
+        if page_number is not None:
+            metadata["page_number"] = page_number
+
+        yield DocumentChunk(
+            document_id=self.document_id,
+            content=content,
+            metadata=metadata,
+            chunk_index=self.chunk_index,
+            start_offset=start,
+            end_offset=end,
+            token_count=self._length(start, end) if self.tokenizer_name else None,
+            content_hash=hashlib.sha256(content.encode("utf-8")).hexdigest()
+        )
+        self.chunk_index += 1
@@ -0,0 +1,386 @@
+import asyncio
+import time
+import uuid
+import zlib
+import xml.etree.ElementTree as ElementTree
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+from app.utils.http_fetcher import HttpFetcher, FetchError, conditional_headers
+from app.utils.html_extractor import parse_html_page
+
+# Query parameters that never change page content
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+# Content types the crawler hands to ingestion
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+DOCUMENT_TYPES = ("application/pdf",)
+
+# Nested sitemap indexes are followed this deep
+_MAX_SITEMAP_DEPTH = 2
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Normalize a URL for deduplication
+
+    Resolves it against base, lowercases scheme and host, drops default
+    ports, fragments and tracking parameters, and sorts the query string.
+
+    Returns:
+        Normalized URL, or None for non-HTTP(S) links
+    """
+    if base:
+        url = urljoin(base, url.strip())
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return None
+
+    scheme = parts.scheme.lower()
+    if scheme not in ("http", "https") or not parts.hostname:
+        return None
+
+    host = parts.hostname.lower()
+    if parts.port and not ((scheme == "http" and parts.port == 80) or (scheme == "https" and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+def gunzip(data: bytes, max_bytes: int) -> bytes:
+    """
+    Decompress gzip data, stopping as soon as the output exceeds max_bytes
+
+    Raises:
+        ValueError: If the data is not gzip or decompresses past max_bytes
+    """
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        output = decompressor.decompress(data, max_bytes + 1)
+    except zlib.error as e:
+        raise ValueError(f"Invalid gzip data: {e}")
+    if len(output) > max_bytes:
+        raise ValueError(f"Decompressed data exceeds {max_bytes} bytes")
+    return output
+
+class CrawledPage:
+    """A page fetched by the crawler, ready for ingestion"""
+
+    def __init__(
+        self,
+        url: str,
+        depth: int,
+        content_type: str,
+        title: Optional[str] = None,
+        text: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.url = url
+        self.depth = depth
+        self.content_type = content_type
+        self.title = title
+        self.text = text
+        self.etag = etag
+        self.last_modified = last_modified
+        self.metadata = metadata or {}
+
+class CrawlStats:
+    """Live counters for a crawl"""
+
+    def __init__(self):
+        self.status = "pending"
+        self.started_at = None
+        self.finished_at = None
+        self.pages_fetched = 0
+        self.pages_ingested = 0
+        self.pages_failed = 0
+        self.pages_skipped = 0
+        self.pages_unchanged = 0
+        self.queue_depth = 0
+        self.in_flight = 0
+        self.error = None
+
+    @property
+    def pages_per_second(self) -> float:
+        """Fetch throughput since the crawl started"""
+        if not self.started_at:
+            return 0.0
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return self.pages_fetched / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "pages_fetched": self.pages_fetched,
+            "pages_ingested": self.pages_ingested,
+            "pages_failed": self.pages_failed,
+            "pages_skipped": self.pages_skipped,
+            "pages_unchanged": self.pages_unchanged,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "pages_per_second": round(self.pages_per_second, 3),
+            "elapsed": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else 0.0,
+            "error": self.error
+        }
+
+class SiteCrawler:
+    """
+    Breadth-first, concurrent crawler for a single site
+
+    Starts from a seed URL and any URLs listed in the site's sitemaps,
+    follows same-host links up to max_depth, obeys robots.txt and waits
+    at least the politeness delay (or the site's Crawl-delay) between two
+    requests to the same host. Every indexable page is passed to on_page;
+    if on_page raises, the page counts as failed instead of ingested.
+
+    For re-crawls, known_pages seeds the frontier with previously crawled
+    URLs and their HTTP validators; those are fetched conditionally and a
+    304 response is counted as unchanged without calling on_page. Known
+    URLs are seeded because an unchanged page's links are not re-read.
+    """
+
+    def __init__(
+        self,
+        seed_url: str,
+        fetcher: HttpFetcher,
+        on_page: Callable[[CrawledPage], Awaitable[None]],
+        parse_page: Optional[Callable[[str], Awaitable[Dict[str, Any]]]] = None,
+        concurrency: int = 4,
+        max_depth: int = 3,
+        max_pages: int = 500,
+        politeness_delay: float = 1.0,
+        respect_robots: bool = True,
+        use_sitemaps: bool = True,
+        known_pages: Optional[Dict[str, Dict[str, Any]]] = None
+    ):
+        """
+        Initialize crawler
+
+        Args:
+            seed_url: URL to start from
+            fetcher: Shared HTTP fetcher
+            on_page: Coroutine called with every crawled page
+            parse_page: Coroutine turning HTML into parse_html_page()'s
+                result, e.g. by running it in the extraction pool
+                (parses inline if not provided)
+            concurrency: Number of concurrent fetches
+            max_depth: Maximum number of links followed from the seed
+            max_pages: Maximum number of pages to fetch
+            politeness_delay: Minimum seconds between requests to one host
+            respect_robots: Whether to obey robots.txt
+            use_sitemaps: Whether to seed the frontier from sitemaps
+            known_pages: Previously crawled pages by normalized URL, as
+                dicts with optional "etag", "last_modified" and "depth"
+        """
+        self.id = str(uuid.uuid4())
+        self.seed_url = normalize_url(seed_url)
+        if self.seed_url is None:
+            raise ValueError(f"Invalid seed URL: {seed_url}")
+        self.host = urlsplit(self.seed_url).netloc
+        self.fetcher = fetcher
+        self.on_page = on_page
+        self.parse_page = parse_page
+        self.concurrency = max(1, concurrency)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.politeness_delay = politeness_delay
+        self.respect_robots = respect_robots
+        self.use_sitemaps = use_sitemaps
+        self.known_pages = known_pages or {}
+        self.stats = CrawlStats()
+
+        self._frontier: "asyncio.Queue[Tuple[str, int]]" = asyncio.Queue()
+        self._seen: Set[str] = set()
+        self._robots: Optional[RobotFileParser] = None
+        self._host_lock = asyncio.Lock()
+        self._next_request_at = 0.0
+
+    def _enqueue(self, url: Optional[str], depth: int) -> None:
+        """Add a URL to the frontier unless it was seen or is off-site"""
+        if url is None or url in self._seen or len(self._seen) >= self.max_pages:
+            return
+        if urlsplit(url).netloc != self.host:
+            return
+        if self._robots is not None and not self._robots.can_fetch(self.fetcher.user_agent, url):
+            self.stats.pages_skipped += 1
+            return
+        self._seen.add(url)
+        self._frontier.put_nowait((url, depth))
+        self.stats.queue_depth = self._frontier.qsize()
+
+    async def _polite_fetch(self, url: str, headers: Optional[Dict[str, str]] = None):
+        """Fetch a URL, spacing requests to the host by the politeness delay"""
+        async with self._host_lock:
+            wait = self._next_request_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._next_request_at = time.monotonic() + self.politeness_delay
+        return await self.fetcher.fetch(url, headers=headers)
+
+    async def _load_robots(self) -> List[str]:
+        """Fetch robots.txt; returns the sitemap URLs it lists"""
+        robots_url = urljoin(self.seed_url, "/robots.txt")
+        parser = RobotFileParser(robots_url)
+        try:
+            result = await self._polite_fetch(robots_url)
+            try:
+                parser.parse(result.text().splitlines())
+            finally:
+                result.close()
+        except FetchError:
+            # No robots.txt means everything is allowed
+            parser.parse([])
+
+        self._robots = parser
+        delay = parser.crawl_delay(self.fetcher.user_agent)
+        if delay:
+            self.politeness_delay = max(self.politeness_delay, float(delay))
+        return list(parser.site_maps() or [])
+
+    async def _load_sitemap(self, url: str, depth: int = 0) -> None:
+        """Add the URLs of a sitemap (or sitemap index) to the frontier"""
+        try:
+            result = await self._polite_fetch(url)
+            try:
+                data = result.read()
+            finally:
+                result.close()
+        except FetchError:
+            return
+
+        if data[:2] == b"\x1f\x8b":
+            # .xml.gz files are not decoded by the fetcher, so their size
+            # is capped here
+            try:
+                data = gunzip(data, self.fetcher.max_bytes)
+            except ValueError as e:
+                print(f"Error loading sitemap {url}: {e}")
+                return
+        try:
+            root = ElementTree.fromstring(data)
+        except ElementTree.ParseError:
+            return
+
+        # Tags are namespaced, so match on the local name
+        is_index = root.tag.endswith("sitemapindex")
+        for element in root.iter():
+            if not element.tag.endswith("loc") or not element.text:
+                continue
+            location = normalize_url(element.text)
+            if is_index:
+                if depth < _MAX_SITEMAP_DEPTH and location:
+                    await self._load_sitemap(location, depth + 1)
+            else:
+                self._enqueue(location, 1)
+
+    async def _process(self, url: str, depth: int) -> None:
+        """Fetch one URL, hand it to on_page and enqueue its links"""
+        known = self.known_pages.get(url, {})
+        try:
+            result = await self._polite_fetch(
+                url,
+                headers=conditional_headers(known.get("etag"), known.get("last_modified"))
+            )
+        except FetchError as e:
+            print(f"Error crawling {url}: {e}")
+            self.stats.pages_failed += 1
+            return
+
+        try:
+            self.stats.pages_fetched += 1
+            if result.not_modified:
+                self.stats.pages_unchanged += 1
+                return
+
+            content_type = result.content_type
+            etag = result.headers.get("etag")
+            last_modified = result.headers.get("last-modified")
+
+            if content_type in DOCUMENT_TYPES:
+                # Binary documents are fetched again by the ingestion task
+                await self.on_page(CrawledPage(url, depth, content_type, etag=etag, last_modified=last_modified))
+                self.stats.pages_ingested += 1
+                return
+
+            if content_type not in HTML_TYPES:
+                self.stats.pages_skipped += 1
+                return
+
+            html = result.text()
+        finally:
+            result.close()
+
+        page = await self.parse_page(html) if self.parse_page else parse_html_page(html)
+
+        # Redirects may land on another URL; links resolve against it
+        base = normalize_url(result.url) or url
+        if depth < self.max_depth:
+            for link in page["links"]:
+                self._enqueue(normalize_url(link, base), depth + 1)
+
+        if page["noindex"] or not page["text"]:
+            self.stats.pages_skipped += 1
+            return
+
+        await self.on_page(CrawledPage(
+            url, depth, content_type, page["title"], page["text"], etag, last_modified, page["metadata"]
+        ))
+        self.stats.pages_ingested += 1
+
+    async def _worker(self) -> None:
+        """Take URLs from the frontier until the crawl is cancelled"""
+        while True:
+            url, depth = await self._frontier.get()
+            self.stats.queue_depth = self._frontier.qsize()
+            self.stats.in_flight += 1
+            try:
+                await self._process(url, depth)
+            except Exception as e:
+                print(f"Error processing {url}: {e}")
+                self.stats.pages_failed += 1
+            finally:
+                self.stats.in_flight -= 1
+                self._frontier.task_done()
+
+    async def run(self) -> CrawlStats:
+        """Crawl the site and return the final stats"""
+        self.stats.status = "running"
+        self.stats.started_at = time.time()
+        try:
+            sitemaps = []
+            if self.respect_robots:
+                sitemaps = await self._load_robots()
+
+            self._enqueue(self.seed_url, 0)
+            for known_url, known in self.known_pages.items():
+                self._enqueue(known_url, known.get("depth") or 0)
+
+            if self.use_sitemaps and self.max_depth > 0:
+                for sitemap_url in sitemaps or [urljoin(self.seed_url, "/sitemap.xml")]:
+                    await self._load_sitemap(sitemap_url)
+
+            workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+            try:
+                await self._frontier.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+            self.stats.status = "completed"
+        except Exception as e:
+            print(f"Error crawling {self.seed_url}: {e}")
+            self.stats.status = "failed"
+            self.stats.error = str(e)
+        finally:
+            self.stats.finished_at = time.time()
+            self.stats.queue_depth = self._frontier.qsize()
+
+        return self.stats
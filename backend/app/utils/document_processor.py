@@ -1,25 +1,101 @@
 import os
 import re
-import PyPDF2
-from bs4 import BeautifulSoup
-import requests
-from typing import List, Dict, Any, Optional, Tuple
+import hashlib
+import tempfile
+from typing import List, Dict, Any, Optional, Tuple, Iterator, AsyncIterator
 import uuid
 from datetime import datetime
-import nltk
-from nltk.tokenize import sent_tokenize
 import asyncio
 from app.models.document import Document, DocumentChunk
 from app.models.settings import Settings
-from langdetect import detect
+from app.utils.process_pool import ExtractionPool
+from app.utils.chunker import StreamingChunker
+from app.utils.http_fetcher import HttpFetcher, FetchResult, conditional_headers
+from app.utils.html_extractor import parse_html_page, parse_html_file
+from app.utils.ocr import OcrEngine, extract_pdf_page_images
+from app.utils.pdf_reader import open_pdf, close_pdf
 from pathlib import Path
 from tqdm import tqdm
 
-# Download NLTK resources
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+class NotModified(Exception):
+    """Raised when a URL document's server answers a conditional GET with 304"""
+
+class ContentUnchanged(Exception):
+    """Raised when a document's extracted text hashes to its stored content_hash"""
+
+def content_hash(text: str) -> str:
+    """Hash extracted text to detect unchanged content"""
+    return hashlib.sha256(text.encode('utf-8', errors='surrogatepass')).hexdigest()
+
+# Extraction and chunking are CPU-bound, so they live in module-level
+# functions that can be shipped to an ExtractionPool worker process.
+
+def pdf_page_count(file_path: str) -> int:
+    """Get the number of pages in a PDF file"""
+    return len(open_pdf(file_path).pages)
+
+def iter_pdf_pages(file_path: str, start_page: int = 0, end_page: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Lazily extract text from PDF pages
+    
+    Args:
+        file_path: Path to PDF file
+        start_page: Index of the first page to extract
+        end_page: Index after the last page to extract (defaults to the last page)
+        
+    Yields:
+        Tuples of (1-based page number, page text)
+    """
+    reader = open_pdf(file_path)
+    if end_page is None:
+        end_page = len(reader.pages)
+    for page_num in range(start_page, end_page):
+        yield page_num + 1, reader.pages[page_num].extract_text() or ""
+
+def extract_pdf_pages(file_path: str, start_page: int, end_page: int) -> List[Tuple[int, str]]:
+    """
+    Extract a bounded batch of PDF pages
+    
+    The batches of one file share this process's reader, which is dropped
+    after the last page.
+    """
+    pages = list(iter_pdf_pages(file_path, start_page, end_page))
+    if end_page >= len(open_pdf(file_path).pages):
+        close_pdf(file_path)
+    return pages
+
+def extract_pdf_text(file_path: str) -> str:
+    """Extract text from PDF file"""
+    try:
+        return "\n\n".join(text for _, text in iter_pdf_pages(file_path))
+    finally:
+        close_pdf(file_path)
+
+def chunk_pages(
+    chunker: "StreamingChunker",
+    pages: List[Tuple[Optional[int], str]],
+    final: bool = False
+) -> Tuple[List[DocumentChunk], "StreamingChunker"]:
+    """
+    Feed a batch of pages to a chunker
+    
+    The chunker is returned alongside the chunks because a worker process
+    only mutates its own copy of it.
+    
+    Args:
+        chunker: Chunker holding the state of the previous batches
+        pages: List of (page number, text) tuples
+        final: Whether this is the last batch of the document
+        
+    Returns:
+        Tuple of (finished chunks, updated chunker)
+    """
+    chunks = []
+    for page_number, text in pages:
+        chunks.extend(chunker.feed(text, page_number))
+    if final:
+        chunks.extend(chunker.flush())
+    return chunks, chunker
 
 class DocumentProcessor:
     """
@@ -30,20 +106,40 @@ class DocumentProcessor:
         self,
         chunk_size: int = 1000,
         chunk_overlap: int = 200,
-        max_chunks_per_doc: int = 100
+        max_chunks_per_doc: int = 0,
+        pool: Optional[ExtractionPool] = None,
+        tokenizer_name: Optional[str] = None,
+        fetcher: Optional[HttpFetcher] = None,
+        ocr: Optional[OcrEngine] = None
     ):
         """
         Initialize document processor
         
         Args:
-            chunk_size: Maximum number of characters per chunk
-            chunk_overlap: Number of characters to overlap between chunks
-            max_chunks_per_doc: Maximum number of chunks per document
+            chunk_size: Maximum number of characters (or tokens) per chunk
+            chunk_overlap: Number of characters (or tokens) to overlap between chunks
+            max_chunks_per_doc: Maximum number of chunks per document (0 = unlimited)
+            pool: Process pool for CPU-bound work (runs inline if not provided)
+            tokenizer_name: Tokenizer to measure chunk_size and chunk_overlap
+                in tokens with (measured in characters if not provided)
+            fetcher: Shared HTTP fetcher for URL documents
+            ocr: OCR engine for scanned PDF pages and images (image-only
+                pages yield no text if not provided)
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.max_chunks_per_doc = max_chunks_per_doc
+        self.pool = pool
+        self.tokenizer_name = tokenizer_name
+        self.fetcher = fetcher
+        self.ocr = ocr
         self.settings = Settings()
+    
+    async def _run(self, func, *args):
+        """Run CPU-bound work in the extraction pool, off the event loop"""
+        if self.pool is None:
+            return func(*args)
+        return await self.pool.run(func, *args)
         
     async def process_document(self, document: Document) -> Tuple[Document, List[DocumentChunk]]:
         """
@@ -56,26 +152,14 @@ class DocumentProcessor:
             Tuple of (updated document, list of document chunks)
         """
         try:
-            content = None
+            chunks = []
+            async for batch in self.iter_chunks(document):
+                chunks.extend(batch)
             
-            # Extract content based on source
-            if document.content:
-                # Content is already provided
-                content = document.content
-            elif document.file_path:
-                # Extract from file
-                content = await self._extract_from_file(document.file_path, document.mime_type)
-            elif document.url:
-                # Extract from URL
-                content = await self._extract_from_url(document.url)
-            
-            if not content:
+            if not chunks:
                 document.error = "Could not extract content from document"
                 document.processed = True
                 return document, []
-                
-            # Split into chunks
-            chunks = await self._split_into_chunks(content, document.id)
             
             # Update document
             document.processed = True
@@ -89,6 +173,221 @@ class DocumentProcessor:
             document.updated_at = datetime.now()
             return document, []
     
+    async def iter_chunks(
+        self,
+        document: Document,
+        batch_size: int = 256,
+        refetch: bool = False
+    ) -> AsyncIterator[List[DocumentChunk]]:
+        """
+        Stream a document's chunks in bounded batches
+        
+        Pages are extracted and chunked a batch at a time, so memory use is
+        bounded by the batch sizes rather than by the document size. Sets
+        ``document.truncated`` if max_chunks_per_doc was reached, and
+        ``document.content_hash`` (plus HTTP validators for URLs).
+        
+        Args:
+            document: Document to process
+            batch_size: Maximum number of chunks per yielded batch
+            refetch: Fetch URL documents again even if their content is stored
+            
+        Yields:
+            Lists of document chunks
+            
+        Raises:
+            NotModified: If a refetched URL answered 304
+            ContentUnchanged: If the extracted text matches content_hash;
+                raised before any chunk is produced
+        """
+        chunker = StreamingChunker(
+            document_id=document.id,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            max_chunks=self.max_chunks_per_doc,
+            tokenizer_name=self.tokenizer_name
+        )
+        pending = []
+        
+        async for pages in self._iter_pages(document, refetch):
+            chunks, chunker = await self._run(chunk_pages, chunker, pages)
+            pending.extend(chunks)
+            while len(pending) >= batch_size:
+                yield pending[:batch_size]
+                pending = pending[batch_size:]
+        
+        chunks, chunker = await self._run(chunk_pages, chunker, [], True)
+        pending.extend(chunks)
+        while pending:
+            yield pending[:batch_size]
+            pending = pending[batch_size:]
+        
+        document.truncated = chunker.truncated
+    
+    async def _iter_pages(self, document: Document, refetch: bool = False) -> AsyncIterator[List[Tuple[Optional[int], str]]]:
+        """
+        Extract a document's text as batches of (page number, text) tuples
+        
+        Only PDFs have pages; other sources yield their whole text once
+        with no page number.
+        """
+        if document.url and (refetch or not (document.content or document.file_path)):
+            # Fetch from URL, conditionally if we have validators
+            content = await self._fetch_url_document(document)
+            if document.content is not None:
+                document.content = content
+            yield self._check_unchanged(document, content)
+            return
+        
+        if document.content:
+            # Content is already provided
+            yield self._check_unchanged(document, document.content)
+            return
+        
+        if document.file_path and self._detect_mime_type(document.file_path, document.mime_type) == 'application/pdf':
+            if not os.path.exists(document.file_path):
+                raise FileNotFoundError(f"File not found: {document.file_path}")
+            # Pages are streamed, so the hash is only known at the end
+            digest = hashlib.sha256()
+            document.metadata.pop("ocr_pages", None)
+            page_count = await self._run(pdf_page_count, document.file_path)
+            pages_per_batch = self.settings.pdf_pages_per_batch
+            for start in range(0, page_count, pages_per_batch):
+                end = min(page_count, start + pages_per_batch)
+                pages = await self._run(extract_pdf_pages, document.file_path, start, end)
+                pages = await self._ocr_empty_pages(document.file_path, pages, document)
+                for _, text in pages:
+                    digest.update(text.encode('utf-8', errors='surrogatepass'))
+                yield pages
+            document.content_hash = digest.hexdigest()
+            return
+        
+        if document.file_path and (self._detect_mime_type(document.file_path, document.mime_type) or '').startswith('image/'):
+            if not os.path.exists(document.file_path):
+                raise FileNotFoundError(f"File not found: {document.file_path}")
+            if self.ocr is None:
+                raise ValueError("OCR is disabled, cannot extract text from images")
+            with open(document.file_path, 'rb') as file:
+                text = await self.ocr.ocr([file.read()])
+            document.metadata["ocr_pages"] = 1
+            if text:
+                yield self._check_unchanged(document, text)
+            return
+        
+        if document.file_path and self._detect_mime_type(document.file_path, document.mime_type) == 'text/html':
+            if not os.path.exists(document.file_path):
+                raise FileNotFoundError(f"File not found: {document.file_path}")
+            page = await self._parse_html_file(document.file_path)
+            self._apply_html_metadata(document, page)
+            if page["text"]:
+                yield self._check_unchanged(document, page["text"])
+            return
+        
+        if document.file_path:
+            # Extract from file
+            content = await self._extract_from_file(document.file_path, document.mime_type)
+            if content:
+                yield self._check_unchanged(document, content)
+    
+    def _check_unchanged(self, document: Document, text: str) -> List[Tuple[Optional[int], str]]:
+        """Record the text's hash, raising ContentUnchanged if it matches the stored one"""
+        digest = content_hash(text)
+        if document.content_hash == digest:
+            raise ContentUnchanged(document.id)
+        document.content_hash = digest
+        return [(None, text)] if text else []
+    
+    async def _ocr_empty_pages(
+        self,
+        file_path: str,
+        pages: List[Tuple[int, str]],
+        document: Optional[Document] = None
+    ) -> List[Tuple[int, str]]:
+        """
+        Replace the text of image-only PDF pages with their OCR text
+        
+        A page is considered image-only if it has embedded images and less
+        than ocr_min_text_chars characters of extractable text.
+        """
+        if self.ocr is None:
+            return pages
+        
+        empty = [page_number for page_number, text in pages if len(text.strip()) < self.settings.ocr_min_text_chars]
+        if not empty:
+            return pages
+        
+        page_images = await self._run(extract_pdf_page_images, file_path, empty)
+        texts = await asyncio.gather(*(self.ocr.ocr(images) for _, images in page_images))
+        recognized = {page_number: text for (page_number, _), text in zip(page_images, texts) if text}
+        
+        if document is not None and recognized:
+            document.metadata["ocr_pages"] = document.metadata.get("ocr_pages", 0) + len(recognized)
+        return [(page_number, recognized.get(page_number, text)) for page_number, text in pages]
+    
+    def _apply_html_metadata(self, document: Document, page: Dict[str, Any]) -> None:
+        """Store an HTML page's title and meta tags in the document metadata"""
+        document.metadata["html"] = page["metadata"]
+        if page["title"] and document.url and document.title == document.url:
+            # Documents created from a bare URL are titled with it
+            document.title = page["title"]
+    
+    async def _fetch_url_document(self, document: Document) -> str:
+        """
+        Fetch a URL document's text with a conditional GET
+        
+        Updates the document's HTTP validators and last_fetched_at.
+        
+        Raises:
+            NotModified: If the server answered 304
+        """
+        fetcher = self.fetcher or HttpFetcher()
+        document.last_fetched_at = datetime.now()
+        try:
+            result = await fetcher.fetch(
+                document.url,
+                headers=conditional_headers(document.etag, document.last_modified)
+            )
+            try:
+                if result.not_modified:
+                    raise NotModified(document.url)
+                document.etag = result.headers.get("etag")
+                document.last_modified = result.headers.get("last-modified")
+                
+                if result.content_type == 'application/pdf':
+                    return await self._extract_from_pdf_response(result, document)
+                
+                # Parse HTML
+                page = await self._run(parse_html_page, result.text())
+                self._apply_html_metadata(document, page)
+                return page["text"]
+            finally:
+                result.close()
+        except NotModified:
+            raise
+        except Exception as e:
+            print(f"Error extracting text from URL: {e}")
+            raise
+        finally:
+            if fetcher is not self.fetcher:
+                await fetcher.close()
+    
+    def _detect_mime_type(self, file_path: str, mime_type: Optional[str] = None) -> Optional[str]:
+        """Determine file type from extension if mime_type is not provided"""
+        if mime_type:
+            return mime_type
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == '.pdf':
+            return 'application/pdf'
+        elif ext in ['.txt', '.md']:
+            return 'text/plain'
+        elif ext in ['.html', '.htm']:
+            return 'text/html'
+        elif ext in ['.doc', '.docx']:
+            return 'application/msword'
+        elif ext in ['.png', '.jpg', '.jpeg', '.tif', '.tiff', '.bmp', '.gif', '.webp']:
+            return 'image/' + {'.jpg': 'jpeg', '.tif': 'tiff'}.get(ext, ext[1:])
+        return None
+    
     async def _extract_from_file(self, file_path: str, mime_type: Optional[str] = None) -> Optional[str]:
         """
         Extract text content from a file
@@ -103,17 +402,7 @@ class DocumentProcessor:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
             
-        # Determine file type from extension if mime_type is not provided
-        if not mime_type:
-            ext = os.path.splitext(file_path)[1].lower()
-            if ext == '.pdf':
-                mime_type = 'application/pdf'
-            elif ext in ['.txt', '.md']:
-                mime_type = 'text/plain'
-            elif ext in ['.html', '.htm']:
-                mime_type = 'text/html'
-            elif ext in ['.doc', '.docx']:
-                mime_type = 'application/msword'
+        mime_type = self._detect_mime_type(file_path, mime_type)
         
         # Extract based on file type
         if mime_type == 'application/pdf':
@@ -121,21 +410,22 @@ class DocumentProcessor:
         elif mime_type == 'text/plain':
             return await self._extract_from_text(file_path)
         elif mime_type == 'text/html':
-            return await self._extract_from_html_file(file_path)
+            return (await self._parse_html_file(file_path))["text"]
         else:
             # Default to treating as text
             return await self._extract_from_text(file_path)
     
-    async def _extract_from_pdf(self, file_path: str) -> str:
-        """Extract text from PDF file"""
-        text = ""
+    async def _extract_from_pdf(self, file_path: str, document: Optional[Document] = None) -> str:
+        """Extract text from PDF file, OCRing image-only pages"""
         try:
-            with open(file_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                for page_num in range(len(reader.pages)):
-                    page = reader.pages[page_num]
-                    text += page.extract_text() + "\n\n"
-            return text
+            if self.ocr is None:
+                return await self._run(extract_pdf_text, file_path)
+            page_count = await self._run(pdf_page_count, file_path)
+            pages = await self._run(extract_pdf_pages, file_path, 0, page_count)
+            if document is not None:
+                document.metadata.pop("ocr_pages", None)
+            pages = await self._ocr_empty_pages(file_path, pages, document)
+            return "\n\n".join(text for _, text in pages)
         except Exception as e:
             print(f"Error extracting text from PDF: {e}")
             raise
@@ -150,54 +440,23 @@ class DocumentProcessor:
             with open(file_path, 'r', encoding='latin-1') as file:
                 return file.read()
     
-    async def _extract_from_html_file(self, file_path: str) -> str:
-        """Extract text from HTML file"""
+    async def _parse_html_file(self, file_path: str) -> Dict[str, Any]:
+        """Extract main text and metadata from HTML file"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                html = file.read()
-            
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-                
-            # Get text
-            text = soup.get_text()
-            
-            # Remove extra whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
-            
-            return text
+            return await self._run(parse_html_file, file_path)
         except Exception as e:
             print(f"Error extracting text from HTML file: {e}")
             raise
     
-    async def _extract_from_url(self, url: str) -> Optional[str]:
-        """Extract text from URL"""
+    async def _extract_from_pdf_response(self, result: FetchResult, document: Optional[Document] = None) -> str:
+        """Extract text from a fetched PDF via a temporary file"""
+        fd, path = tempfile.mkstemp(suffix='.pdf')
+        os.close(fd)
         try:
-            # Request webpage
-            headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'}
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            
-            # Parse HTML
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-                
-            # Get text
-            text = soup.get_text()
-            
-            # Remove extra whitespace
-            text = re.sub(r'\s+', ' ', text).strip()
-            
-            return text
-        except Exception as e:
-            print(f"Error extracting text from URL: {e}")
-            raise
+            result.save(path)
+            return await self._extract_from_pdf(path, document)
+        finally:
+            os.remove(path)
     
     async def _split_into_chunks(self, text: str, document_id: str) -> List[DocumentChunk]:
         """
@@ -210,67 +469,12 @@ class DocumentProcessor:
         Returns:
             List of document chunks
         """
-        chunks = []
-        
-        # Clean text
-        text = re.sub(r'\s+', ' ', text).strip()
-        
-        if not text:
-            return chunks
-            
-        # Try to detect language
-        try:
-            language = detect(text[:1000])  # Use first 1000 chars for detection
-        except:
-            language = 'en'  # Default to English
-            
-        # Split text into sentences
-        try:
-            sentences = sent_tokenize(text, language=language)
-        except:
-            # Fallback to simple splitting
-            sentences = [s.strip() + '.' for s in re.split(r'[.!?]+', text) if s.strip()]
-        
-        current_chunk = ""
-        current_chunk_size = 0
-        chunk_index = 0
-        
-        for sentence in sentences:
-            # If adding this sentence would exceed chunk size, create a new chunk
-            if current_chunk_size + len(sentence) > self.chunk_size and current_chunk:
-                # Create chunk
-                chunk = DocumentChunk(
-                    document_id=document_id,
-                    content=current_chunk,
-                    chunk_index=chunk_index
-                )
-                chunks.append(chunk)
-                chunk_index += 1
-                
-                # Start new chunk with overlap
-                words = current_chunk.split()
-                overlap_words = words[-min(len(words), self.chunk_overlap // 5):]  # Approx 5 chars per word
-                current_chunk = ' '.join(overlap_words) + ' ' + sentence
-                current_chunk_size = len(current_chunk)
-            else:
-                # Add sentence to current chunk
-                if current_chunk:
-                    current_chunk += ' ' + sentence
-                else:
-                    current_chunk = sentence
-                current_chunk_size = len(current_chunk)
-        
-        # Add the last chunk if it's not empty
-        if current_chunk and chunk_index < self.max_chunks_per_doc:
-            chunk = DocumentChunk(
-                document_id=document_id,
-                content=current_chunk,
-                chunk_index=chunk_index
-            )
-            chunks.append(chunk)
-        
-        # Limit to max chunks
-        if len(chunks) > self.max_chunks_per_doc:
-            chunks = chunks[:self.max_chunks_per_doc]
-            
-        return chunks
\ No newline at end of file
+        chunker = StreamingChunker(
+            document_id=document_id,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+            max_chunks=self.max_chunks_per_doc,
+            tokenizer_name=self.tokenizer_name
+        )
+        chunks, _ = await self._run(chunk_pages, chunker, [(None, text)], True)
+        return chunks
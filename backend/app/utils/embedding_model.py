@@ -6,6 +6,7 @@ import os
 import openai
 from tqdm import tqdm
 import time
+import asyncio
 
 class EmbeddingModel:
     """
@@ -45,6 +46,24 @@ class EmbeddingModel:
             device = 'cuda' if torch.cuda.is_available() else 'cpu'
             self.model = SentenceTransformer(model_name, cache_folder=cache_dir, device=device)
     
+    @property
+    def tokenizer_name(self) -> Optional[str]:
+        """
+        Name or local path the model's tokenizer can be loaded from
+        
+        Returns None for OpenAI embeddings, which have no local tokenizer.
+        """
+        if self.model is None:
+            return None
+        return self.model.tokenizer.name_or_path
+    
+    @property
+    def max_tokens(self) -> Optional[int]:
+        """Maximum number of text tokens per input, excluding special tokens"""
+        if self.model is None:
+            return None
+        return self.model.max_seq_length - self.model.tokenizer.num_special_tokens_to_add()
+    
     async def embed_query(self, query: str) -> List[float]:
         """
         Embed a single query text
@@ -93,11 +112,18 @@ class EmbeddingModel:
                 all_embeddings.extend(embeddings)
                 # Sleep to avoid rate limits
                 if i + self.batch_size < len(texts):
-                    time.sleep(0.5)
+                    await asyncio.sleep(0.5)
             return all_embeddings
         else:
-            # Use sentence-transformers
-            embeddings = self.model.encode(texts, convert_to_numpy=True, batch_size=self.batch_size, show_progress_bar=True)
+            # Use sentence-transformers, in a thread so the event loop (and
+            # the database writes of other batches) can run meanwhile
+            embeddings = await asyncio.to_thread(
+                self.model.encode,
+                texts,
+                convert_to_numpy=True,
+                batch_size=self.batch_size,
+                show_progress_bar=True
+            )
             return embeddings.tolist()
     
     async def _openai_embed(self, texts: List[str]) -> List[List[float]]:
@@ -0,0 +1,49 @@
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+from bson.binary import Binary
+
+# How chunk embeddings are stored in MongoDB:
+#   float32 - packed little-endian float32 (1.5 KB for 384 dimensions)
+#   float16 - packed little-endian float16 (768 bytes), about 3 significant digits
+#   none    - not stored; the FAISS index file holds the only copy
+#   array   - BSON array of doubles (about 3.5 KB), as before packing existed
+STORAGE_MODES = ("float32", "float16", "none", "array")
+
+# User-defined BSON binary subtypes tagging the packed element type
+_SUBTYPES = {"float32": 0x80, "float16": 0x81}
+_DTYPES = {0x80: np.dtype("<f4"), 0x81: np.dtype("<f2")}
+
+def encode_embedding(embedding: Optional[Sequence[float]], mode: str) -> Any:
+    """
+    Convert an embedding to its stored form
+
+    Returns:
+        Binary, list of floats, or None (for mode "none" or no embedding)
+    """
+    if embedding is None or mode == "none":
+        return None
+    if mode == "array":
+        return [float(value) for value in embedding]
+    if mode not in _SUBTYPES:
+        raise ValueError(f"Unknown embedding storage mode: {mode}")
+    packed = np.asarray(embedding, dtype=_DTYPES[_SUBTYPES[mode]]).tobytes()
+    return Binary(packed, _SUBTYPES[mode])
+
+def decode_embedding(value: Any) -> Optional[List[float]]:
+    """Read an embedding stored in any mode"""
+    if value is None:
+        return None
+    if isinstance(value, Binary):
+        dtype = _DTYPES.get(value.subtype)
+        if dtype is None:
+            raise ValueError(f"Unknown embedding binary subtype: {value.subtype}")
+        return np.frombuffer(value, dtype=dtype).astype(np.float32).tolist()
+    return [float(item) for item in value]
+
+def chunk_document(chunk, mode: str) -> Dict[str, Any]:
+    """MongoDB document for a chunk, with its embedding in the given storage mode"""
+    document = chunk.dict()
+    embedding = encode_embedding(document.pop("embedding", None), mode)
+    if embedding is not None:
+        document["embedding"] = embedding
+    return document
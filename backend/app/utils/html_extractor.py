@@ -0,0 +1,275 @@
+import re
+from typing import Any, Dict, List, Optional, Union
+import lxml.html
+from lxml import etree
+from app.utils.http_fetcher import detect_charset
+
+# Elements that never contain readable content
+_DROP_TAGS = (
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "object", "embed", "button", "select", "input", "textarea"
+)
+
+# Page furniture; <header> is only dropped outside the main content
+_BOILERPLATE_TAGS = ("nav", "aside", "footer")
+_BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "search", "dialog", "alertdialog"}
+
+# class/id hints, in the spirit of Readability
+_NEGATIVE_RE = re.compile(
+    r"(?:^|[\s_-])(?:cookie|consent|gdpr|banner|nav|navbar|menu|breadcrumbs?|footer|sidebar|"
+    r"share|sharing|social|related|newsletter|subscribe|popup|modal|advert|ads?|promo|comments?)(?:$|[\s_-])",
+    re.IGNORECASE
+)
+_POSITIVE_RE = re.compile(r"article|body|content|entry|main|page|post|text|blog|story", re.IGNORECASE)
+_HIDDEN_STYLE_RE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.IGNORECASE)
+
+# Elements whose text is laid out as separate lines
+_BLOCK_TAGS = (
+    "address", "article", "blockquote", "dd", "div", "dl", "dt", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "ol", "p", "pre",
+    "section", "table", "td", "th", "tr", "ul"
+)
+
+# Elements scored as paragraphs when looking for the main content
+_PARAGRAPH_TAGS = ("p", "pre", "td", "blockquote")
+_MIN_PARAGRAPH_LENGTH = 25
+
+# The detected main content is only trusted if it holds this share of the
+# page's text; otherwise the whole (cleaned) body is used
+_MIN_CONTENT_RATIO = 0.2
+
+# Sibling blocks scoring at least this fraction of the best block are
+# kept with it (e.g. an article split over several <div>s)
+_SIBLING_SCORE_RATIO = 0.2
+
+_WHITESPACE_RE = re.compile(r"[^\S\n]+")
+
+# <meta> tags copied into the document metadata, by name or property
+_META_FIELDS = {
+    "description": "description",
+    "og:description": "description",
+    "author": "author",
+    "article:author": "author",
+    "keywords": "keywords",
+    "og:site_name": "site_name",
+    "og:type": "type",
+    "article:published_time": "published_at",
+    "article:modified_time": "modified_at",
+}
+
+def _normalize(text: str) -> str:
+    """Collapse whitespace within lines and drop empty lines"""
+    lines = (_WHITESPACE_RE.sub(" ", line).strip() for line in text.split("\n"))
+    return "\n".join(line for line in lines if line)
+
+def _text_length(element) -> int:
+    """Length of an element's text, ignoring whitespace runs"""
+    return len(" ".join(element.text_content().split()))
+
+def _link_density(element, length: int) -> float:
+    """Share of an element's text that sits inside links"""
+    if not length:
+        return 0.0
+    link_length = sum(_text_length(link) for link in element.iter("a"))
+    return min(1.0, link_length / length)
+
+def _is_boilerplate(element) -> bool:
+    """Whether an element is navigation, a banner, hidden, etc."""
+    tag = element.tag
+    if tag in ("html", "body", "article", "main"):
+        return False
+    if tag in _BOILERPLATE_TAGS:
+        return True
+    if tag == "header" and next(element.iterancestors("article", "main"), None) is None:
+        return True
+
+    get = element.get
+    if get("hidden") is not None or get("aria-hidden") == "true":
+        return True
+    if (get("role") or "").lower() in _BOILERPLATE_ROLES:
+        return True
+    style = get("style")
+    if style and _HIDDEN_STYLE_RE.search(style):
+        return True
+
+    hints = f"{get('class') or ''} {get('id') or ''}"
+    return bool(_NEGATIVE_RE.search(hints)) and not _POSITIVE_RE.search(hints)
+
+def _remove_boilerplate(root) -> None:
+    """Drop non-content elements, keeping the text that follows them"""
+    for element in list(root.iter(*_DROP_TAGS)):
+        element.drop_tree()
+
+    doomed = []
+    for element in root.iter(tag=etree.Element):
+        # Children of an element already marked are dropped with it
+        if doomed and doomed[-1] in element.iterancestors():
+            continue
+        if _is_boilerplate(element):
+            doomed.append(element)
+    for element in doomed:
+        element.drop_tree()
+
+def _main_content(body) -> List[Any]:
+    """
+    Find the elements holding the page's main content
+
+    Explicit <article>/<main> markup is preferred. Otherwise paragraphs
+    are scored by length and commas, the scores are credited to their
+    parent and grandparent, and the best container (discounted by its
+    link density) wins, together with strong siblings.
+    """
+    body_length = _text_length(body)
+    if not body_length:
+        return [body]
+
+    explicit = body.xpath(".//article | .//main | .//*[@role='main']")
+    if explicit:
+        best = max(explicit, key=_text_length)
+        if _text_length(best) >= body_length * _MIN_CONTENT_RATIO:
+            return [best]
+
+    scores: Dict[Any, float] = {}
+    for paragraph in body.iter(*_PARAGRAPH_TAGS):
+        text = paragraph.text_content()
+        length = len(text.strip())
+        if length < _MIN_PARAGRAPH_LENGTH:
+            continue
+        score = 1 + text.count(",") + min(length // 100, 3)
+        parent = paragraph.getparent()
+        if parent is None:
+            continue
+        scores[parent] = scores.get(parent, 0.0) + score
+        grandparent = parent.getparent()
+        if grandparent is not None:
+            scores[grandparent] = scores.get(grandparent, 0.0) + score / 2
+
+    if not scores:
+        return [body]
+
+    for candidate in scores:
+        scores[candidate] *= 1 - _link_density(candidate, _text_length(candidate))
+    best = max(scores, key=scores.get)
+
+    parent = best.getparent()
+    if parent is None:
+        content = [best]
+    else:
+        threshold = scores[best] * _SIBLING_SCORE_RATIO
+        content = [
+            sibling for sibling in parent.iterchildren(tag=etree.Element)
+            if sibling is best or scores.get(sibling, 0.0) >= threshold
+        ]
+
+    if sum(_text_length(element) for element in content) < body_length * _MIN_CONTENT_RATIO:
+        return [body]
+    return content
+
+def _element_text(element) -> str:
+    """Text of an element, with block elements on separate lines"""
+    for block in element.iter(*_BLOCK_TAGS, "br"):
+        block.tail = "\n" + (block.tail or "")
+        if block.tag != "br":
+            block.text = "\n" + (block.text or "")
+    return element.text_content()
+
+def _extract_metadata(root) -> Dict[str, Any]:
+    """Read the title, <meta> descriptions and other page-level metadata"""
+    metadata: Dict[str, Any] = {}
+
+    title = root.findtext(".//title")
+    if title and title.strip():
+        metadata["title"] = " ".join(title.split())
+
+    for meta in root.iter("meta"):
+        key = (meta.get("name") or meta.get("property") or "").strip().lower()
+        field = _META_FIELDS.get(key)
+        value = (meta.get("content") or "").strip()
+        if field and value and field not in metadata:
+            metadata[field] = value
+        elif key == "og:title" and value and "title" not in metadata:
+            metadata["title"] = value
+
+    if "keywords" in metadata:
+        metadata["keywords"] = [keyword.strip() for keyword in metadata["keywords"].split(",") if keyword.strip()]
+
+    language = root.get("lang") or root.get("{http://www.w3.org/XML/1998/namespace}lang")
+    if language:
+        metadata["language"] = language.strip()
+
+    for link in root.iter("link"):
+        if "canonical" in (link.get("rel") or "").lower().split() and link.get("href"):
+            metadata["canonical_url"] = link.get("href").strip()
+            break
+
+    return metadata
+
+def _parse(html: Union[str, bytes]):
+    """Parse an HTML document, or None if it is empty"""
+    if isinstance(html, str):
+        # lxml refuses str input with an encoding declaration
+        html = html.encode("utf-8", errors="replace")
+        parser = lxml.html.HTMLParser(encoding="utf-8")
+    else:
+        parser = lxml.html.HTMLParser(encoding=detect_charset(None, html[:4096]) or "utf-8")
+    try:
+        return lxml.html.document_fromstring(html, parser=parser)
+    except (etree.ParserError, ValueError):
+        return None
+
+def parse_html_page(html: Union[str, bytes]) -> Dict[str, Any]:
+    """
+    Extract the main content and metadata of an HTML page
+
+    Scripts, navigation, footers, cookie banners and other page furniture
+    are removed before text is extracted, and only the main content block
+    is kept when one can be identified.
+
+    Returns:
+        Dict with the page title, main text (one line per block), raw link
+        targets from the whole page, the page's robots noindex directive
+        and a metadata dict (title, description, author, keywords,
+        language, canonical_url, ...)
+    """
+    root = _parse(html)
+    if root is None:
+        return {"title": None, "text": "", "links": [], "noindex": False, "metadata": {}}
+
+    metadata = _extract_metadata(root)
+
+    robots = ""
+    for meta in root.iter("meta"):
+        if (meta.get("name") or "").strip().lower() == "robots":
+            robots = (meta.get("content") or "").lower()
+            break
+
+    # Links are taken from the whole page, navigation included
+    links = []
+    if "nofollow" not in robots:
+        links = [
+            link.get("href") for link in root.iter("a")
+            if link.get("href") and "nofollow" not in (link.get("rel") or "").lower().split()
+        ]
+
+    body = root.find("body")
+    if body is None:
+        body = root
+    _remove_boilerplate(body)
+    text = "\n".join(_element_text(element) for element in _main_content(body))
+
+    return {
+        "title": metadata.get("title"),
+        "text": _normalize(text),
+        "links": links,
+        "noindex": "noindex" in robots,
+        "metadata": metadata
+    }
+
+def html_to_text(html: Union[str, bytes]) -> str:
+    """Extract the main text of an HTML string"""
+    return parse_html_page(html)["text"]
+
+def parse_html_file(file_path: str) -> Dict[str, Any]:
+    """Extract the main content and metadata of an HTML file"""
+    with open(file_path, 'rb') as file:
+        return parse_html_page(file.read())
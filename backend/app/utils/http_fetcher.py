@@ -0,0 +1,251 @@
+import asyncio
+import codecs
+import re
+import tempfile
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+import httpx
+
+DEFAULT_USER_AGENT = "SemanticSearchBot/1.0"
+
+# Bodies up to this size stay in memory, larger ones spill to a temp file
+SPOOL_THRESHOLD = 1024 * 1024
+
+# How much of an HTML body to scan for a <meta> charset declaration
+_META_SNIFF_BYTES = 4096
+_META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_\-:.]+)', re.IGNORECASE)
+_HEADER_CHARSET_RE = re.compile(r'charset\s*=\s*["\']?([^"\';\s]+)', re.IGNORECASE)
+
+_BOMS = [
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+class FetchError(Exception):
+    """Raised when a URL cannot be fetched"""
+
+class ResponseTooLarge(FetchError):
+    """Raised when a response body exceeds the fetcher's size cap"""
+
+def conditional_headers(etag: Optional[str], last_modified: Optional[str]) -> Dict[str, str]:
+    """Build the headers of a conditional GET from stored validators"""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+def _valid_codec(name: Optional[str]) -> Optional[str]:
+    """Normalize an encoding name, or None if Python does not know it"""
+    if not name:
+        return None
+    try:
+        return codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+
+def detect_charset(content_type: Optional[str], head: bytes) -> Optional[str]:
+    """
+    Detect the character encoding of a response body
+
+    Follows the HTML precedence: byte order mark, then the Content-Type
+    charset parameter, then a <meta> declaration near the top of the body.
+
+    Args:
+        content_type: Value of the Content-Type header
+        head: First bytes of the body
+
+    Returns:
+        Python codec name, or None if nothing was declared
+    """
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    if content_type:
+        match = _HEADER_CHARSET_RE.search(content_type)
+        if match:
+            encoding = _valid_codec(match.group(1))
+            if encoding:
+                return encoding
+
+    match = _META_CHARSET_RE.search(head[:_META_SNIFF_BYTES])
+    if match:
+        return _valid_codec(match.group(1).decode("ascii", "ignore"))
+
+    return None
+
+class FetchResult:
+    """
+    A fetched response whose body is held in memory or spooled to disk
+    """
+
+    def __init__(self, url: str, status_code: int, headers: httpx.Headers, body, size: int):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers
+        self.size = size
+        self._body = body
+
+    @property
+    def content_type(self) -> str:
+        """Media type of the response, without parameters"""
+        return self.headers.get("content-type", "").split(";")[0].strip().lower()
+
+    @property
+    def not_modified(self) -> bool:
+        """Whether the server answered a conditional request with 304"""
+        return self.status_code == 304
+
+    def read(self) -> bytes:
+        """Read the whole (decompressed) body"""
+        if self._body is None:
+            return b""
+        self._body.seek(0)
+        return self._body.read()
+
+    def save(self, path: str) -> None:
+        """Write the body to a file without loading it all into memory"""
+        with open(path, "wb") as out:
+            if self._body is None:
+                return
+            self._body.seek(0)
+            while True:
+                block = self._body.read(64 * 1024)
+                if not block:
+                    break
+                out.write(block)
+
+    def text(self) -> str:
+        """Decode the body using the detected charset"""
+        data = self.read()
+        encoding = detect_charset(self.headers.get("content-type"), data[:_META_SNIFF_BYTES])
+        if encoding:
+            return data.decode(encoding, errors="replace")
+
+        # Nothing declared: UTF-8 if it decodes cleanly, otherwise guess
+        try:
+            return data.decode("utf-8")
+        except UnicodeDecodeError:
+            pass
+        try:
+            from charset_normalizer import from_bytes
+            best = from_bytes(data).best()
+            if best is not None:
+                return str(best)
+        except ImportError:
+            pass
+        return data.decode("cp1252", errors="replace")
+
+    def close(self) -> None:
+        """Release the spooled body"""
+        if self._body is not None:
+            self._body.close()
+            self._body = None
+
+class HttpFetcher:
+    """
+    Async HTTP fetcher with a shared connection pool
+
+    Concurrency is limited both globally (by the connection pool) and per
+    host. Bodies are streamed and decompressed (gzip, deflate, and brotli
+    when the brotli package is installed) and the download is aborted as
+    soon as the decompressed size exceeds max_bytes.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_per_host: int = 4,
+        timeout: float = 10.0,
+        max_bytes: int = 10 * 1024 * 1024,
+        user_agent: str = DEFAULT_USER_AGENT
+    ):
+        """
+        Initialize fetcher
+
+        Args:
+            max_connections: Maximum number of open connections
+            max_per_host: Maximum number of concurrent requests per host
+            timeout: Connect/read timeout in seconds
+            max_bytes: Maximum decompressed body size in bytes
+            user_agent: User-Agent header to send
+        """
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.user_agent = user_agent
+        self._client = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Get the shared client, creating it on first use"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                timeout=httpx.Timeout(self.timeout),
+                headers={"User-Agent": self.user_agent},
+                follow_redirects=True
+            )
+        return self._client
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Get the concurrency limit for a URL's host"""
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_limits[host]
+
+    async def fetch(self, url: str, headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """
+        Fetch a URL
+
+        Args:
+            url: URL to fetch
+            headers: Extra request headers (e.g. for conditional requests)
+
+        Returns:
+            Fetch result; the caller should close() it when done
+
+        Raises:
+            ResponseTooLarge: If the body exceeds max_bytes
+            FetchError: On network errors and 4xx/5xx responses
+        """
+        async with self._host_limit(url):
+            try:
+                async with self._get_client().stream("GET", url, headers=headers) as response:
+                    if response.status_code >= 400:
+                        raise FetchError(f"HTTP {response.status_code} fetching {url}")
+
+                    declared = response.headers.get("content-length")
+                    if declared and declared.isdigit() and response.headers.get("content-encoding") is None \
+                            and int(declared) > self.max_bytes:
+                        raise ResponseTooLarge(f"Response from {url} is {declared} bytes (limit {self.max_bytes})")
+
+                    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_THRESHOLD)
+                    size = 0
+                    try:
+                        async for block in response.aiter_bytes():
+                            size += len(block)
+                            if size > self.max_bytes:
+                                raise ResponseTooLarge(f"Response from {url} exceeds {self.max_bytes} bytes")
+                            body.write(block)
+                    except BaseException:
+                        body.close()
+                        raise
+
+                    return FetchResult(str(response.url), response.status_code, response.headers, body, size)
+            except httpx.HTTPError as e:
+                raise FetchError(f"Error fetching {url}: {e}") from e
+
+    async def close(self) -> None:
+        """Close pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
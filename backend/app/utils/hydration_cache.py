@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Tuple
+import bson
+
+# Rough per-entry cost of the Python objects on top of their BSON size
+ENTRY_OVERHEAD = 256
+
+class HydrationCache:
+    """
+    LRU cache of chunk and document records used to hydrate search results
+
+    Bounded by an estimate of the memory its entries use. Lookups serve
+    hits from memory and fetch all misses in one query. Writers invalidate
+    the IDs they change; a fetch that overlaps an invalidation is not
+    cached, so stale records cannot be re-inserted by a slow read.
+    """
+
+    def __init__(self, max_bytes: int, chunk_fields: Dict[str, Any], document_fields: Dict[str, Any]):
+        """
+        Initialize hydration cache
+
+        Args:
+            max_bytes: Memory budget in bytes (0 disables caching)
+            chunk_fields: Projection chunks are fetched and cached with
+            document_fields: Projection documents are fetched and cached with
+        """
+        self.max_bytes = max_bytes
+        self.chunk_fields = chunk_fields
+        self.document_fields = document_fields
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._generation = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def covers(self, fields: Dict[str, Any]) -> bool:
+        """Whether cached documents have every field of a projection"""
+        return all(field in self.document_fields for field, include in fields.items() if include)
+
+    async def get_chunks(self, db, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get chunk records by ID"""
+        return await self._get_many(db.document_chunks, "chunk", chunk_ids, self.chunk_fields)
+
+    async def get_documents(self, db, document_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get document records by ID"""
+        return await self._get_many(db.documents, "document", document_ids, self.document_fields)
+
+    async def _get_many(self, collection, kind: str, ids: List[str], fields: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        found = {}
+        missing = []
+        for item_id in ids:
+            entry = self._entries.get((kind, item_id))
+            if entry is None:
+                missing.append(item_id)
+                continue
+            self._entries.move_to_end((kind, item_id))
+            found[item_id] = entry[0]
+        self.hits += len(found)
+        self.misses += len(missing)
+        if not missing:
+            return found
+
+        generation = self._generation
+        cursor = collection.find({"id": {"$in": missing}}, fields)
+        records = await cursor.to_list(length=None)
+        cacheable = generation == self._generation
+        for record in records:
+            found[record["id"]] = record
+            if cacheable:
+                self._put((kind, record["id"]), record)
+        return found
+
+    def _put(self, key: Tuple[str, str], record: Dict[str, Any]) -> None:
+        size = len(bson.encode(record)) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= previous[1]
+        self._entries[key] = (record, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def _invalidate(self, kind: str, ids: Iterable[str]) -> None:
+        self._generation += 1
+        for item_id in ids:
+            entry = self._entries.pop((kind, item_id), None)
+            if entry is not None:
+                self.bytes -= entry[1]
+
+    def invalidate_chunks(self, chunk_ids: Iterable[str]) -> None:
+        """Drop chunks that were changed or deleted"""
+        self._invalidate("chunk", chunk_ids)
+
+    def invalidate_documents(self, document_ids: Iterable[str]) -> None:
+        """Drop documents that were changed or deleted"""
+        self._invalidate("document", document_ids)
+
+    def clear(self) -> None:
+        """Drop everything, e.g. after the index was replaced"""
+        self._generation += 1
+        self._entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,77 @@
+import re
+from typing import Dict, FrozenSet, Tuple
+
+# Very common function words per language. Together they make up a large
+# share of any running text, so counting them over a short sample tells
+# languages apart reliably, deterministically and in linear time.
+_STOPWORDS: Dict[str, FrozenSet[str]] = {
+    language: frozenset(words.split())
+    for language, words in {
+        "en": "the and of to is in that it for was with as on are this be by not have from",
+        "de": "der die und das ist nicht ein eine zu den mit sich auf dem des auch es für von im",
+        "fr": "le la les et des est une du en que pour dans qui pas sur au avec ce sont il",
+        "es": "el la de que y los las en un por con una para es del se no lo como más",
+        "it": "il di che la e un per non una sono con del della gli le si è anche come nel",
+        "pt": "o a de que e do da não um uma os para com em é se no na mais como",
+        "nl": "de het een en van is dat niet te op in ik zijn met voor die er maar ook wordt",
+        "sv": "och att det som en är på för av med inte den till har jag om ett men var de",
+        "da": "og at det er en til på som de med for af ikke der har den et jeg var fra",
+        "no": "og i det er som en på til av for med ikke at har jeg de den et var om",
+        "fi": "ja on ei että se oli hän mutta ovat kun myös tai ole joka niin jos sen tämä mitä vain",
+        "et": "ja on ei et see ka oli kui mis aga või siis nii ta tema kes üle veel seda oma",
+        "pl": "i w nie na się z że do to jest jak o ale co po tak od jego przez dla",
+        "cs": "a je se na v že to s z do jako ale pro jsou by tak o jeho který také",
+        "sl": "in je da se na v za z so ki pa ne tudi bi po kot od ali to jih",
+        "tr": "ve bir bu da de için ile çok ne gibi daha olarak değil ama her kadar sonra ise olan mi",
+    }.items()
+}
+
+# Languages each stopword belongs to
+_WORD_LANGUAGES: Dict[str, Tuple[str, ...]] = {}
+for _language, _words in _STOPWORDS.items():
+    for _word in _words:
+        _WORD_LANGUAGES[_word] = _WORD_LANGUAGES.get(_word, ()) + (_language,)
+
+# Languages identified by their script rather than by vocabulary
+_SCRIPTS = {
+    "ru": re.compile(r"[Ѐ-ӿ]"),
+    "el": re.compile(r"[Ͱ-Ͽἀ-῿]"),
+}
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+_LETTER_RE = re.compile(r"[^\W\d_]")
+
+# Detection only looks at the start of a text
+SAMPLE_SIZE = 2000
+
+# A language needs at least this many stopword hits to be chosen
+_MIN_HITS = 2
+
+def detect_language(text: str, default: str = "en") -> str:
+    """
+    Guess the language of a text
+
+    Args:
+        text: Text to inspect (only the first SAMPLE_SIZE characters are used)
+        default: ISO 639-1 code returned when there is too little signal
+
+    Returns:
+        ISO 639-1 language code
+    """
+    sample = text[:SAMPLE_SIZE].lower()
+
+    letters = len(_LETTER_RE.findall(sample))
+    if not letters:
+        return default
+    for language, script in _SCRIPTS.items():
+        if len(script.findall(sample)) * 2 > letters:
+            return language
+
+    hits = dict.fromkeys(_STOPWORDS, 0)
+    for word in _WORD_RE.findall(sample):
+        for language in _WORD_LANGUAGES.get(word, ()):
+            hits[language] += 1
+
+    # Ties go to the language listed first, so results never vary
+    best = max(hits, key=hits.get)
+    return best if hits[best] >= _MIN_HITS else default
@@ -0,0 +1,220 @@
+import hashlib
+import io
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from app.utils.pdf_reader import open_pdf
+from app.utils.process_pool import ExtractionPool
+
+# PIL modes for raw PDF image samples, by colour space
+_COLOR_MODES = {"/DeviceGray": "L", "/CalGray": "L", "/DeviceRGB": "RGB", "/CalRGB": "RGB", "/DeviceCMYK": "CMYK"}
+
+# Filters whose output PyPDF2 leaves encoded (CCITT comes back as TIFF)
+_ENCODED_FILTERS = ("/DCTDecode", "/JPXDecode", "/CCITTFaxDecode")
+
+# Form XObjects nested deeper than this are not searched for images
+_MAX_FORM_DEPTH = 3
+
+# OCR runs tesseract on page images, which is much slower than text
+# extraction, so it gets its own pool: a backlog of scans then cannot
+# hold up text documents. Like extraction, the work lives in module-level
+# functions that can be shipped to worker processes.
+
+def _image_bytes(xobject) -> Optional[bytes]:
+    """Encode a PDF image XObject as a file PIL can open, or None if unsupported"""
+    filters = xobject.get("/Filter") or []
+    if not isinstance(filters, list):
+        filters = [filters]
+    filters = [str(name) for name in filters]
+    if "/JBIG2Decode" in filters:
+        return None
+
+    data = xobject.get_data()
+    if filters and filters[-1] in _ENCODED_FILTERS:
+        return data
+
+    # Raw samples: wrap them in a PNG
+    from PIL import Image
+    color_space = xobject.get("/ColorSpace")
+    if isinstance(color_space, list) and color_space and color_space[0] == "/ICCBased":
+        components = color_space[1].get_object().get("/N", 3)
+        mode = {1: "L", 3: "RGB", 4: "CMYK"}.get(components)
+    else:
+        mode = _COLOR_MODES.get(str(color_space))
+    if xobject.get("/BitsPerComponent") == 1 or xobject.get("/ImageMask"):
+        mode = "1"
+    if mode is None:
+        return None
+
+    image = Image.frombytes(mode, (int(xobject["/Width"]), int(xobject["/Height"])), data)
+    output = io.BytesIO()
+    image.save(output, format="PNG")
+    return output.getvalue()
+
+def _resource_images(resources, depth: int = 0) -> List[bytes]:
+    """Collect the images of a resource dictionary, including nested forms"""
+    images = []
+    xobjects = resources.get("/XObject") if resources else None
+    if not xobjects:
+        return images
+    for reference in xobjects.get_object().values():
+        xobject = reference.get_object()
+        subtype = xobject.get("/Subtype")
+        if subtype == "/Image":
+            data = _image_bytes(xobject)
+            if data:
+                images.append(data)
+        elif subtype == "/Form" and depth < _MAX_FORM_DEPTH:
+            images.extend(_resource_images(xobject.get("/Resources"), depth + 1))
+    return images
+
+def extract_pdf_page_images(file_path: str, page_numbers: List[int]) -> List[Tuple[int, List[bytes]]]:
+    """
+    Extract the embedded images of PDF pages
+
+    Args:
+        file_path: Path to PDF file
+        page_numbers: 1-based numbers of the pages to extract
+
+    Returns:
+        List of (page number, encoded images) tuples, for pages that have images
+    """
+    pages = []
+    reader = open_pdf(file_path)
+    for page_number in page_numbers:
+        try:
+            page = reader.pages[page_number - 1]
+            images = _resource_images(page.get("/Resources"))
+        except Exception as e:
+            # Unsupported image filters should not fail the whole document
+            print(f"Error extracting images from page {page_number}: {e}")
+            continue
+        if images:
+            pages.append((page_number, images))
+    return pages
+
+def ocr_images(images: List[bytes], languages: str = "eng") -> str:
+    """Recognize the text of a page's images, in order"""
+    import pytesseract
+    from PIL import Image, ImageSequence
+
+    texts = []
+    for data in images:
+        with Image.open(io.BytesIO(data)) as image:
+            # Multi-page TIFFs hold one scanned page per frame
+            for frame in ImageSequence.Iterator(image):
+                text = pytesseract.image_to_string(frame.convert("RGB"), lang=languages).strip()
+                if text:
+                    texts.append(text)
+    return "\n".join(texts)
+
+def image_hash(images: List[bytes]) -> str:
+    """Hash a page's images, to reuse OCR results for identical scans"""
+    digest = hashlib.sha256()
+    for data in images:
+        digest.update(hashlib.sha256(data).digest())
+    return digest.hexdigest()
+
+class OcrEngine:
+    """
+    OCR of scanned pages on a dedicated, bounded worker pool
+
+    Results are cached on disk by image hash, so re-ingesting a document
+    (or another copy of the same scan) does not run tesseract again.
+    """
+
+    def __init__(
+        self,
+        pool: ExtractionPool,
+        languages: str = "eng",
+        cache_dir: str = os.path.join("data", "ocr_cache")
+    ):
+        """
+        Initialize OCR engine
+
+        Args:
+            pool: Process pool reserved for OCR jobs
+            languages: Tesseract language codes, e.g. "eng+deu"
+            cache_dir: Directory of cached OCR results
+        """
+        self.pool = pool
+        self.languages = languages
+        self.cache_dir = cache_dir
+        self.pages_processed = 0
+        self.cache_hits = 0
+        self.pages_failed = 0
+        self._in_flight = 0
+        self._busy_since = None
+        self._busy_seconds = 0.0
+
+    def _cache_path(self, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.{self.languages}.txt")
+
+    def _cache_get(self, digest: str) -> Optional[str]:
+        try:
+            with open(self._cache_path(digest), 'r', encoding='utf-8') as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+    def _cache_put(self, digest: str, text: str) -> None:
+        path = self._cache_path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(text)
+        os.replace(temp_path, path)
+
+    async def ocr(self, images: List[bytes]) -> str:
+        """
+        Recognize the text of one page's images
+
+        Returns:
+            Recognized text ("" if OCR failed)
+        """
+        digest = image_hash(images)
+        cached = self._cache_get(digest)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        # Throughput is measured over the time at least one job was running
+        if self._in_flight == 0:
+            self._busy_since = time.monotonic()
+        self._in_flight += 1
+        try:
+            text = await self.pool.run(ocr_images, images, self.languages)
+        except Exception as e:
+            print(f"Error running OCR: {e}")
+            self.pages_failed += 1
+            return ""
+        finally:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._busy_seconds += time.monotonic() - self._busy_since
+
+        self.pages_processed += 1
+        self._cache_put(digest, text)
+        return text
+
+    @property
+    def pages_per_minute(self) -> float:
+        """OCR throughput while the pool was busy"""
+        busy = self._busy_seconds
+        if self._in_flight:
+            busy += time.monotonic() - self._busy_since
+        return self.pages_processed / busy * 60 if busy > 0 else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pages_processed": self.pages_processed,
+            "cache_hits": self.cache_hits,
+            "pages_failed": self.pages_failed,
+            "in_flight": self._in_flight,
+            "pages_per_minute": round(self.pages_per_minute, 2)
+        }
+
+    def shutdown(self) -> None:
+        """Shut down the OCR worker processes"""
+        self.pool.shutdown()
@@ -0,0 +1,45 @@
+import os
+from collections import OrderedDict
+from typing import Tuple
+import PyPDF2
+
+# Parsing a PDF's cross-reference table and page tree takes time linear in
+# its size, so a document extracted batch by batch would be parsed again for
+# every batch. Each worker process instead keeps the readers of the last
+# few files it read; the batches of one extraction reuse the same reader.
+MAX_CACHED_READERS = 2
+
+_readers: "OrderedDict[str, Tuple[Tuple[int, int, int], PyPDF2.PdfReader]]" = OrderedDict()
+
+def _signature(file_path: str) -> Tuple[int, int, int]:
+    """Identify the current contents of a file, to detect it being replaced"""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_ino, stat.st_size
+
+def open_pdf(file_path: str) -> PyPDF2.PdfReader:
+    """
+    Get a reader for a PDF file, reusing this process's reader if the file is unchanged
+
+    Args:
+        file_path: Path to PDF file
+
+    Returns:
+        PDF reader holding the file's contents in memory
+    """
+    signature = _signature(file_path)
+    cached = _readers.get(file_path)
+    if cached is not None and cached[0] == signature:
+        _readers.move_to_end(file_path)
+        return cached[1]
+
+    # Reading from a path loads the file into memory, so no file stays open
+    reader = PyPDF2.PdfReader(file_path)
+    _readers[file_path] = (signature, reader)
+    _readers.move_to_end(file_path)
+    while len(_readers) > MAX_CACHED_READERS:
+        _readers.popitem(last=False)
+    return reader
+
+def close_pdf(file_path: str) -> None:
+    """Drop this process's reader for a PDF file once its extraction is done"""
+    _readers.pop(file_path, None)
@@ -0,0 +1,127 @@
+import bisect
+import heapq
+from typing import Dict, Iterable, List, Tuple
+
+# Separates an entry's key from its value in the sorted entry list
+SEPARATOR = "\x00"
+
+# Sorts after every character a key can continue with
+MAX_CHAR = "\U0010ffff"
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace"""
+    return " ".join(text.lower().split())
+
+class PrefixIndex:
+    """
+    Ranked prefix lookup over scored entries
+
+    Entries are (key, value) pairs with a score, e.g. a normalized query and
+    how often it was searched. They are kept in one sorted list, so all
+    entries with a prefix are a contiguous range found by binary search.
+    Short prefixes match huge ranges, so their best entries are kept
+    precomputed; longer prefixes scan their (small) range.
+
+    Each precomputed list holds the best entries of its prefix, at least
+    top_k of them (or all, if the prefix has fewer) and up to twice that.
+    Lowering a listed entry's score can only push it out of the list, and
+    the range is scanned again only once evictions leave fewer than top_k,
+    so even the empty prefix (every entry) is rescanned rarely.
+    """
+
+    def __init__(self, top_k: int = 40, short_prefix: int = 3):
+        """
+        Initialize prefix index
+
+        Args:
+            top_k: Entries kept per short prefix
+            short_prefix: Longest prefix with precomputed top entries
+        """
+        self.top_k = top_k
+        self.short_prefix = short_prefix
+        # Entries kept per short prefix: the slack above top_k absorbs
+        # evictions between rescans
+        self.capacity = 2 * top_k
+        self._scores: Dict[str, float] = {}
+        self._entries: List[str] = []
+        self._top: Dict[str, List[Tuple[float, str]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def load(self, entries: Iterable[Tuple[str, str, float]]) -> None:
+        """
+        Replace the contents with (key, value, score) entries; scores of
+        repeated entries add up
+        """
+        scores: Dict[str, float] = {}
+        for key, value, score in entries:
+            entry = f"{normalize(key)}{SEPARATOR}{value}"
+            scores[entry] = scores.get(entry, 0) + score
+        self._scores = {entry: score for entry, score in scores.items() if score > 0}
+        self._entries = sorted(self._scores)
+
+        # Visit entries best first, so each prefix's list fills up in order
+        top: Dict[str, List[Tuple[float, str]]] = {}
+        for entry in sorted(self._entries, key=lambda entry: -self._scores[entry]):
+            for prefix in self._prefixes(entry):
+                best = top.setdefault(prefix, [])
+                if len(best) < self.capacity:
+                    best.append((self._scores[entry], entry))
+        self._top = top
+
+    def add(self, key: str, value: str, score: float = 1) -> None:
+        """Add to an entry's score, removing the entry once it drops to zero"""
+        entry = f"{normalize(key)}{SEPARATOR}{value}"
+        previous = self._scores.get(entry, 0)
+        new = previous + score
+        if new > 0:
+            if not previous:
+                bisect.insort(self._entries, entry)
+            self._scores[entry] = new
+        elif previous:
+            del self._scores[entry]
+            del self._entries[bisect.bisect_left(self._entries, entry)]
+        else:
+            return
+
+        for prefix in self._prefixes(entry):
+            listed = self._top.get(prefix, [])
+            # Lists shorter than top_k hold every entry of their prefix
+            complete = len(listed) < self.top_k
+            best = [item for item in listed if item[1] != entry]
+            # Entries outside the list rank below its last entry, so the
+            # entry belongs in the list only if it still ranks above that
+            if new > 0 and (complete or (best and (-new, entry) < (-best[-1][0], best[-1][1]))):
+                best.append((new, entry))
+                best.sort(key=lambda item: (-item[0], item[1]))
+                del best[self.capacity:]
+            elif not complete and len(best) < self.top_k:
+                # Too few left to answer top_k: refill from the range
+                best = self._scan(prefix, self.capacity)
+            if best:
+                self._top[prefix] = best
+            else:
+                self._top.pop(prefix, None)
+
+    def search(self, prefix: str, limit: int) -> List[str]:
+        """Values of the best entries whose key starts with prefix"""
+        prefix = normalize(prefix)
+        if len(prefix) <= self.short_prefix and limit <= self.top_k:
+            best = self._top.get(prefix, [])[:limit]
+        else:
+            best = self._scan(prefix, limit)
+        return [entry.split(SEPARATOR, 1)[1] for _, entry in best]
+
+    def _scan(self, prefix: str, limit: int) -> List[Tuple[float, str]]:
+        start = bisect.bisect_left(self._entries, prefix)
+        end = bisect.bisect_left(self._entries, prefix + MAX_CHAR, start)
+        best = heapq.nsmallest(
+            limit,
+            ((-self._scores[entry], entry) for entry in self._entries[start:end])
+        )
+        return [(-score, entry) for score, entry in best]
+
+    def _prefixes(self, entry: str) -> List[str]:
+        key = entry.split(SEPARATOR, 1)[0]
+        return [key[:length] for length in range(min(self.short_prefix, len(key)) + 1)]
@@ -0,0 +1,123 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+# Times a job is run again after another job's failure replaced its executor
+MAX_RETRIES = 2
+
+def _limit_worker_memory(memory_limit_mb: int) -> None:
+    """Cap the address space of a pool worker process"""
+    if memory_limit_mb <= 0:
+        return
+    try:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    except (ImportError, ValueError, OSError) as e:
+        # resource is POSIX-only and some platforms refuse RLIMIT_AS
+        print(f"Could not set worker memory limit: {e}")
+
+class ExtractionPool:
+    """
+    Process pool for CPU-bound document extraction and chunking
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        job_timeout: float = 300.0,
+        memory_limit_mb: int = 0
+    ):
+        """
+        Initialize extraction pool
+
+        Args:
+            max_workers: Number of worker processes (defaults to CPU count - 1)
+            job_timeout: Maximum number of seconds a single job may run
+            memory_limit_mb: Address space limit per worker in MB (0 disables)
+        """
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.job_timeout = job_timeout
+        self.memory_limit_mb = memory_limit_mb
+        self._executor = None
+        # Incremented whenever the executor is replaced, so that failures
+        # of jobs that ran on a replaced executor are told apart
+        self._generation = 0
+        self._slots = None
+
+    def _get_executor(self) -> Tuple[ProcessPoolExecutor, int]:
+        """Get the executor and its generation, creating it on first use"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_limit_worker_memory,
+                initargs=(self.memory_limit_mb,)
+            )
+        return self._executor, self._generation
+
+    def _reset(self, generation: int) -> None:
+        """
+        Kill all workers of the given executor generation so that a
+        runaway job cannot hold a slot; the next job starts a new executor
+        """
+        executor = self._executor
+        if executor is None or generation != self._generation:
+            # Already replaced because of another job
+            return
+        self._executor = None
+        self._generation += 1
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        # Jobs still running on it fail with BrokenProcessPool and are
+        # retried on the new executor by run()
+        executor.shutdown(wait=False)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run a picklable function in a worker process
+
+        A job that times out takes down the workers it shares an executor
+        with; the other jobs that were running on it are run again on a
+        new one.
+
+        Args:
+            func: Module-level function to run
+            *args: Picklable arguments for the function
+
+        Returns:
+            Return value of the function
+        """
+        # Jobs wait here rather than in the executor's queue, so that the
+        # timeout only counts the time a job actually runs
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            for attempt in range(MAX_RETRIES + 1):
+                executor, generation = self._get_executor()
+                future = loop.run_in_executor(executor, func, *args)
+                try:
+                    return await asyncio.wait_for(future, timeout=self.job_timeout)
+                except asyncio.TimeoutError:
+                    # The worker keeps running after the await is cancelled,
+                    # so the only way to reclaim it is to replace the pool
+                    self._reset(generation)
+                    raise TimeoutError(f"Extraction job exceeded {self.job_timeout} seconds")
+                except BrokenProcessPool:
+                    if generation != self._generation and attempt < MAX_RETRIES:
+                        # Another job's failure replaced the executor
+                        continue
+                    # A worker died, e.g. killed by the OOM killer or by a
+                    # crash in native code. A job exceeding the memory limit
+                    # normally raises MemoryError itself instead.
+                    self._reset(generation)
+                    raise BrokenProcessPool("Extraction worker terminated unexpectedly")
+
+    def shutdown(self) -> None:
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,154 @@
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Words worth correcting: letters only, at least three of them
+WORD_PATTERN = re.compile(r"[^\W\d_]{3,}")
+
+def count_words(text: str) -> Counter:
+    """Lowercased words of a text with their counts"""
+    return Counter(match.group(0).lower() for match in WORD_PATTERN.finditer(text))
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (Levenshtein plus transpositions),
+    or limit + 1 once it is certain to exceed limit
+    """
+    # A common prefix or suffix costs nothing
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if not a or not b:
+        return len(a) or len(b)
+
+    # Cells more than limit off the diagonal exceed limit anyway
+    exceeded = limit + 1
+    previous_previous: List[int] = []
+    previous = [j if j <= limit else exceeded for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [exceeded] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        row_min = current[0]
+        char = a[i - 1]
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            if char == b[j - 1]:
+                value = previous[j - 1]
+            else:
+                value = min(previous[j], current[j - 1], previous[j - 1]) + 1
+                if i > 1 and j > 1 and char == b[j - 2] and a[i - 2] == b[j - 1]:
+                    value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > limit:
+            return exceeded
+        previous_previous, previous = previous, current
+    return min(previous[-1], exceeded)
+
+class SymSpell:
+    """
+    Symmetric delete spelling correction
+
+    Every dictionary word is indexed under the strings obtained by deleting
+    up to max_distance characters from its first prefix_length characters.
+    A lookup generates the same deletes of the input, so candidates within
+    the edit distance are found by dictionary lookups instead of comparing
+    against every word; only those candidates are checked with a real
+    edit distance.
+    """
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7, min_count: int = 1):
+        """
+        Initialize spelling index
+
+        Args:
+            max_distance: Largest edit distance corrections are looked up at
+            prefix_length: Characters of each word the deletes are made from
+            min_count: Occurrences before a word is a correction target
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.min_count = max(1, min_count)
+        self.counts: Dict[str, int] = {}
+        self._deletes: Dict[str, List[str]] = {}
+        self.words = 0
+
+    def __contains__(self, word: str) -> bool:
+        return self.counts.get(word, 0) >= self.min_count
+
+    def add(self, word: str, count: int = 1) -> None:
+        """Count a word, indexing it once it reaches min_count"""
+        previous = self.counts.get(word, 0)
+        self.counts[word] = previous + count
+        if previous < self.min_count <= previous + count:
+            self.words += 1
+            for delete in self._edits(word[:self.prefix_length]):
+                self._deletes.setdefault(delete, []).append(word)
+
+    def update(self, counts: Dict[str, int]) -> None:
+        for word, count in counts.items():
+            self.add(word, count)
+
+    def lookup(self, term: str, max_distance: Optional[int] = None, limit: int = 1) -> List[Tuple[str, int, int]]:
+        """
+        Dictionary words closest to term
+
+        Returns:
+            (word, distance, count) tuples, closest and then most frequent first
+        """
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        term = term.lower()
+        if term in self:
+            return [(term, 0, self.counts[term])]
+
+        # A word at distance d is reached with at most d deletes of the
+        # input, so deletes are visited fewest first and, when only the
+        # best correction is wanted, the search stops at its distance
+        found: List[Tuple[str, int, int]] = []
+        checked: Set[str] = set()
+        prefix = term[:self.prefix_length]
+        level = {prefix}
+        seen = {prefix}
+        for deleted in range(max_distance + 1):
+            if deleted > max_distance:
+                break
+            for delete in level:
+                for word in self._deletes.get(delete, ()):
+                    if abs(len(word) - len(term)) > max_distance or word in checked:
+                        continue
+                    checked.add(word)
+                    distance = edit_distance(term, word, max_distance)
+                    if distance <= max_distance:
+                        found.append((word, distance, self.counts[word]))
+                        if limit == 1:
+                            max_distance = distance
+            level = {item[:index] + item[index + 1:] for item in level for index in range(len(item))} - seen
+            seen |= level
+        found = [item for item in found if item[1] <= max_distance]
+        found.sort(key=lambda item: (item[1], -item[2], item[0]))
+        return found[:limit]
+
+    def correct(self, text: str) -> str:
+        """Text with every unknown word replaced by its best correction"""
+        def replace(match: re.Match) -> str:
+            word = match.group(0)
+            suggestions = self.lookup(word)
+            return suggestions[0][0] if suggestions and suggestions[0][1] > 0 else word
+        return WORD_PATTERN.sub(replace, text)
+
+    def _edits(self, word: str, max_distance: Optional[int] = None) -> Iterable[str]:
+        """The word and the strings made by deleting up to max_distance of its characters"""
+        max_distance = self.max_distance if max_distance is None else max_distance
+        edits = {word}
+        level = {word}
+        for _ in range(max_distance):
+            level = {item[:index] + item[index + 1:] for item in level for index in range(len(item))} - edits
+            edits |= level
+        return edits
@@ -0,0 +1,62 @@
+from typing import Iterable
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+
+# Allowance for multipart boundaries and the non-file form fields
+FORM_OVERHEAD = 64 * 1024
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized upload requests while they are being received
+
+    Requests declaring a larger Content-Length are refused before any of
+    the body is read; chunked requests are cut off as soon as the bytes
+    received exceed the limit, instead of being spooled to disk first by
+    the multipart parser.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Iterable[str]):
+        """
+        Initialize middleware
+
+        Args:
+            app: ASGI application to wrap
+            max_bytes: Maximum size of an uploaded file in bytes
+            paths: Request paths the limit applies to
+        """
+        self.app = app
+        self.max_bytes = max_bytes
+        self.limit = max_bytes + FORM_OVERHEAD
+        self.paths = tuple(paths)
+
+    def _too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the maximum size of {self.max_bytes // (1024 * 1024)} MB"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length and length.isdigit() and int(length) > self.limit:
+            error = self._too_large()
+            response = JSONResponse(status_code=error.status_code, content={"detail": error.detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    # Raised inside the body parser, which lets HTTPExceptions through
+                    raise self._too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
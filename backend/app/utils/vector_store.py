@@ -4,83 +4,267 @@ from typing import List, Dict, Any, Optional, Tuple
 import os
 import pickle
 import asyncio
+try:
+    import fcntl
+except ImportError:
+    # No flock on this platform: saves are not serialized across processes
+    fcntl = None
 from app.models.settings import Settings
+from app.utils.chunk_text_store import ChunkTextStore
 
 class VectorStore:
     """
     Vector store class using FAISS to store and query embeddings
+    
+    Every process (the API and any job workers) keeps its own copy of the
+    index. Saves are serialized across processes by a lock file, and a
+    process whose copy is older than the saved index loads the saved one
+    and applies its own unsaved changes on top before saving, so changes
+    made by different processes are merged instead of overwritten.
     """
     
-    def __init__(self, dimension: int = 384, index_type: str = "Flat"):
+    def __init__(self, dimension: int = 384, index_type: str = "Flat", text_store: Optional[ChunkTextStore] = None):
         """
         Initialize vector store with specified dimension and index type
         
         Args:
             dimension: Dimension of embeddings
             index_type: Type of FAISS index (Flat, IVF, HNSW)
+            text_store: Chunk text store kept alongside the index, if any
         """
         self.dimension = dimension
         self.index_type = index_type
+        self.text_store = text_store
         self.index = None
         self.id_map = {}  # Maps FAISS IDs to document chunk IDs
+        self.chunk_ids = {}  # Maps document chunk IDs to FAISS IDs
+        self.next_id = 0
         self.settings = Settings()
         self.index_path = os.path.join("data", "faiss_index.bin")
         self.id_map_path = os.path.join("data", "id_map.pkl")
+        self.lock_path = os.path.join("data", "index.lock")
+        # Signature of the ID map file when it was last loaded or saved
+        self._saved_version = None
+        # Changes since the index was last loaded or saved, by chunk ID:
+        # added vectors, deleted vectors, and replaced text records
+        self._added: Dict[str, None] = {}
+        self._deleted = set()
+        self._texts = set()
+        # Whether the index was reset since it was last loaded or saved
+        self._was_reset = False
         
     async def load_or_create_index(self) -> None:
         """Load existing index or create a new one"""
         # Ensure data directory exists
         os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        self._clear_changes()
         
         # Try to load existing index
-        if os.path.exists(self.index_path) and os.path.exists(self.id_map_path):
-            try:
-                self.index = faiss.read_index(self.index_path)
-                with open(self.id_map_path, "rb") as f:
-                    self.id_map = pickle.load(f)
-                print(f"Loaded existing index with {self.index.ntotal} vectors")
-                return
-            except Exception as e:
-                print(f"Error loading index: {e}")
-                print("Creating new index")
+        lock_file = await asyncio.to_thread(self._lock_saved)
+        try:
+            loaded = self._read_saved()
+        finally:
+            lock_file.close()
+        if loaded:
+            print(f"Loaded existing index with {self.index.ntotal} vectors")
+            return
         
         # Create new index
+        print("Creating new index")
         self._create_index()
+        if self.text_store is not None:
+            self.text_store.reset()
+    
+    def _read_saved(self) -> bool:
+        """
+        Replace the index with the saved one
+        
+        Returns:
+            False if there is no saved index or it could not be read, in
+            which case the index is left as it was
+        """
+        if not (os.path.exists(self.index_path) and os.path.exists(self.id_map_path)):
+            return False
+        try:
+            saved_version = self._saved_signature()
+            index = faiss.read_index(self.index_path)
+            with open(self.id_map_path, "rb") as f:
+                id_map = pickle.load(f)
+        except Exception as e:
+            print(f"Error loading index: {e}")
+            return False
+        self.index = index
+        self.id_map = id_map
+        self._upgrade_index()
+        self._rebuild_lookup()
+        self._saved_version = saved_version
+        if self.text_store is not None:
+            self.text_store.load()
+        return True
     
     def _create_index(self) -> None:
         """Create FAISS index based on index_type"""
-        if self.index_type == "Flat":
-            self.index = faiss.IndexFlatIP(self.dimension)  # Inner product for cosine similarity
-        elif self.index_type == "IVF":
+        if self.index_type == "IVF":
             quantizer = faiss.IndexFlatIP(self.dimension)
             self.index = faiss.IndexIVFFlat(quantizer, self.dimension, 100)
             self.index.train(np.random.random((1000, self.dimension)).astype(np.float32))
+            self._upgrade_index()
         elif self.index_type == "HNSW":
-            self.index = faiss.IndexHNSWFlat(self.dimension, 32)
+            # Flat and HNSW indexes only store vectors by position, so they
+            # are wrapped to keep stable IDs across deletions
+            self.index = faiss.IndexIDMap2(faiss.IndexHNSWFlat(self.dimension, 32))
         else:
-            # Default to Flat index
-            self.index = faiss.IndexFlatIP(self.dimension)
+            # Flat (and default) index, inner product for cosine similarity
+            self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension))
         
         self.id_map = {}
+        self._rebuild_lookup()
         print(f"Created new {self.index_type} index with dimension {self.dimension}")
     
+    def _rebuild_lookup(self) -> None:
+        """Rebuild the chunk ID -> FAISS ID map and the next free FAISS ID"""
+        self.chunk_ids = {chunk_id: faiss_id for faiss_id, chunk_id in self.id_map.items()}
+        self.next_id = max(self.id_map) + 1 if self.id_map else 0
+    
+    def _upgrade_index(self) -> None:
+        """
+        Wrap an index saved without ID support, keeping its vectors, and
+        let IVF indexes look up vectors by ID (merging saves needs it)
+        """
+        if isinstance(self.index, faiss.IndexIVF):
+            if self.index.direct_map.type == faiss.DirectMap.NoMap:
+                self.index.set_direct_map_type(faiss.DirectMap.Hashtable)
+            return
+        if isinstance(self.index, faiss.IndexIDMap):
+            return
+        
+        # Vectors were stored by position, which is what id_map refers to
+        legacy = self.index
+        count = legacy.ntotal
+        vectors = legacy.reconstruct_n(0, count) if count else None
+        legacy.reset()
+        self.index = faiss.IndexIDMap2(legacy)
+        if vectors is not None:
+            self.index.add_with_ids(vectors, np.arange(count).astype(np.int64))
+        self.id_map = {faiss_id: chunk_id for faiss_id, chunk_id in self.id_map.items() if faiss_id < count}
+        print(f"Upgraded index to stable IDs ({self.index.ntotal} vectors)")
+    
+    def _lock_saved(self):
+        """
+        Take the lock serializing access to the saved index across
+        processes, returning the open lock file (closing it releases the
+        lock)
+        """
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        lock_file = open(self.lock_path, "a")
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        return lock_file
+    
+    def _saved_signature(self) -> Optional[Tuple[int, int, int]]:
+        """
+        Modification time, inode and size of the saved ID map: every save
+        replaces the file, and the inode and size tell apart saves within
+        the file system's timestamp resolution
+        """
+        try:
+            stat = os.stat(self.id_map_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+    
+    def _saved_changed(self) -> bool:
+        """Whether another process saved the index since this one last loaded or saved it"""
+        version = self._saved_signature()
+        return version is not None and version != self._saved_version
+    
+    def _merge_saved(self) -> None:
+        """Load the saved index and apply this process's unsaved changes to it"""
+        # Read what this copy added before it is replaced
+        added_ids = [chunk_id for chunk_id in self._added if chunk_id in self.chunk_ids]
+        vectors = [self.index.reconstruct(self.chunk_ids[chunk_id]) for chunk_id in added_ids]
+        text_ids = [chunk_id for chunk_id in self._texts if chunk_id in self.chunk_ids]
+        texts = self.get_chunk_texts(added_ids + text_ids)
+        
+        if not self._read_saved():
+            # Nothing readable to merge with: this copy is saved as it is
+            return
+        if self._was_reset:
+            self._create_index()
+            if self.text_store is not None:
+                self.text_store.reset()
+        # Chunks added here replace any saved copy of themselves
+        self._remove(list(self._deleted) + added_ids)
+        if added_ids:
+            self._add(np.array(vectors, dtype=np.float32).reshape(-1, self.dimension), added_ids)
+        self.put_chunk_texts(list(texts.values()))
+        print(
+            f"Merged saved index: {len(added_ids)} vectors added, "
+            f"{len(self._deleted)} deleted, {self.index.ntotal} in total"
+        )
+    
+    def _clear_changes(self) -> None:
+        self._added = {}
+        self._deleted = set()
+        self._texts = set()
+        self._was_reset = False
+    
+    async def reload_if_changed(self) -> bool:
+        """
+        Load the index again if another process saved it since, returning
+        whether it did
+        
+        Changes of this process that are not saved yet (e.g. ingestion
+        batches added with save=False) are applied to the loaded index.
+        """
+        if not self._saved_changed():
+            return False
+        lock_file = await asyncio.to_thread(self._lock_saved)
+        try:
+            self._merge_saved()
+        finally:
+            lock_file.close()
+        return True
+    
     async def save_index(self) -> None:
-        """Save index and ID map to disk"""
+        """
+        Save index and ID map to disk
+        
+        If another process saved since this one last loaded or saved, its
+        index is loaded first and this process's changes are applied to it.
+        """
         try:
-            faiss.write_index(self.index, self.index_path)
-            with open(self.id_map_path, "wb") as f:
-                pickle.dump(self.id_map, f)
+            # Waiting for another process's save must not block the event loop
+            lock_file = await asyncio.to_thread(self._lock_saved)
+            try:
+                if self._saved_changed():
+                    self._merge_saved()
+                # Write then rename, so other processes never load a partial file;
+                # the ID map goes last and marks the save as complete
+                faiss.write_index(self.index, f"{self.index_path}.tmp")
+                os.replace(f"{self.index_path}.tmp", self.index_path)
+                if self.text_store is not None:
+                    self.text_store.save()
+                with open(f"{self.id_map_path}.tmp", "wb") as f:
+                    pickle.dump(self.id_map, f)
+                os.replace(f"{self.id_map_path}.tmp", self.id_map_path)
+                self._saved_version = self._saved_signature()
+                self._clear_changes()
+            finally:
+                lock_file.close()
             print(f"Saved index with {self.index.ntotal} vectors")
         except Exception as e:
             print(f"Error saving index: {e}")
     
-    async def add_embeddings(self, embeddings: List[List[float]], chunk_ids: List[str]) -> None:
+    async def add_embeddings(self, embeddings: List[List[float]], chunk_ids: List[str], save: bool = True) -> None:
         """
         Add embeddings to the index
         
         Args:
             embeddings: List of embedding vectors
             chunk_ids: List of document chunk IDs corresponding to embeddings
+            save: Whether to persist the index after adding (callers adding
+                several batches can save once at the end instead)
         """
         if len(embeddings) == 0:
             return
@@ -91,19 +275,30 @@ class VectorStore:
         # Normalize embeddings for cosine similarity
         faiss.normalize_L2(embeddings_np)
         
-        # Get next available IDs
-        next_id = self.index.ntotal
-        ids = np.arange(next_id, next_id + len(embeddings_np)).astype(np.int64)
+        self._add(embeddings_np, chunk_ids)
+        for chunk_id in chunk_ids:
+            self._added[chunk_id] = None
+            self._deleted.discard(chunk_id)
+            self._texts.discard(chunk_id)
+        
+        # Save index
+        if save:
+            await self.save_index()
+    
+    def _add(self, embeddings_np: np.ndarray, chunk_ids: List[str]) -> None:
+        """Add normalized embeddings under new FAISS IDs"""
+        # Get next available IDs (never reused, so deletions cannot
+        # make two chunks share an ID)
+        ids = np.arange(self.next_id, self.next_id + len(embeddings_np)).astype(np.int64)
+        self.next_id += len(embeddings_np)
         
         # Add embeddings to index
         self.index.add_with_ids(embeddings_np, ids)
         
-        # Update ID map
+        # Update ID maps
         for i, chunk_id in enumerate(chunk_ids):
             self.id_map[int(ids[i])] = chunk_id
-        
-        # Save index
-        await self.save_index()
+            self.chunk_ids[chunk_id] = int(ids[i])
     
     async def search(self, query_embedding: List[float], limit: int = 10, min_score: float = 0.0) -> List[Dict[str, Any]]:
         """
@@ -142,65 +337,84 @@ class VectorStore:
                 
         return results
     
-    async def delete_embeddings(self, chunk_ids: List[str]) -> None:
+    async def delete_embeddings(self, chunk_ids: List[str], save: bool = True) -> None:
         """
         Delete embeddings from the index
         
         Args:
             chunk_ids: List of document chunk IDs to delete
+            save: Whether to persist the index after deleting
         """
+        if not self._remove(chunk_ids):
+            return
+        for chunk_id in chunk_ids:
+            self._added.pop(chunk_id, None)
+            self._texts.discard(chunk_id)
+            self._deleted.add(chunk_id)
+        
+        # Save index
+        if save:
+            await self.save_index()
+    
+    def _remove(self, chunk_ids: List[str]) -> int:
+        """Remove the embeddings of chunks, returning how many were in the index"""
         # Find FAISS IDs to remove
-        faiss_ids = []
-        for faiss_id, chunk_id in self.id_map.items():
-            if chunk_id in chunk_ids:
-                faiss_ids.append(faiss_id)
+        faiss_ids = [self.chunk_ids.pop(chunk_id) for chunk_id in set(chunk_ids) if chunk_id in self.chunk_ids]
         
         if not faiss_ids:
-            return
-            
-        # Remove from FAISS index
-        # Note: FAISS doesn't support direct deletion in all index types
-        # For simplicity, we'll recreate the index excluding deleted items
-        # This is inefficient for large indexes but works for demonstration
-        
-        # Get all vectors
-        all_ids = np.arange(self.index.ntotal).astype(np.int64)
-        all_vectors = np.zeros((self.index.ntotal, self.dimension), dtype=np.float32)
-        
-        for i in range(self.index.ntotal):
-            if i not in faiss_ids:
-                # Construct a query to get the vector
-                query = np.zeros((1, self.dimension), dtype=np.float32)
-                query[0, 0] = 1.0  # Just a placeholder
-                _, indices = self.index.search(query, self.index.ntotal)
-                if i in indices[0]:
-                    vector_idx = np.where(indices[0] == i)[0][0]
-                    all_vectors[i] = query[0]
+            return 0
         
-        # Create new index
-        self._create_index()
+        for faiss_id in faiss_ids:
+            del self.id_map[faiss_id]
+        if self.text_store is not None:
+            self.text_store.delete(faiss_ids)
         
-        # Add vectors back, excluding deleted ones
-        new_vectors = []
-        new_ids = []
-        new_id_map = {}
-        
-        next_id = 0
-        for i, vector in enumerate(all_vectors):
-            if i not in faiss_ids:
-                new_vectors.append(vector)
-                new_ids.append(next_id)
-                new_id_map[next_id] = self.id_map[i]
-                next_id += 1
-        
-        if new_vectors:
-            self.index.add(np.array(new_vectors))
-            self.id_map = new_id_map
-            
-        # Save index
-        await self.save_index()
+        try:
+            self.index.remove_ids(np.array(faiss_ids, dtype=np.int64))
+        except RuntimeError:
+            # HNSW graphs do not support removal: rebuild from the vectors
+            # that remain, keeping their IDs
+            remaining = np.array(sorted(self.id_map), dtype=np.int64)
+            vectors = np.array([self.index.reconstruct(int(faiss_id)) for faiss_id in remaining], dtype=np.float32)
+            id_map = self.id_map
+            self._create_index()
+            if len(remaining):
+                self.index.add_with_ids(vectors.reshape(-1, self.dimension), remaining)
+            self.id_map = id_map
+            self._rebuild_lookup()
+        return len(faiss_ids)
+    
+    def put_chunk_texts(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Store chunk text records in the text store, if there is one
+        
+        Args:
+            records: Records with the chunk "id" (see app.services.hydration);
+                chunks not in the index are skipped
+        """
+        if self.text_store is None:
+            return
+        records = [record for record in records if record["id"] in self.chunk_ids]
+        self.text_store.put([(self.chunk_ids[record["id"]], record) for record in records])
+        self._texts.update(record["id"] for record in records if record["id"] not in self._added)
+    
+    def get_chunk_texts(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Get the text store records of chunks, by chunk ID"""
+        records = {}
+        if self.text_store is None:
+            return records
+        for chunk_id in chunk_ids:
+            faiss_id = self.chunk_ids.get(chunk_id)
+            record = self.text_store.get(faiss_id) if faiss_id is not None else None
+            if record is not None:
+                records[chunk_id] = record
+        return records
     
     async def reset_index(self) -> None:
         """Reset the index, removing all embeddings"""
         self._create_index()
+        if self.text_store is not None:
+            self.text_store.reset()
+        self._clear_changes()
+        self._was_reset = True
         await self.save_index()
\ No newline at end of file
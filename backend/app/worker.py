@@ -0,0 +1,75 @@
+"""
+Ingestion job worker
+
+Runs the jobs of the durable ingestion queue. With JOB_WORKERS_IN_PROCESS
+(the default) the API process starts a worker itself; otherwise run one or
+more dedicated worker processes next to the API.
+
+Usage (from the backend directory):
+    python -m app.worker
+"""
+import asyncio
+from typing import Optional
+from app.dependencies import (
+    get_database, get_vector_store, get_embedding_model, get_job_queue, get_settings, close_resources
+)
+from app.models.document import Document
+from app.models.job import Job
+from app.services.job_queue import JobWorker, FETCH_QUEUE, PROCESS_QUEUE, PROCESS_DOCUMENT
+
+# Worker running in this process, if any
+_worker: Optional[JobWorker] = None
+
+async def process_document_job(job: Job) -> None:
+    """Chunk and embed a document; an error recorded on the document fails the attempt"""
+    # Imported here because the router imports the services package
+    from app.routers.documents import process_document_task
+
+    db = await get_database()
+    document = await db.documents.find_one({"id": job.document_id})
+    if not document:
+        # Deleted while queued: nothing left to do
+        return
+
+    error = await process_document_task(
+        Document(**document),
+        db,
+        await get_vector_store(),
+        await get_embedding_model(),
+        await get_settings(),
+        refetch=job.params.get("refetch", False),
+        replace_existing=job.params.get("replace_existing", False)
+    )
+    if error:
+        raise RuntimeError(error)
+
+async def run_worker() -> None:
+    """Create this process's job worker and run it until cancelled"""
+    global _worker
+    settings = await get_settings()
+    _worker = JobWorker(
+        await get_job_queue(),
+        handlers={PROCESS_DOCUMENT: process_document_job},
+        concurrency={
+            FETCH_QUEUE: settings.job_fetch_concurrency,
+            PROCESS_QUEUE: settings.job_process_concurrency
+        },
+        poll_interval=settings.job_poll_interval
+    )
+    await _worker.run()
+
+def get_worker() -> Optional[JobWorker]:
+    """Get the job worker running in this process, if any"""
+    return _worker
+
+async def main() -> None:
+    try:
+        await run_worker()
+    finally:
+        await close_resources()
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,137 @@
+"""
+Benchmark how chunk embeddings are written to MongoDB
+
+Compares three ways of storing a document's chunks with their embeddings:
+
+- per-chunk: insert the chunks, then one update_one per chunk to set its
+  embedding (the previous ingestion path)
+- bulk-update: insert the chunks, then a single unordered bulk_write of
+  UpdateOne operations
+- insert: insert the chunks already carrying their embeddings, in one
+  insert_many (the ingestion pipeline's path)
+
+By default it runs against an in-memory Mongo stand-in (mongomock-motor)
+with a simulated round-trip time per database call, so the result shows
+the effect of round trips without a server. Pass --mongodb-uri to measure
+a real server instead.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_chunk_writes [--documents 20] [--chunks 100] \\
+        [--dimension 384] [--round-trip-ms 0.5] [--write-concern 1] \\
+        [--mongodb-uri mongodb://localhost:27017/benchmark]
+"""
+import argparse
+import asyncio
+import random
+import time
+from pymongo import UpdateOne, WriteConcern
+from app.models.document import DocumentChunk
+
+class StandInCollection:
+    """
+    Stand-in collection proxy that waits a fixed round-trip time per call
+
+    mongomock cannot run pymongo's bulk operations, so a bulk_write is
+    applied as its individual updates but charged a single round trip, as
+    on a real server.
+    """
+
+    def __init__(self, collection, round_trip: float):
+        self.collection = collection
+        self.round_trip = round_trip
+
+    async def bulk_write(self, requests, ordered: bool = True):
+        await asyncio.sleep(self.round_trip)
+        for request in requests:
+            await self.collection.update_one(request._filter, request._doc)
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(self.round_trip)
+            return await method(*args, **kwargs)
+        return call
+
+def make_chunks(documents: int, chunks: int, dimension: int):
+    """Random chunks and embeddings, grouped by document"""
+    batches = []
+    for document in range(documents):
+        batch = []
+        for index in range(chunks):
+            chunk = DocumentChunk(
+                document_id=f"document-{document}",
+                content=f"Chunk {index} of document {document}. " * 20,
+                chunk_index=index
+            )
+            batch.append((chunk, [random.random() for _ in range(dimension)]))
+        batches.append(batch)
+    return batches
+
+async def write_per_chunk(collection, batch) -> None:
+    await collection.insert_many([chunk.dict() for chunk, _ in batch])
+    for chunk, embedding in batch:
+        await collection.update_one({"id": chunk.id}, {"$set": {"embedding": embedding}})
+
+async def write_bulk_update(collection, batch) -> None:
+    await collection.insert_many([chunk.dict() for chunk, _ in batch])
+    await collection.bulk_write(
+        [UpdateOne({"id": chunk.id}, {"$set": {"embedding": embedding}}) for chunk, embedding in batch],
+        ordered=False
+    )
+
+async def write_insert(collection, batch) -> None:
+    documents = []
+    for chunk, embedding in batch:
+        chunk.embedding = embedding
+        documents.append(chunk.dict())
+    await collection.insert_many(documents, ordered=False)
+
+STRATEGIES = {
+    "per-chunk": write_per_chunk,
+    "bulk-update": write_bulk_update,
+    "insert": write_insert
+}
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=20, help="Documents per run")
+    parser.add_argument("--chunks", type=int, default=100, help="Chunks per document")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--round-trip-ms", type=float, default=0.5, help="Simulated round trip per call (stand-in only)")
+    parser.add_argument("--write-concern", default="1", help='Write concern w: "majority", "1" or "0"')
+    parser.add_argument("--mongodb-uri", default=None, help="Benchmark a real server instead of the stand-in")
+    args = parser.parse_args()
+
+    if args.mongodb_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        db = AsyncIOMotorClient(args.mongodb_uri).get_database()
+        round_trip = 0.0
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        db = AsyncMongoMockClient().get_database("benchmark")
+        round_trip = args.round_trip_ms / 1000
+
+    w = args.write_concern
+    write_concern = WriteConcern(w=int(w) if w.isdigit() else w)
+    total = args.documents * args.chunks
+    print(f"{args.documents} documents x {args.chunks} chunks, dimension {args.dimension}, w={w}")
+
+    for name, write in STRATEGIES.items():
+        collection = db.get_collection(f"benchmark_chunks_{name.replace('-', '_')}", write_concern=write_concern)
+        await collection.drop()
+        await collection.create_index("id", unique=True)
+        if not args.mongodb_uri:
+            collection = StandInCollection(collection, round_trip)
+
+        batches = make_chunks(args.documents, args.chunks, args.dimension)
+        started = time.perf_counter()
+        for batch in batches:
+            await write(collection, batch)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>12}: {elapsed:8.3f}s  {total / elapsed:10.1f} chunks/s")
+
+        await db.drop_collection(f"benchmark_chunks_{name.replace('-', '_')}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+"""
+Benchmark HTML text extraction on a corpus of saved pages
+
+Compares the lxml extractor used for ingestion against the previous
+BeautifulSoup (html.parser + get_text) path, reporting parse time and
+how much text each keeps.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_html_extraction path/to/pages [--repeat 3]
+"""
+import argparse
+import glob
+import os
+import re
+import statistics
+import time
+from bs4 import BeautifulSoup
+from app.utils.html_extractor import parse_html_page
+
+def baseline_html_to_text(html: str) -> str:
+    """The previous extraction path: whole-page text from html.parser"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    return re.sub(r'\s+', ' ', soup.get_text()).strip()
+
+def lxml_html_to_text(html: str) -> str:
+    return parse_html_page(html)["text"]
+
+def load_corpus(path: str):
+    """Read every .html/.htm file under path"""
+    files = sorted(
+        glob.glob(os.path.join(path, "**", "*.html"), recursive=True) +
+        glob.glob(os.path.join(path, "**", "*.htm"), recursive=True)
+    )
+    pages = []
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8", errors="replace") as file:
+            pages.append(file.read())
+    return pages
+
+def run(extract, pages, repeat: int):
+    """Time extract over the corpus; returns (per-page seconds, total characters)"""
+    timings = []
+    characters = 0
+    for _ in range(repeat):
+        characters = 0
+        for html in pages:
+            start = time.perf_counter()
+            text = extract(html)
+            timings.append(time.perf_counter() - start)
+            characters += len(text)
+    return timings, characters
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", help="Directory of saved HTML pages")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of passes over the corpus")
+    args = parser.parse_args()
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        parser.error(f"No .html files found in {args.corpus}")
+    size_mb = sum(len(html) for html in pages) / (1024 * 1024)
+    print(f"{len(pages)} pages, {size_mb:.1f} MB, {args.repeat} passes\n")
+
+    results = {}
+    for name, extract in (("bs4/html.parser", baseline_html_to_text), ("lxml", lxml_html_to_text)):
+        timings, characters = run(extract, pages, args.repeat)
+        results[name] = sum(timings)
+        print(
+            f"{name:16} total {sum(timings):8.3f}s  "
+            f"median {statistics.median(timings) * 1000:7.2f} ms/page  "
+            f"p95 {sorted(timings)[int(len(timings) * 0.95)] * 1000:7.2f} ms/page  "
+            f"{len(timings) / sum(timings):8.1f} pages/s  "
+            f"{characters / len(pages):9.0f} chars/page"
+        )
+
+    print(f"\nSpeedup: {results['bs4/html.parser'] / results['lxml']:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Measure the bytes search and chat hydration queries return
+
+Runs random vector-search-sized hydrations (limit chunk IDs each) with the
+previous unprojected queries and with the projections now used by search
+and chat, and reports the average BSON bytes returned per query. Against
+a real server (--mongodb-uri) it also checks with explain() that the
+chunk lookup without content is covered by the (id, document_id) index.
+
+By default a synthetic corpus is built in an in-memory stand-in
+(mongomock-motor), with embeddings stored as arrays of doubles as before
+EMBEDDING_STORAGE existed. The stand-in cannot evaluate $substrCP, so the
+chat snippet projection is only measured against a real server.
+
+Usage (from the backend directory):
+    python -m scripts.benchmark_hydration [--documents 200] [--chunks 20] \\
+        [--queries 50] [--limit 20] [--mongodb-uri mongodb://localhost:27017/benchmark]
+"""
+import argparse
+import asyncio
+import random
+import bson
+from app.models.document import Document, DocumentChunk
+from app.services.hydration import (
+    hydrate, chunk_projection, document_projection, SEARCH_DOCUMENT_FIELDS, CHAT_DOCUMENT_FIELDS
+)
+from app.utils.embedding_storage import chunk_document
+
+WORDS = "semantic search vector index query document embedding model ranking retrieval chunk token".split()
+
+def text(words: int) -> str:
+    return " ".join(random.choice(WORDS) for _ in range(words)) + "."
+
+async def build_corpus(db, documents: int, chunks: int, dimension: int):
+    await db.documents.drop()
+    await db.document_chunks.drop()
+    await db.document_chunks.create_index("id", unique=True)
+    await db.document_chunks.create_index([("id", 1), ("document_id", 1)])
+    await db.documents.create_index("id", unique=True)
+
+    chunk_ids = []
+    for _ in range(documents):
+        document = Document(
+            title=text(6),
+            content=text(chunks * 150),
+            tags=random.sample(WORDS, 3),
+            metadata={"source": "benchmark", "author": text(2)}
+        )
+        await db.documents.insert_one(document.dict())
+        batch = []
+        for index in range(chunks):
+            chunk = DocumentChunk(
+                document_id=document.id,
+                content=text(150),
+                chunk_index=index,
+                embedding=[random.random() for _ in range(dimension)]
+            )
+            batch.append(chunk_document(chunk, "array"))
+            chunk_ids.append(chunk.id)
+        await db.document_chunks.insert_many(batch)
+    return chunk_ids
+
+def size(results) -> int:
+    chunks_map, documents_map = results
+    return sum(len(bson.encode(item)) for item in list(chunks_map.values()) + list(documents_map.values()))
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200, help="Documents in the corpus")
+    parser.add_argument("--chunks", type=int, default=20, help="Chunks per document")
+    parser.add_argument("--dimension", type=int, default=384, help="Embedding dimension")
+    parser.add_argument("--queries", type=int, default=50, help="Hydrations per variant")
+    parser.add_argument("--limit", type=int, default=20, help="Chunk IDs per hydration (search fetches limit * 2)")
+    parser.add_argument("--mongodb-uri", default=None, help="Benchmark a real server instead of the stand-in")
+    args = parser.parse_args()
+
+    if args.mongodb_uri:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        db = AsyncIOMotorClient(args.mongodb_uri).get_database()
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        db = AsyncMongoMockClient().get_database("benchmark")
+
+    chunk_ids = await build_corpus(db, args.documents, args.chunks, args.dimension)
+    samples = [random.sample(chunk_ids, args.limit) for _ in range(args.queries)]
+
+    variants = {
+        "unprojected (before)": ({}, {}),
+        "search, content": (chunk_projection(True), document_projection(SEARCH_DOCUMENT_FIELDS)),
+        "search, no content": (chunk_projection(False), document_projection(SEARCH_DOCUMENT_FIELDS)),
+    }
+    if args.mongodb_uri:
+        variants["chat snippets"] = (chunk_projection(True, 201), document_projection(CHAT_DOCUMENT_FIELDS))
+
+    baseline = None
+    print(f"{args.documents * args.chunks} chunks, {args.limit} chunk IDs per query")
+    for name, (chunk_fields, document_fields) in variants.items():
+        total = 0
+        for sample in samples:
+            total += size(await hydrate(db, sample, chunk_fields or None, document_fields or None))
+        per_query = total / len(samples)
+        baseline = baseline or per_query
+        print(f"{name:>22}: {per_query:10.0f} bytes/query  ({per_query / baseline:6.1%} of before)")
+
+    if args.mongodb_uri:
+        explain = await db.document_chunks.find(
+            {"id": {"$in": samples[0]}}, chunk_projection(False)
+        ).explain()
+        examined = explain.get("executionStats", {}).get("totalDocsExamined")
+        print(f"Chunk lookup without content examined {examined} documents (0 = covered)")
+
+    await db.documents.drop()
+    await db.document_chunks.drop()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Build the local chunk text store from the database
+
+Writes a chunk text store record (text plus the document's search fields)
+for every chunk in the FAISS index, as a fresh generation of the store, so
+search can hydrate results without querying the database. Run it after
+enabling CHUNK_TEXT_STORE on an existing index, or after changing
+CHUNK_TEXT_COMPRESSION. With --compact, only rewrites the live records of
+the existing store, dropping replaced and deleted ones (ingestion compacts
+automatically once most of the file is garbage).
+
+Stop the API and workers first: the store is saved along with the index.
+
+Usage (from the backend directory):
+    python -m scripts.build_chunk_text_store [--batch-size 1000] [--compact]
+"""
+import argparse
+import asyncio
+import time
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.models.settings import Settings
+from app.services.hydration import SEARCH_DOCUMENT_FIELDS, chunk_projection, document_projection, chunk_text_record
+from app.utils.chunk_text_store import ChunkTextStore
+from app.utils.vector_store import VectorStore
+
+async def build(db, vector_store: VectorStore, batch_size: int) -> int:
+    """Write the records of all indexed chunks, returning how many were written"""
+    vector_store.text_store.reset()
+    written = 0
+    started = time.time()
+    documents = {}
+    batch = []
+    cursor = db.document_chunks.find({}, chunk_projection(True)).batch_size(batch_size)
+    async for chunk in cursor:
+        if chunk["id"] in vector_store.chunk_ids:
+            batch.append(chunk)
+        if len(batch) >= batch_size:
+            written += await write_batch(db, vector_store, batch, documents)
+            batch = []
+            print(f"Wrote {written} records ({written / (time.time() - started):.0f}/s)")
+    if batch:
+        written += await write_batch(db, vector_store, batch, documents)
+    return written
+
+async def write_batch(db, vector_store: VectorStore, chunks, documents) -> int:
+    missing = list(set(chunk["document_id"] for chunk in chunks) - set(documents))
+    if missing:
+        cursor = db.documents.find({"id": {"$in": missing}}, document_projection(SEARCH_DOCUMENT_FIELDS))
+        async for document in cursor:
+            documents[document["id"]] = document
+    records = [
+        chunk_text_record(chunk["id"], chunk["document_id"], chunk["content"], documents[chunk["document_id"]])
+        for chunk in chunks if chunk["document_id"] in documents
+    ]
+    vector_store.put_chunk_texts(records)
+    return len(records)
+
+async def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="Chunks read per batch")
+    parser.add_argument("--compact", action="store_true", help="Only compact the existing store")
+    args = parser.parse_args()
+
+    vector_store = VectorStore(
+        dimension=settings.embedding_dimension,
+        index_type=settings.index_type,
+        text_store=ChunkTextStore(compression=settings.chunk_text_compression)
+    )
+    await vector_store.load_or_create_index()
+
+    if args.compact:
+        before = vector_store.text_store.stats()
+        vector_store.text_store.compact()
+    else:
+        db = AsyncIOMotorClient(settings.mongodb_uri).get_database()
+        before = vector_store.text_store.stats()
+        written = await build(db, vector_store, args.batch_size)
+        print(f"Wrote {written} records for {len(vector_store.chunk_ids)} indexed chunks")
+    await vector_store.save_index()
+
+    after = vector_store.text_store.stats()
+    print(f"Store size: {before['file_bytes']} -> {after['file_bytes']} bytes "
+          f"({after['records']} records, compression {after['compression']})")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,144 @@
+"""
+Bulk-ingest a directory tree or a JSONL file through POST /documents/bulk
+
+Directory mode turns every supported file into one document: text and
+Markdown files are sent as they are, HTML files as their extracted main
+text (titled with the page title), and PDFs as their extracted text. JSONL
+mode sends each line as is; lines must have the fields of POST /documents.
+
+Documents are streamed to the server as NDJSON in a single request, so
+nothing is buffered beyond the current file.
+
+Usage (from the backend directory):
+    python -m scripts.bulk_ingest path/to/dir-or-file.jsonl \\
+        [--url http://localhost:8000] [--api-key KEY] [--tag corpus]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import httpx
+from app.utils.html_extractor import parse_html_file
+from app.utils.document_processor import extract_pdf_text
+
+TEXT_EXTENSIONS = (".txt", ".md")
+HTML_EXTENSIONS = (".html", ".htm")
+PDF_EXTENSIONS = (".pdf",)
+
+class Progress:
+    """Prints documents sent and documents per second"""
+
+    def __init__(self, every: int = 1000):
+        self.every = every
+        self.sent = 0
+        self.skipped = 0
+        self.started_at = time.time()
+
+    def add(self) -> None:
+        self.sent += 1
+        if self.sent % self.every == 0:
+            self.report()
+
+    def report(self) -> None:
+        elapsed = time.time() - self.started_at
+        rate = self.sent / elapsed if elapsed > 0 else 0.0
+        print(f"Sent {self.sent} documents ({self.skipped} skipped), {rate:.1f} docs/s", file=sys.stderr)
+
+def file_document(path: str, root: str, tags):
+    """Build a document from a file, or None if the type is not supported"""
+    relative_path = os.path.relpath(path, root)
+    extension = os.path.splitext(path)[1].lower()
+    metadata = {"source_path": relative_path}
+    title = relative_path
+
+    if extension in TEXT_EXTENSIONS:
+        with open(path, "r", encoding="utf-8", errors="replace") as file:
+            content = file.read()
+    elif extension in HTML_EXTENSIONS:
+        page = parse_html_file(path)
+        content = page["text"]
+        title = page["title"] or title
+        metadata["html"] = page["metadata"]
+    elif extension in PDF_EXTENSIONS:
+        content = extract_pdf_text(path)
+    else:
+        return None
+
+    if not content.strip():
+        return None
+    return {"title": title, "content": content, "tags": tags, "metadata": metadata}
+
+def iter_directory(root: str, tags, progress: Progress):
+    """Yield NDJSON lines for the files under root"""
+    for directory, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            path = os.path.join(directory, filename)
+            try:
+                document = file_document(path, root, tags)
+            except Exception as e:
+                print(f"Error reading {path}: {e}", file=sys.stderr)
+                document = None
+            if document is None:
+                progress.skipped += 1
+                continue
+            progress.add()
+            yield json.dumps(document).encode("utf-8") + b"\n"
+
+def iter_jsonl(path: str, tags, progress: Progress):
+    """Yield the lines of a JSONL file, adding tags if requested"""
+    with open(path, "rb") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            if tags:
+                document = json.loads(line)
+                document["tags"] = list(document.get("tags", [])) + tags
+                line = json.dumps(document).encode("utf-8") + b"\n"
+            progress.add()
+            yield line if line.endswith(b"\n") else line + b"\n"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Directory tree or .jsonl file to ingest")
+    parser.add_argument("--url", default=os.getenv("API_URL", "http://localhost:8000"), help="API base URL")
+    parser.add_argument("--api-key", default=os.getenv("API_KEY"), help="API key (defaults to $API_KEY)")
+    parser.add_argument("--tag", action="append", default=[], help="Tag added to every document (repeatable)")
+    parser.add_argument("--progress-every", type=int, default=1000, help="Report progress every N documents")
+    args = parser.parse_args()
+
+    if not args.api_key:
+        parser.error("An API key is required (--api-key or $API_KEY)")
+
+    progress = Progress(args.progress_every)
+    if os.path.isdir(args.source):
+        body = iter_directory(args.source, args.tag, progress)
+    elif os.path.isfile(args.source):
+        body = iter_jsonl(args.source, args.tag, progress)
+    else:
+        parser.error(f"No such file or directory: {args.source}")
+
+    response = httpx.post(
+        f"{args.url.rstrip('/')}/documents/bulk",
+        content=body,
+        headers={"X-API-Key": args.api_key, "Content-Type": "application/x-ndjson"},
+        timeout=httpx.Timeout(None)
+    )
+    progress.report()
+    response.raise_for_status()
+
+    summary = response.json()
+    print(
+        f"{summary['status']}: {summary['documents_processed']} documents indexed, "
+        f"{summary['documents_failed']} failed, {summary['documents_rejected']} rejected, "
+        f"{summary['chunks_indexed']} chunks in {summary['elapsed']}s "
+        f"({summary['documents_per_second']} docs/s)"
+    )
+    for error in summary["errors"]:
+        print(f"  {error}", file=sys.stderr)
+    if summary["status"] != "completed":
+        print(f"Error: {summary['error']}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
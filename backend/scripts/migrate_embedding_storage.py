@@ -0,0 +1,98 @@
+"""
+Convert stored chunk embeddings to another storage mode
+
+Rewrites the embedding of every chunk in document_chunks to the given mode
+(EMBEDDING_STORAGE by default): packed float32 or float16 binary, a BSON
+array of doubles, or none (the field is removed and the FAISS index keeps
+the only copy). Chunks already in the target mode are left alone, so the
+migration can be interrupted and run again.
+
+Storage savings are reported from collStats before and after. The data
+size drops at once; WiredTiger only hands the freed space back to the OS
+after a compact (--compact).
+
+Usage (from the backend directory):
+    python -m scripts.migrate_embedding_storage [--mode float16] [--batch-size 1000] [--compact]
+"""
+import argparse
+import asyncio
+import time
+from bson.binary import Binary
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.models.settings import Settings
+from app.utils.embedding_storage import STORAGE_MODES, decode_embedding, encode_embedding
+
+def in_mode(value, mode: str) -> bool:
+    """Whether a stored embedding is already in the target mode"""
+    if mode == "array":
+        return isinstance(value, list)
+    encoded = encode_embedding([0.0], mode)
+    return isinstance(value, Binary) and value.subtype == encoded.subtype
+
+async def collection_size(db) -> dict:
+    stats = await db.command("collStats", "document_chunks")
+    return {
+        "count": stats.get("count", 0),
+        "size": stats.get("size", 0),
+        "storage_size": stats.get("storageSize", 0),
+        "avg_obj_size": stats.get("avgObjSize", 0)
+    }
+
+def megabytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+async def migrate(db, mode: str, batch_size: int) -> int:
+    """Convert embeddings in batches, returning the number of chunks changed"""
+    chunks = db.document_chunks
+    changed = 0
+    started = time.time()
+    operations = []
+    cursor = chunks.find({"embedding": {"$exists": True}}, {"_id": 1, "embedding": 1}).batch_size(batch_size)
+    async for chunk in cursor:
+        value = chunk["embedding"]
+        if mode == "none":
+            operations.append(UpdateOne({"_id": chunk["_id"]}, {"$unset": {"embedding": ""}}))
+        elif value is None or in_mode(value, mode):
+            continue
+        else:
+            embedding = encode_embedding(decode_embedding(value), mode)
+            operations.append(UpdateOne({"_id": chunk["_id"]}, {"$set": {"embedding": embedding}}))
+
+        if len(operations) >= batch_size:
+            await chunks.bulk_write(operations, ordered=False)
+            changed += len(operations)
+            operations = []
+            print(f"Converted {changed} chunks ({changed / (time.time() - started):.0f}/s)")
+
+    if operations:
+        await chunks.bulk_write(operations, ordered=False)
+        changed += len(operations)
+    return changed
+
+async def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=STORAGE_MODES, default=settings.embedding_storage, help="Target storage mode")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Chunks updated per bulk write")
+    parser.add_argument("--compact", action="store_true", help="Compact the collection afterwards to release disk space")
+    args = parser.parse_args()
+
+    db = AsyncIOMotorClient(settings.mongodb_uri).get_database()
+
+    before = await collection_size(db)
+    changed = await migrate(db, args.mode, args.batch_size)
+    if args.compact:
+        await db.command("compact", "document_chunks")
+    after = await collection_size(db)
+
+    print(f"Converted {changed} of {before['count']} chunks to {args.mode}")
+    print(f"Data size:     {megabytes(before['size'])} -> {megabytes(after['size'])} "
+          f"(saved {megabytes(before['size'] - after['size'])})")
+    print(f"Storage size:  {megabytes(before['storage_size'])} -> {megabytes(after['storage_size'])}")
+    print(f"Average chunk: {before['avg_obj_size']} -> {after['avg_obj_size']} bytes")
+    if not args.compact:
+        print("Run with --compact to release the freed space to the OS")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+import pytest
+
+class FixtureServer:
+    """
+    Local HTTP server answering each path with a canned response
+
+    Register responses with route(); requests to other paths get a 404.
+    Requested paths are recorded in order in `requests`.
+    """
+
+    def __init__(self):
+        self.routes: Dict[str, Tuple[int, Dict[str, str], bytes, float]] = {}
+        self.requests: List[str] = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.path)
+                status, headers, body, delay = server.routes.get(self.path, (404, {}, b"not found", 0.0))
+                if delay:
+                    time.sleep(delay)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                if "Content-Length" not in headers:
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up, e.g. on a timeout or size limit
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def route(
+        self,
+        path: str,
+        body: bytes = b"",
+        status: int = 200,
+        headers: Optional[Dict[str, str]] = None,
+        delay: float = 0.0
+    ) -> None:
+        """Answer GET path with this response, after delay seconds"""
+        self.routes[path] = (status, {"Content-Type": "text/html", **(headers or {})}, body, delay)
+
+    def redirect(self, path: str, location: str, status: int = 301) -> None:
+        self.route(path, status=status, headers={"Location": location})
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+@pytest.fixture
+def fixture_server():
+    server = FixtureServer()
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,102 @@
+import asyncio
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.models.document import Document, DocumentChunk
+from app.services.bulk_ingest_service import BulkIngester
+
+class Processor:
+    async def iter_chunks(self, document, **kwargs):
+        yield [DocumentChunk(document_id=document.id, content=document.content, chunk_index=0)]
+
+class VectorStore:
+    text_store = None
+
+    async def save_index(self):
+        pass
+
+class JobQueue:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.queued = []
+
+    async def enqueue_document(self, document, refetch=False, replace_existing=False):
+        if self.fail:
+            raise ConnectionError("queue unreachable")
+        self.queued.append(document.id)
+
+def ingest(db, job_queue, count: int = 5):
+    """Add documents as the bulk endpoint does, then interrupt the input; returns the ingester's stats"""
+    ingester = BulkIngester(
+        db,
+        VectorStore(),
+        embedding_model=None,
+        processor=Processor(),
+        document_batch_size=2,
+        # Never reached: chunks stay buffered until the input fails
+        embedding_batch_size=100,
+        job_queue=job_queue
+    )
+
+    async def run():
+        error = ConnectionError("client disconnected")
+        try:
+            for number in range(count):
+                await ingester.add(Document(title=f"Document {number}", content=f"text {number}"))
+        except Exception as e:
+            error = e
+        return await ingester.finish(error)
+    return asyncio.run(run())
+
+def accounted(stats) -> int:
+    return stats.documents_processed + stats.documents_failed + stats.documents_requeued
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["test"]
+
+def test_interrupted_ingest_queues_every_received_document(db):
+    job_queue = JobQueue()
+
+    stats = ingest(db, job_queue)
+
+    assert stats.status == "failed"
+    assert stats.documents_received == 5
+    assert stats.documents_requeued == 5
+    assert accounted(stats) == stats.documents_received
+    # The document still buffered when the input failed was stored too
+    assert asyncio.run(db.documents.count_documents({})) == 5
+    assert sorted(job_queue.queued) == sorted(document["id"] for document in asyncio.run(db.documents.find().to_list(None)))
+
+def test_documents_that_cannot_be_queued_count_as_failed(db):
+    stats = ingest(db, JobQueue(fail=True))
+
+    assert stats.documents_failed == 5
+    assert accounted(stats) == stats.documents_received
+    assert len(stats.errors) == 5
+
+def test_without_job_queue_documents_count_as_failed(db):
+    stats = ingest(db, None)
+
+    assert stats.documents_failed == 5
+    assert accounted(stats) == stats.documents_received
+    assert stats.errors == ["5 stored documents were left unprocessed"]
+
+def test_documents_that_cannot_be_stored_count_as_failed(db, monkeypatch):
+    inserts = []
+
+    async def insert_many(self, records, ordered=True):
+        inserts.append(len(records))
+        if len(inserts) > 1:
+            raise ConnectionError("database unreachable")
+        await original(self, records, ordered=ordered)
+    original = type(db.documents).insert_many
+    monkeypatch.setattr(type(db.documents), "insert_many", insert_many)
+
+    stats = ingest(db, JobQueue())
+
+    # The second batch fails to insert and ends the ingest
+    assert stats.documents_received == 4
+    assert stats.documents_requeued == 2
+    assert stats.documents_failed == 2
+    assert accounted(stats) == stats.documents_received
+    assert stats.error == "database unreachable"
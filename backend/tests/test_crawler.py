@@ -0,0 +1,156 @@
+import asyncio
+import gzip
+import pytest
+from app.utils.crawler import SiteCrawler, gunzip
+from app.utils.http_fetcher import HttpFetcher
+
+def page(*links: str) -> bytes:
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    return f"<html><body><p>Some page text worth indexing.</p>{anchors}</body></html>".encode()
+
+def crawl(server, fetcher=None, failing=(), **kwargs):
+    """
+    Crawl the fixture server's site and return (stats, crawled URL paths);
+    ingesting the paths in failing raises
+    """
+    fetcher = fetcher or HttpFetcher()
+    crawled = []
+
+    async def on_page(crawled_page):
+        path = crawled_page.url[len(server.base_url):]
+        if path in failing:
+            raise RuntimeError("Could not extract content from document")
+        crawled.append(path)
+
+    async def run():
+        try:
+            crawler = SiteCrawler(server.url("/"), fetcher, on_page, politeness_delay=0, **kwargs)
+            return await crawler.run()
+        finally:
+            await fetcher.close()
+
+    stats = asyncio.run(run())
+    return stats, crawled
+
+def sitemap(server, *paths: str) -> bytes:
+    urls = "".join(f"<url><loc>{server.url(path)}</loc></url>" for path in paths)
+    return f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'.encode()
+
+def test_robots_disallow(fixture_server):
+    fixture_server.route("/robots.txt", b"User-agent: *\nDisallow: /private\n", headers={"Content-Type": "text/plain"})
+    fixture_server.route("/", page("/public", "/private/secret"))
+    fixture_server.route("/public", page())
+    fixture_server.route("/private/secret", page())
+
+    stats, crawled = crawl(fixture_server, use_sitemaps=False)
+
+    assert stats.status == "completed"
+    assert sorted(crawled) == ["/", "/public"]
+    assert "/private/secret" not in fixture_server.requests
+    assert stats.pages_skipped == 1
+
+def test_missing_robots_allows_everything(fixture_server):
+    fixture_server.route("/", page("/private/secret"))
+    fixture_server.route("/private/secret", page())
+
+    stats, crawled = crawl(fixture_server, use_sitemaps=False)
+
+    assert sorted(crawled) == ["/", "/private/secret"]
+
+def test_robots_ignored_when_not_respected(fixture_server):
+    fixture_server.route("/robots.txt", b"User-agent: *\nDisallow: /\n", headers={"Content-Type": "text/plain"})
+    fixture_server.route("/", page())
+
+    stats, crawled = crawl(fixture_server, use_sitemaps=False, respect_robots=False)
+
+    assert crawled == ["/"]
+    assert "/robots.txt" not in fixture_server.requests
+
+def test_default_sitemap(fixture_server):
+    fixture_server.route("/", page())
+    fixture_server.route("/sitemap.xml", sitemap(fixture_server, "/orphan"), headers={"Content-Type": "application/xml"})
+    fixture_server.route("/orphan", page())
+
+    stats, crawled = crawl(fixture_server)
+
+    assert sorted(crawled) == ["/", "/orphan"]
+
+def test_sitemap_index_from_robots(fixture_server):
+    fixture_server.route(
+        "/robots.txt",
+        f"User-agent: *\nSitemap: {fixture_server.url('/maps/index.xml')}\n".encode(),
+        headers={"Content-Type": "text/plain"}
+    )
+    index = (
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        f"<sitemap><loc>{fixture_server.url('/maps/pages.xml.gz')}</loc></sitemap>"
+        "</sitemapindex>"
+    ).encode()
+    fixture_server.route("/maps/index.xml", index, headers={"Content-Type": "application/xml"})
+    fixture_server.route(
+        "/maps/pages.xml.gz",
+        gzip.compress(sitemap(fixture_server, "/from-sitemap")),
+        headers={"Content-Type": "application/gzip"}
+    )
+    fixture_server.route("/", page())
+    fixture_server.route("/from-sitemap", page())
+
+    stats, crawled = crawl(fixture_server)
+
+    assert sorted(crawled) == ["/", "/from-sitemap"]
+    assert "/sitemap.xml" not in fixture_server.requests
+
+def test_oversized_gzip_sitemap_is_ignored(fixture_server):
+    # A few KB on the wire, far past the fetcher's limit once decompressed
+    data = sitemap(fixture_server, "/from-sitemap") + b" " * 1_000_000
+    fixture_server.route("/sitemap.xml", gzip.compress(data), headers={"Content-Type": "application/gzip"})
+    fixture_server.route("/", page())
+    fixture_server.route("/from-sitemap", page())
+
+    stats, crawled = crawl(fixture_server, fetcher=HttpFetcher(max_bytes=100_000))
+
+    assert stats.status == "completed"
+    assert crawled == ["/"]
+
+def test_max_depth(fixture_server):
+    fixture_server.route("/", page("/1"))
+    fixture_server.route("/1", page("/2"))
+    fixture_server.route("/2", page("/3"))
+    fixture_server.route("/3", page())
+
+    stats, crawled = crawl(fixture_server, use_sitemaps=False, max_depth=2)
+
+    assert crawled == ["/", "/1", "/2"]
+    assert "/3" not in fixture_server.requests
+
+def test_max_pages(fixture_server):
+    links = [f"/p{number}" for number in range(10)]
+    fixture_server.route("/", page(*links))
+    for link in links:
+        fixture_server.route(link, page())
+
+    stats, crawled = crawl(fixture_server, use_sitemaps=False, max_pages=4)
+
+    assert stats.pages_fetched == 4
+    assert len(crawled) == 4
+
+def test_failed_ingest_counts_as_failed(fixture_server):
+    fixture_server.route("/", page("/good", "/bad"))
+    fixture_server.route("/good", page())
+    fixture_server.route("/bad", page())
+
+    stats, crawled = crawl(fixture_server, use_sitemaps=False, failing=("/bad",))
+
+    assert sorted(crawled) == ["/", "/good"]
+    assert stats.pages_fetched == 3
+    assert stats.pages_ingested == 2
+    assert stats.pages_failed == 1
+
+def test_gunzip_limit():
+    data = gzip.compress(b"x" * 1000)
+
+    assert gunzip(data, 1000) == b"x" * 1000
+    with pytest.raises(ValueError):
+        gunzip(data, 999)
+    with pytest.raises(ValueError):
+        gunzip(b"\x1f\x8bnot gzip", 1000)
@@ -0,0 +1,91 @@
+import asyncio
+import gzip
+import pytest
+from app.utils.http_fetcher import HttpFetcher, FetchError, ResponseTooLarge
+
+def fetch(fetcher: HttpFetcher, url: str, **kwargs):
+    """Fetch a URL and return the result, closing the fetcher's client"""
+    async def run():
+        try:
+            return await fetcher.fetch(url, **kwargs)
+        finally:
+            await fetcher.close()
+    return asyncio.run(run())
+
+def test_follows_redirects(fixture_server):
+    fixture_server.redirect("/old", "/moved")
+    fixture_server.redirect("/moved", fixture_server.url("/new"), status=302)
+    fixture_server.route("/new", b"<p>here</p>")
+
+    result = fetch(HttpFetcher(), fixture_server.url("/old"))
+
+    assert result.url == fixture_server.url("/new")
+    assert result.read() == b"<p>here</p>"
+    assert fixture_server.requests == ["/old", "/moved", "/new"]
+
+def test_http_errors_raise(fixture_server):
+    with pytest.raises(FetchError, match="HTTP 404"):
+        fetch(HttpFetcher(), fixture_server.url("/missing"))
+
+def test_declared_size_over_limit(fixture_server):
+    fixture_server.route("/big", b"x" * 2048)
+
+    with pytest.raises(ResponseTooLarge):
+        fetch(HttpFetcher(max_bytes=1024), fixture_server.url("/big"))
+
+def test_decompressed_size_over_limit(fixture_server):
+    # Small on the wire, over the limit once decompressed
+    fixture_server.route("/bomb", gzip.compress(b"x" * 100_000), headers={"Content-Encoding": "gzip"})
+
+    with pytest.raises(ResponseTooLarge):
+        fetch(HttpFetcher(max_bytes=10_000), fixture_server.url("/bomb"))
+
+def test_body_within_limit_is_decompressed(fixture_server):
+    fixture_server.route("/page", gzip.compress(b"y" * 5000), headers={"Content-Encoding": "gzip"})
+
+    result = fetch(HttpFetcher(max_bytes=10_000), fixture_server.url("/page"))
+
+    assert result.size == 5000
+    assert result.read() == b"y" * 5000
+
+def test_timeout(fixture_server):
+    fixture_server.route("/slow", b"late", delay=1.0)
+
+    with pytest.raises(FetchError):
+        fetch(HttpFetcher(timeout=0.2), fixture_server.url("/slow"))
+
+def test_content_type_and_header_charset(fixture_server):
+    fixture_server.route(
+        "/latin",
+        "café".encode("latin-1"),
+        headers={"Content-Type": "Text/HTML; charset=ISO-8859-1"}
+    )
+
+    result = fetch(HttpFetcher(), fixture_server.url("/latin"))
+
+    assert result.content_type == "text/html"
+    assert result.text() == "café"
+
+def test_meta_charset(fixture_server):
+    body = '<html><head><meta charset="windows-1252"></head><body>naïve</body></html>'.encode("cp1252")
+    fixture_server.route("/meta", body, headers={"Content-Type": "text/html"})
+
+    result = fetch(HttpFetcher(), fixture_server.url("/meta"))
+
+    assert "naïve" in result.text()
+
+def test_undeclared_utf8(fixture_server):
+    fixture_server.route("/plain", "résumé".encode("utf-8"), headers={"Content-Type": "text/plain"})
+
+    result = fetch(HttpFetcher(), fixture_server.url("/plain"))
+
+    assert result.content_type == "text/plain"
+    assert result.text() == "résumé"
+
+def test_not_modified(fixture_server):
+    fixture_server.route("/cached", status=304, headers={"ETag": '"v1"'})
+
+    result = fetch(HttpFetcher(), fixture_server.url("/cached"), headers={"If-None-Match": '"v1"'})
+
+    assert result.not_modified
+    assert result.read() == b""
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.models.document import DocumentChunk
+from app.services.ingest_pipeline import IngestPipeline
+
+class EmbeddingModel:
+    async def embed_texts(self, texts):
+        if "unembeddable" in texts:
+            raise ValueError("text too long")
+        return [[1.0, 0.0] for _ in texts]
+
+class VectorStore:
+    def __init__(self):
+        self.chunk_ids = []
+
+    async def add_embeddings(self, embeddings, chunk_ids, save=True):
+        self.chunk_ids.extend(chunk_ids)
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["test"]
+
+def chunks(document_id: str, *contents: str):
+    return [DocumentChunk(document_id=document_id, content=content, chunk_index=index) for index, content in enumerate(contents)]
+
+def ingest(db, vector_store, *batches):
+    """Submit the batches together, so that the stages merge them; returns each batch's error or None"""
+    async def run():
+        pipeline = IngestPipeline(db, vector_store, EmbeddingModel(), persist_workers=1)
+        try:
+            # Fill the queue before the workers get to run
+            futures = [await pipeline.submit(batch) for batch in batches]
+            results = await asyncio.gather(*futures, return_exceptions=True)
+            return [result if isinstance(result, Exception) else None for result in results], pipeline.stats()
+        finally:
+            pipeline.shutdown()
+    return asyncio.run(run())
+
+def test_failed_embedding_only_fails_its_document(db):
+    vector_store = VectorStore()
+    good, bad = chunks("good", "a", "b"), chunks("bad", "c", "unembeddable")
+
+    errors, stats = ingest(db, vector_store, good, bad)
+
+    assert errors[0] is None
+    assert isinstance(errors[1], ValueError)
+    assert vector_store.chunk_ids == [chunk.id for chunk in good]
+    assert stats["embed"]["errors"] == 2
+
+def test_failed_write_only_fails_its_document(db, monkeypatch):
+    vector_store = VectorStore()
+    good, bad = chunks("good", "a", "b"), chunks("bad", "c", "d")
+    original = type(db.document_chunks).insert_many
+
+    async def insert_many(self, records, ordered=True):
+        # Unordered: the other records are written before the error
+        written = [record for record in records if record["document_id"] != "bad"]
+        if written:
+            await original(self, written, ordered=ordered)
+        if len(written) < len(records):
+            raise ConnectionError("write failed")
+    monkeypatch.setattr(type(db.document_chunks), "insert_many", insert_many)
+
+    errors, stats = ingest(db, vector_store, good, bad)
+
+    assert errors[0] is None
+    assert isinstance(errors[1], ConnectionError)
+    assert vector_store.chunk_ids == [chunk.id for chunk in good]
+    # Written once, despite the retry
+    assert asyncio.run(db.document_chunks.count_documents({})) == 2
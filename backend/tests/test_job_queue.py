@@ -0,0 +1,97 @@
+import asyncio
+from datetime import datetime
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from app.services.job_queue import JobQueue, JobWorker, PROCESS_QUEUE, PROCESS_DOCUMENT, QUEUED, RUNNING, COMPLETED
+
+@pytest.fixture
+def db():
+    return AsyncMongoMockClient()["test"]
+
+def test_jobs_of_one_document_do_not_run_together(db):
+    async def run():
+        job_queue = JobQueue(db)
+        first = await job_queue.enqueue(PROCESS_DOCUMENT, PROCESS_QUEUE, document_id="doc")
+        second = await job_queue.enqueue(PROCESS_DOCUMENT, PROCESS_QUEUE, document_id="doc")
+        other = await job_queue.enqueue(PROCESS_DOCUMENT, PROCESS_QUEUE, document_id="other")
+
+        claimed = await job_queue.claim(PROCESS_QUEUE, "worker-1")
+        assert claimed.id == first.id
+        # The second job of the document waits, the other document's job runs
+        assert (await job_queue.claim(PROCESS_QUEUE, "worker-2")).id == other.id
+        assert await job_queue.claim(PROCESS_QUEUE, "worker-2") is None
+
+        waiting = await job_queue.get(second.id)
+        assert waiting["status"] == QUEUED
+        assert waiting["attempts"] == 0
+        assert waiting["run_at"] > datetime.now()
+
+        await job_queue.complete(claimed)
+        await db.jobs.update_one({"id": second.id}, {"$set": {"run_at": datetime.now()}})
+        assert (await job_queue.claim(PROCESS_QUEUE, "worker-2")).id == second.id
+    asyncio.run(run())
+
+def test_expired_lock_is_taken_over(db):
+    async def run():
+        job_queue = JobQueue(db, lease=0.05)
+        first = await job_queue.enqueue(PROCESS_DOCUMENT, PROCESS_QUEUE, document_id="doc")
+        await job_queue.claim(PROCESS_QUEUE, "worker-1")
+        await asyncio.sleep(0.1)
+
+        # The dead worker's job is claimed again, lock included
+        reclaimed = await job_queue.claim(PROCESS_QUEUE, "worker-2")
+        assert reclaimed.id == first.id
+        assert reclaimed.attempts == 2
+    asyncio.run(run())
+
+def run_job(job_queue: JobQueue, handler, steal: bool = False):
+    """Run one job through a worker and return (worker stats, whether the handler was cancelled)"""
+    cancelled = []
+
+    async def handle(job):
+        try:
+            await handler(job)
+        except asyncio.CancelledError:
+            cancelled.append(job.id)
+            raise
+
+    async def run():
+        worker = JobWorker(job_queue, {PROCESS_DOCUMENT: handle}, {PROCESS_QUEUE: 1})
+        await job_queue.enqueue(PROCESS_DOCUMENT, PROCESS_QUEUE, document_id="doc")
+        job = await job_queue.claim(PROCESS_QUEUE, worker.id)
+        if steal:
+            await job_queue.collection.update_one({"id": job.id}, {"$set": {"locked_by": "worker-2"}})
+        await asyncio.wait_for(worker._execute(job), 5)
+        return worker.stats()["queues"][PROCESS_QUEUE], (await job_queue.get(job.id))
+
+    stats, job = asyncio.run(run())
+    return stats, job, bool(cancelled)
+
+def test_lost_lease_cancels_handler(db):
+    stats, job, cancelled = run_job(JobQueue(db, lease=0.3), lambda job: asyncio.sleep(10), steal=True)
+
+    assert cancelled
+    assert stats["lost"] == 1
+    assert stats["completed"] == 0
+    # Left to the worker that holds it now
+    assert job["status"] == RUNNING
+    assert job["locked_by"] == "worker-2"
+
+def test_unrenewable_lease_cancels_handler(db):
+    job_queue = JobQueue(db, lease=0.3)
+
+    async def failing_heartbeat(job):
+        raise ConnectionError("database unreachable")
+    job_queue.heartbeat = failing_heartbeat
+
+    stats, job, cancelled = run_job(job_queue, lambda job: asyncio.sleep(10))
+
+    assert cancelled
+    assert stats["lost"] == 1
+
+def test_heartbeat_keeps_handler_running(db):
+    stats, job, cancelled = run_job(JobQueue(db, lease=0.3), lambda job: asyncio.sleep(0.5))
+
+    assert not cancelled
+    assert stats["completed"] == 1
+    assert job["status"] == COMPLETED
@@ -0,0 +1,56 @@
+import os
+import PyPDF2
+import pytest
+from app.utils import pdf_reader
+from app.utils.document_processor import pdf_page_count, extract_pdf_pages
+
+def write_pdf(path, page_count: int) -> str:
+    writer = PyPDF2.PdfWriter()
+    for _ in range(page_count):
+        writer.add_blank_page(width=72, height=72)
+    with open(path, "wb") as file:
+        writer.write(file)
+    return str(path)
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Paths of the PDF readers created, in order"""
+    paths = []
+    original = PyPDF2.PdfReader
+
+    def reader(path, *args, **kwargs):
+        paths.append(path)
+        return original(path, *args, **kwargs)
+    monkeypatch.setattr(pdf_reader.PyPDF2, "PdfReader", reader)
+    monkeypatch.setattr(pdf_reader, "_readers", type(pdf_reader._readers)())
+    return paths
+
+def test_batches_share_one_reader(tmp_path, opened):
+    path = write_pdf(tmp_path / "doc.pdf", 7)
+
+    page_count = pdf_page_count(path)
+    pages = []
+    for start in range(0, page_count, 3):
+        pages.extend(extract_pdf_pages(path, start, min(page_count, start + 3)))
+
+    assert [page_number for page_number, _ in pages] == list(range(1, 8))
+    assert opened == [path]
+    # Dropped after the last batch
+    assert path not in pdf_reader._readers
+
+def test_replaced_file_is_read_again(tmp_path, opened):
+    path = write_pdf(tmp_path / "doc.pdf", 2)
+    assert pdf_page_count(path) == 2
+
+    write_pdf(tmp_path / "new.pdf", 5)
+    os.replace(tmp_path / "new.pdf", path)
+
+    assert pdf_page_count(path) == 5
+    assert opened == [path, path]
+
+def test_cache_is_bounded(tmp_path, opened):
+    paths = [write_pdf(tmp_path / f"doc{number}.pdf", 1) for number in range(pdf_reader.MAX_CACHED_READERS + 1)]
+    for path in paths:
+        pdf_page_count(path)
+
+    assert list(pdf_reader._readers) == paths[1:]
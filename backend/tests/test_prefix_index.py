@@ -0,0 +1,46 @@
+import random
+from app.utils.prefix_index import PrefixIndex, normalize
+
+def brute_force(scores, prefix, limit):
+    matches = [(key, value) for (key, value), score in scores.items() if score > 0 and key.startswith(normalize(prefix))]
+    matches.sort(key=lambda match: (-scores[match], f"{match[0]}\x00{match[1]}"))
+    return [value for _, value in matches[:limit]]
+
+def test_matches_brute_force_under_updates():
+    rng = random.Random(7)
+    index = PrefixIndex(top_k=4, short_prefix=2)
+    keys = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(60)]
+    scores = {}
+    initial = [(key, key, rng.randint(1, 5)) for key in keys[:30]]
+    index.load(initial)
+    for key, value, score in initial:
+        scores[(key, value)] = scores.get((key, value), 0) + score
+
+    for _ in range(2000):
+        key = rng.choice(keys)
+        delta = rng.choice([-3, -1, -1, 1, 2])
+        index.add(key, key, delta)
+        scores[(key, key)] = max(0, scores.get((key, key), 0) + delta)
+
+        prefix = rng.choice(["", "a", "b", "ab", "ca", "abc", "cab"])
+        limit = rng.randint(1, 6)
+        assert index.search(prefix, limit) == brute_force(scores, prefix, limit)
+
+    assert len(index) == sum(1 for score in scores.values() if score > 0)
+
+def test_decrements_rarely_rescan():
+    index = PrefixIndex(top_k=10)
+    index.load((f"query {number}", f"query {number}", 1000 + number) for number in range(1000))
+    scans = []
+    scan = index._scan
+    index._scan = lambda prefix, limit: scans.append(prefix) or scan(prefix, limit)
+
+    # Lower the current best entry until it drops out, again and again
+    for _ in range(100):
+        best = index.search("", 1)[0]
+        index.add(best, best, -500)
+
+    assert index.search("", 3) == ["query 899", "query 898", "query 897"]
+    # Four cached prefixes ("", "q", "qu", "que"), each refilled about
+    # once per top_k evictions instead of on every one
+    assert len(scans) <= 4 * 10
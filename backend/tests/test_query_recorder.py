@@ -0,0 +1,62 @@
+import asyncio
+from types import SimpleNamespace
+from app.services.query_recorder import QueryRecorder
+
+class Collection:
+    def __init__(self):
+        self.writes = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.writes.append(len(operations))
+
+def test_failing_callback_does_not_stop_flushing():
+    db = SimpleNamespace(search_queries=Collection())
+    calls = []
+
+    def on_flush(counts):
+        calls.append(counts)
+        raise RuntimeError("suggestion index unavailable")
+
+    async def run():
+        recorder = QueryRecorder(db, flush_interval=0.05, on_flush=on_flush)
+        task = asyncio.create_task(recorder.run())
+        recorder.record("first query")
+        await asyncio.sleep(0.15)
+        recorder.record("second query")
+        await asyncio.sleep(0.15)
+        # Still running after the callback failed twice
+        assert not task.done()
+        task.cancel()
+        return recorder
+
+    recorder = asyncio.run(run())
+
+    assert db.search_queries.writes == [1, 1]
+    assert calls == [{"first query": 1}, {"second query": 1}]
+    assert recorder.flushed == 2
+    assert recorder.stats()["pending"] == 0
+
+def test_loop_survives_flush_errors():
+    db = SimpleNamespace(search_queries=Collection())
+    recorder = QueryRecorder(db, flush_interval=0.05)
+    failures = []
+    flush = recorder.flush
+
+    async def flaky_flush():
+        if not failures:
+            failures.append(True)
+            raise RuntimeError("unexpected")
+        return await flush()
+    recorder.flush = flaky_flush
+
+    async def run():
+        task = asyncio.create_task(recorder.run())
+        recorder.record("query")
+        await asyncio.sleep(0.2)
+        assert not task.done()
+        task.cancel()
+
+    asyncio.run(run())
+
+    assert failures
+    assert db.search_queries.writes == [1]
@@ -0,0 +1,99 @@
+import asyncio
+import numpy as np
+import pytest
+from app.utils.chunk_text_store import ChunkTextStore
+from app.utils.vector_store import VectorStore
+
+DIMENSION = 8
+
+def vector(seed: int):
+    return np.random.default_rng(seed).random(DIMENSION).tolist()
+
+def open_store(index_type: str) -> VectorStore:
+    """A vector store as one process would open it on the shared data directory"""
+    store = VectorStore(dimension=DIMENSION, index_type=index_type, text_store=ChunkTextStore())
+    asyncio.run(store.load_or_create_index())
+    return store
+
+def add(store: VectorStore, chunk_id: str, seed: int, save: bool = True):
+    async def run():
+        await store.add_embeddings([vector(seed)], [chunk_id], save=save)
+        store.put_chunk_texts([{"id": chunk_id, "content": f"text of {chunk_id}"}])
+        if save:
+            await store.save_index()
+    asyncio.run(run())
+
+def saved_chunks(index_type: str):
+    """Chunk IDs of the saved index, with their text and whether their vector is found"""
+    store = open_store(index_type)
+    texts = store.get_chunk_texts(list(store.chunk_ids))
+    found = {}
+    for chunk_id, seed in SEEDS.items():
+        if chunk_id in store.chunk_ids:
+            top = asyncio.run(store.search(vector(seed), limit=1))
+            found[chunk_id] = top[0]["chunk_id"] == chunk_id
+    assert store.index.ntotal == len(store.chunk_ids)
+    return {chunk_id: texts[chunk_id]["content"] for chunk_id in store.chunk_ids}, found
+
+SEEDS = {"a": 1, "b": 2, "c": 3, "d": 4}
+
+@pytest.fixture(params=["Flat", "HNSW", "IVF"])
+def index_type(request, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return request.param
+
+def test_saves_of_two_processes_are_merged(index_type):
+    api = open_store(index_type)
+    worker = open_store(index_type)
+    add(api, "a", SEEDS["a"])
+    add(worker, "b", SEEDS["b"])
+
+    texts, found = saved_chunks(index_type)
+
+    assert texts == {"a": "text of a", "b": "text of b"}
+    assert all(found.values())
+
+def test_deletions_are_not_undone_by_another_save(index_type):
+    api = open_store(index_type)
+    add(api, "a", SEEDS["a"])
+    add(api, "b", SEEDS["b"])
+    worker = open_store(index_type)
+
+    asyncio.run(api.delete_embeddings(["a"]))
+    add(worker, "c", SEEDS["c"])
+
+    texts, found = saved_chunks(index_type)
+
+    assert sorted(texts) == ["b", "c"]
+    assert all(found.values())
+
+def test_reload_keeps_unsaved_changes(index_type):
+    api = open_store(index_type)
+    worker = open_store(index_type)
+    add(worker, "a", SEEDS["a"], save=False)
+    add(api, "b", SEEDS["b"])
+
+    assert asyncio.run(worker.reload_if_changed())
+    assert sorted(worker.chunk_ids) == ["a", "b"]
+    assert not asyncio.run(worker.reload_if_changed())
+
+    add(worker, "c", SEEDS["c"])
+    texts, found = saved_chunks(index_type)
+
+    assert sorted(texts) == ["a", "b", "c"]
+    assert all(found.values())
+
+def test_reset_applies_to_saved_index(index_type):
+    api = open_store(index_type)
+    worker = open_store(index_type)
+    add(worker, "a", SEEDS["a"])
+    add(api, "b", SEEDS["b"], save=False)
+
+    asyncio.run(api.reset_index())
+    add(worker, "c", SEEDS["c"])
+    add(api, "d", SEEDS["d"])
+
+    texts, found = saved_chunks(index_type)
+
+    assert sorted(texts) == ["c", "d"]
+    assert all(found.values())